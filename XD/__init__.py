@@ -3,21 +3,88 @@ import asyncio
 import logging
 import json
 from functools import wraps
-from .exceptions import UnAuthorizedBotToken, UnKnownError, ChatNotFound, ConversationTimeOut
+from .exceptions import UnAuthorizedBotToken, UnKnownError, ChatNotFound, ConversationTimeOut, UserBlockedBot, BotForbidden, InvalidFileId
+from .transport import HTTPTransport
+from .dispatcher import Dispatcher
+from .sharding import ShardedDispatcher
+from .manager import BotManager
+from .webhook import WebhookServer, claim_reply
+from .router import Router
+from .ratelimit import RateLimiter, INTERACTIVE, BULK
+from .broadcast import broadcast, BroadcastResult
+from .upload import InputFile, is_local_file
+from .filecache import FileIdCache, extract_file_id
+from .cache import ResponseCache
+from .entities import EntityStore
+from .methods import BotMethods
+from .codec import get_codec, CONTENT_TYPES
+from .conversation import Conversations
+from .journal import UpdateJournal
+from .metrics import Metrics
 from datetime import datetime
 
+_UNSET = object()
+
+
 class TelegramMessage:
+    __slots__ = ('data', 'bot', 'message_id', 'text', 'entities', 'command', 'match', '_date', '_chat', '_from_user', '_message')
+
     def __init__(self, message_data, bot):
+        """
+        Wrap a raw message from the Telegram API.
+
+        Only the fields nearly every handler reads are copied up front. The formatted date,
+        the nested chat and sender objects and the pretty-printed message dict are built
+        the first time they are accessed. The chat and sender come from the bot's entity
+        store when it has one, so messages from the same chat or user share them.
+        """
         self.data = message_data
         self.message_id = message_data.get('message_id', 0)
-        self.date = self.format_date(message_data.get('date', 0))
-        self.chat = self.Chat(message_data.get('chat', {}))
-        self.from_user = self.FromUser(message_data.get('from', {}))
         self.text = message_data.get('text', '')
         self.entities = message_data.get('entities', [])
         self.command = message_data.get('command', [])
+        self.match = None
         self.bot = bot
-        self.message = self.pretty_print()
+        self._date = _UNSET
+        self._chat = None
+        self._from_user = None
+        self._message = None
+
+    @property
+    def date(self):
+        if self._date is _UNSET:
+            self._date = self.format_date(self.data.get('date', 0))
+        return self._date
+
+    @property
+    def chat(self):
+        if self._chat is None:
+            entities = getattr(self.bot, 'entities', None)
+            chat_data = self.data.get('chat', {})
+            self._chat = entities.chat(chat_data) if entities is not None else self.Chat(chat_data)
+        return self._chat
+
+    @property
+    def from_user(self):
+        if self._from_user is None:
+            entities = getattr(self.bot, 'entities', None)
+            from_data = self.data.get('from', {})
+            self._from_user = entities.user(from_data) if entities is not None else self.FromUser(from_data)
+        return self._from_user
+
+    @property
+    def message(self):
+        if self._message is None:
+            self._message = self.pretty_print()
+        return self._message
+
+    @property
+    def content_type(self):
+        data = self.data
+        for content_type in CONTENT_TYPES:
+            if content_type in data:
+                return content_type
+        return None
 
     def format_date(self, timestamp):
         if timestamp:
@@ -25,6 +92,9 @@ class TelegramMessage:
         return None
 
     class Chat:
+        __slots__ = ('id', 'type', 'title', 'username', 'is_verified', 'is_restricted', 'is_creator', 'is_scam', 'is_fake',
+                     'has_protected_content', '_permissions_data', '_permissions')
+
         def __init__(self, chat_data):
             self.id = chat_data.get('id', 0)
             self.type = chat_data.get('type', '')
@@ -36,9 +106,19 @@ class TelegramMessage:
             self.is_scam = chat_data.get('is_scam', False)
             self.is_fake = chat_data.get('is_fake', False)
             self.has_protected_content = chat_data.get('has_protected_content', False)
-            self.permissions = self.ChatPermissions(chat_data.get('permissions', {}))
+            self._permissions_data = chat_data.get('permissions', {})
+            self._permissions = None
+
+        @property
+        def permissions(self):
+            if self._permissions is None:
+                self._permissions = self.ChatPermissions(self._permissions_data)
+            return self._permissions
 
         class ChatPermissions:
+            __slots__ = ('can_send_messages', 'can_send_media_messages', 'can_send_other_messages', 'can_send_polls',
+                         'can_add_web_page_previews', 'can_change_info', 'can_invite_users', 'can_pin_messages')
+
             def __init__(self, permissions_data):
                 self.can_send_messages = permissions_data.get('can_send_messages', False)
                 self.can_send_media_messages = permissions_data.get('can_send_media_messages', False)
@@ -50,6 +130,10 @@ class TelegramMessage:
                 self.can_pin_messages = permissions_data.get('can_pin_messages', False)
 
     class FromUser:
+        __slots__ = ('id', 'first_name', 'last_name', 'username', 'is_bot', 'is_premium', 'language_code', 'is_self',
+                     'is_contact', 'is_mutual_contact', 'is_deleted', 'is_verified', 'is_restricted', 'is_scam', 'is_fake',
+                     'is_support', 'status', 'dc_id', '_from_data', '_emoji_status', '_photo')
+
         def __init__(self, from_data):
             self.id = from_data.get('id', 0)
             self.first_name = from_data.get('first_name', '')
@@ -68,15 +152,32 @@ class TelegramMessage:
             self.is_fake = from_data.get('is_fake', False)
             self.is_support = from_data.get('is_support', False)
             self.status = from_data.get('status', '')
-            self.emoji_status = self.EmojiStatus(from_data.get('emoji_status', {}))
             self.dc_id = from_data.get('dc_id', 0)
-            self.photo = self.ChatPhoto(from_data.get('photo', {}))
+            self._from_data = from_data
+            self._emoji_status = None
+            self._photo = None
+
+        @property
+        def emoji_status(self):
+            if self._emoji_status is None:
+                self._emoji_status = self.EmojiStatus(self._from_data.get('emoji_status', {}))
+            return self._emoji_status
+
+        @property
+        def photo(self):
+            if self._photo is None:
+                self._photo = self.ChatPhoto(self._from_data.get('photo', {}))
+            return self._photo
 
         class EmojiStatus:
+            __slots__ = ('custom_emoji_id',)
+
             def __init__(self, emoji_status_data):
                 self.custom_emoji_id = emoji_status_data.get('custom_emoji_id', '')
 
         class ChatPhoto:
+            __slots__ = ('small_file_id', 'small_photo_unique_id', 'big_file_id', 'big_photo_unique_id')
+
             def __init__(self, photo_data):
                 self.small_file_id = photo_data.get('small_file_id', '')
                 self.small_photo_unique_id = photo_data.get('small_photo_unique_id', '')
@@ -84,58 +185,63 @@ class TelegramMessage:
                 self.big_photo_unique_id = photo_data.get('big_photo_unique_id', '')
 
     def pretty_print(self):
+        chat = self.chat
+        permissions = chat.permissions
+        from_user = self.from_user
+        emoji_status = from_user.emoji_status
+        photo = from_user.photo
         return {
             'message_id': self.message_id,
             'date': self.date,
             'chat': {
-                'id': self.chat.id,
-                'type': self.chat.type,
-                'title': self.chat.title,
-                'username': self.chat.username,
-                'is_verified': self.chat.is_verified,
-                'is_restricted': self.chat.is_restricted,
-                'is_creator': self.chat.is_creator,
-                'is_scam': self.chat.is_scam,
-                'is_fake': self.chat.is_fake,
-                'has_protected_content': self.chat.has_protected_content,
+                'id': chat.id,
+                'type': chat.type,
+                'title': chat.title,
+                'username': chat.username,
+                'is_verified': chat.is_verified,
+                'is_restricted': chat.is_restricted,
+                'is_creator': chat.is_creator,
+                'is_scam': chat.is_scam,
+                'is_fake': chat.is_fake,
+                'has_protected_content': chat.has_protected_content,
                 'permissions': {
-                    'can_send_messages': self.chat.permissions.can_send_messages,
-                    'can_send_media_messages': self.chat.permissions.can_send_media_messages,
-                    'can_send_other_messages': self.chat.permissions.can_send_other_messages,
-                    'can_send_polls': self.chat.permissions.can_send_polls,
-                    'can_add_web_page_previews': self.chat.permissions.can_add_web_page_previews,
-                    'can_change_info': self.chat.permissions.can_change_info,
-                    'can_invite_users': self.chat.permissions.can_invite_users,
-                    'can_pin_messages': self.chat.permissions.can_pin_messages,
+                    'can_send_messages': permissions.can_send_messages,
+                    'can_send_media_messages': permissions.can_send_media_messages,
+                    'can_send_other_messages': permissions.can_send_other_messages,
+                    'can_send_polls': permissions.can_send_polls,
+                    'can_add_web_page_previews': permissions.can_add_web_page_previews,
+                    'can_change_info': permissions.can_change_info,
+                    'can_invite_users': permissions.can_invite_users,
+                    'can_pin_messages': permissions.can_pin_messages,
                 },
             },
             'from_user': {
-                'id': self.from_user.id,
-                'first_name': self.from_user.first_name,
-                'last_name': self.from_user.last_name,
-                'username': self.from_user.username,
-                'is_bot': self.from_user.is_bot,
-                'is_premium': self.from_user.is_premium,
-                'language_code': self.from_user.language_code,
-                'is_self': self.from_user.is_self,
-                'is_contact': self.from_user.is_contact,
-                'is_mutual_contact': self.from_user.is_mutual_contact,
-                'is_deleted': self.from_user.is_deleted,
-                'is_verified': self.from_user.is_verified,
-                'is_restricted': self.from_user.is_restricted,
-                'is_scam': self.from_user.is_scam,
-                'is_fake': self.from_user.is_fake,
-                'is_support': self.from_user.is_support,
-                'status': self.from_user.status,
+                'id': from_user.id,
+                'first_name': from_user.first_name,
+                'last_name': from_user.last_name,
+                'username': from_user.username,
+                'is_bot': from_user.is_bot,
+                'is_premium': from_user.is_premium,
+                'language_code': from_user.language_code,
+                'is_self': from_user.is_self,
+                'is_contact': from_user.is_contact,
+                'is_mutual_contact': from_user.is_mutual_contact,
+                'is_deleted': from_user.is_deleted,
+                'is_verified': from_user.is_verified,
+                'is_restricted': from_user.is_restricted,
+                'is_scam': from_user.is_scam,
+                'is_fake': from_user.is_fake,
+                'is_support': from_user.is_support,
+                'status': from_user.status,
                 'emoji_status': {
-                    'custom_emoji_id': self.from_user.emoji_status.custom_emoji_id,
+                    'custom_emoji_id': emoji_status.custom_emoji_id,
                 },
-                'dc_id': self.from_user.dc_id,
+                'dc_id': from_user.dc_id,
                 'photo': {
-                    'small_file_id': self.from_user.photo.small_file_id,
-                    'small_photo_unique_id': self.from_user.photo.small_photo_unique_id,
-                    'big_file_id': self.from_user.photo.big_file_id,
-                    'big_photo_unique_id': self.from_user.photo.big_photo_unique_id,
+                    'small_file_id': photo.small_file_id,
+                    'small_photo_unique_id': photo.small_photo_unique_id,
+                    'big_file_id': photo.big_file_id,
+                    'big_photo_unique_id': photo.big_photo_unique_id,
                 },
             },
             'text': self.text,
@@ -183,6 +289,31 @@ class TelegramMessage:
         """
         return await self.bot.send_message(self.chat.id, text, parse_mode, self.message_id)
 
+    async def ask(self, text, timeout=60, filters=None, parse_mode='MARKDOWN'):
+        """
+        Reply with a question and wait for the sender's next message in this chat.
+
+        Parameters:
+        text (str): The question to send.
+        timeout (float, optional): How long to wait for the answer, in seconds. None waits forever. Default is 60.
+        filters (Filter, optional): A predicate the answer must satisfy, built from XD.filters. Messages that fail it
+            are handled by the normal handlers. Default is None.
+        parse_mode (str): The mode in which the text should be parsed. Default is 'MARKDOWN'.
+
+        Returns:
+        TelegramMessage: The answer.
+
+        Raises:
+        ConversationTimeOut: If no answer arrived in time.
+        """
+        answer = self.bot.conversations.register(self.chat.id, self.from_user.id or None, filters, timeout)
+        try:
+            await self.reply_text(text, parse_mode)
+        except BaseException:
+            answer.cancel()
+            raise
+        return await answer
+
     async def reply_photo(self, photo, caption=None):
         """
         Send a photo as a reply to the current message.
@@ -275,13 +406,30 @@ class TelegramMessage:
         """
         return await self.bot.send_voice(self.chat.id, voice, self.message_id) 
 
-class Client:
-    def __init__(self, token):
+class Client(BotMethods):
+    def __init__(self, token, api_url='https://api.telegram.org', transport=None, workers=16, chat_queue_size=100, rate_limiter=None, file_cache=None, codec=None, metrics=None, journal=None, cache=None, entities=None):
         """
         Initialize a new instance of the Client class.
 
         Parameters:
         token (str): The bot token for authenticating with the Telegram API.
+        api_url (str, optional): The root URL of the Bot API server. Default is 'https://api.telegram.org'.
+        transport (HTTPTransport, optional): The pooled HTTP transport used for API calls. Default is a new HTTPTransport.
+        workers (int, optional): The number of updates that may be handled concurrently. Default is 16.
+        chat_queue_size (int, optional): The maximum number of pending updates per chat. Default is 100.
+        rate_limiter (RateLimiter, optional): The scheduler that keeps outgoing calls within Telegram's flood limits.
+            Default is a new RateLimiter. Pass False to send without rate limiting.
+        file_cache (FileIdCache, optional): The cache of file_ids of uploaded media, so identical media is not uploaded twice. Default is None.
+        codec (JSONCodec, optional): The codec incoming updates are decoded with. Use get_codec(typed_updates=True)
+            to decode them into typed structs. Default is the fastest available JSON backend.
+        metrics (Metrics, optional): Where API call latencies, handler run times, update lag and queue depths
+            are recorded. Default is None, which records nothing.
+        journal (UpdateJournal, optional): The write-ahead journal received updates are written to before they are
+            confirmed, so they survive a crash and are handled after a restart. Default is None.
+        cache (ResponseCache, optional): The read-through cache for idempotent methods such as get_me, get_chat and
+            get_chat_member. Default is None, which sends every call.
+        entities (EntityStore, optional): The identity map that lets messages from the same chat or user share their
+            chat and sender objects. Default is a new EntityStore. Pass False to build them for every message.
 
         Raises:
         ValueError: If the provided token is not 46 characters long.
@@ -290,24 +438,57 @@ class Client:
         token (str): The bot token.
         base_url (str): The base URL for making API requests.
         logger (logging.Logger): The logger for logging messages.
-        _message_handlers (dict): A dictionary to store message handlers.
-        session (requests.Session): The session for making HTTP requests.
+        router (Router): The registry that matches messages to their handlers.
+        username (str): The bot username, known once the token has been validated.
+        session (requests.Session): The session validate_token uses, created on first use.
+        transport (HTTPTransport): The shared, pooled transport used by every send_* method.
+        dispatcher (Dispatcher): The worker pool that handles updates, in order within each chat.
+        webhook (WebhookServer): The embedded webhook server, once start_webhook has been called.
+        rate_limiter (RateLimiter): The outbound scheduler, or None if rate limiting is disabled.
+        file_cache (FileIdCache): The file_id cache, or None if uploads are not cached.
+        codec (JSONCodec): The codec for incoming updates.
+        metrics (Metrics): The metrics of the client, or None if they are not recorded.
+        conversations (Conversations): The handlers waiting for a chat's next message, see wait_for.
+        journal (UpdateJournal): The update journal, or None if updates are not journaled.
+        cache (ResponseCache): The response cache, or None if results are not cached.
+        entities (EntityStore): The chats and users seen recently, or None if they are not interned.
         """
         if len(token) != 46:
             raise ValueError("Invalid bot token length. Bot token must be 46 characters long.")
         self.token = token
-        self.base_url = f"https://api.telegram.org/bot{token}"
+        self.base_url = f"{api_url}/bot{token}"
         self.logger = logging.getLogger(__name__)
         self._setup_logging()
-        self._message_handlers = {}
-        self.session = requests.Session()
+        self.router = Router()
+        self.username = None
+        self._session = None
+        self.transport = transport if transport is not None else HTTPTransport()
+        self.dispatcher = Dispatcher(workers, chat_queue_size)
+        self.webhook = None
+        if rate_limiter is None:
+            rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter or None
+        self.file_cache = file_cache
+        self.codec = codec if codec is not None else get_codec()
+        self.metrics = metrics
+        self.conversations = Conversations(lambda message_data: TelegramMessage(message_data, self))
+        self.journal = journal
+        self.cache = cache
+        self.entities = EntityStore() if entities is None else entities or None
+        if metrics is not None:
+            metrics.add_gauge('dispatcher_pending_updates', 'Updates submitted to the dispatcher but not yet handled.',
+                              lambda: self.dispatcher.pending)
+            if self.rate_limiter is not None:
+                metrics.add_gauge('rate_limiter_queued_calls', 'API calls waiting for the rate limiter.',
+                                  lambda: self.rate_limiter.stats()['queued'])
 
     def _setup_logging(self):
         """
         Initialize and configure the logging system for the Client class.
 
         This method sets up a StreamHandler to log messages to the console,
-        and configures the logging format and level.
+        and configures the logging format and level. Every Client shares the same
+        logger, so the handler is only added once, however many clients are created.
 
         Parameters:
         None
@@ -318,15 +499,28 @@ class Client:
         Raises:
         None
         """
+        if self.logger.handlers:
+            return
         handler = logging.StreamHandler()
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         handler.setFormatter(formatter)
         self.logger.addHandler(handler)
         self.logger.setLevel(logging.INFO)
 
+    @property
+    def session(self):
+        """
+        requests.Session: The session validate_token uses, created on first use.
+        """
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
     def validate_token(self):
         """
         Validates the bot token by making a GET request to the Telegram API's getMe endpoint.
+        This call blocks; start() and start_webhook() validate through the async transport instead.
+        With a response cache, a cached getMe result is used instead, and a fresh one is cached.
 
         Parameters:
         None
@@ -341,10 +535,18 @@ class Client:
         Note:
         This method logs the validation result using the logger instance.
         """
+        if self.cache is not None:
+            bot_info = self.cache.peek('getMe')
+            if bot_info is not None:
+                self.username = bot_info.get('username')
+                return True
         try:
             response = self.session.get(f"{self.base_url}/getMe")
             if response.status_code == 200:
                 bot_info = response.json()['result']
+                if self.cache is not None:
+                    self.cache.put('getMe', None, bot_info)
+                self.username = bot_info.get('username')
                 self.logger.info("Bot token is valid.")
                 return True
             elif response.status_code == 401:
@@ -355,7 +557,57 @@ class Client:
             self.logger.error(f"Exception occurred while validating bot token: {e}")
             return False
 
-    async def _send_request(self, method, data, files=None):
+    async def _validate_token(self):
+        """
+        Validate the bot token with a getMe call through the transport, without blocking the event loop.
+
+        Returns:
+        bool: True if the token is valid, False otherwise.
+        """
+        if self.cache is not None:
+            bot_info = self.cache.peek('getMe')
+            if bot_info is not None:
+                self.username = bot_info.get('username')
+                return True
+        try:
+            response = await self._send_request('getMe', {}, raise_errors=True)
+        except Exception as e:
+            self.logger.error(f"Exception occurred while validating bot token: {e}")
+            return False
+        bot_info = response.get('result') or {}
+        if self.cache is not None:
+            self.cache.put('getMe', None, bot_info)
+        self.username = bot_info.get('username')
+        self.logger.info("Bot token is valid.")
+        return True
+
+    async def _request(self, method, data, files=None, timeout=None, decode=None):
+        """
+        Send one API call through the transport, recording it in the metrics if they are enabled.
+
+        Parameters:
+        method (str): The Telegram API method to call.
+        data (dict): The parameters of the call.
+        files (dict, optional): The files to send. Default is None.
+        timeout (float, optional): The total timeout of the call, in seconds. Default is the transport timeout.
+        decode (callable, optional): Decodes the response body. Default is the transport codec's loads.
+
+        Returns:
+        tuple: The HTTP status code and the decoded response body.
+        """
+        metrics = self.metrics
+        if metrics is None:
+            return await self.transport.request(f"{self.base_url}/{method}", data, files, timeout, decode)
+        started = metrics.request_started()
+        try:
+            status, payload = await self.transport.request(f"{self.base_url}/{method}", data, files, timeout, decode)
+        except BaseException as e:
+            metrics.request_failed(method, started, e)
+            raise
+        metrics.request_finished(method, started, status)
+        return status, payload
+
+    async def _send_request(self, method, data, files=None, timeout=None, priority=INTERACTIVE, raise_errors=False, in_reply=True):
         """
         Send a POST request to the Telegram API with the specified method, data, and files.
 
@@ -363,26 +615,118 @@ class Client:
         method (str): The Telegram API method to call.
         data (dict): The data to send in the request body.
         files (dict, optional): The files to send in the request. Default is None.
+        timeout (float, optional): The total timeout of this request, in seconds. Default is the transport timeout.
+        priority (int, optional): The rate limiter priority class, INTERACTIVE or BULK. Default is INTERACTIVE.
+        raise_errors (bool, optional): Whether to raise instead of logging and returning None on failure. Default is False.
+        in_reply (bool, optional): Whether the call may be returned in the webhook response. Default is True.
 
         Returns:
         dict: The JSON response from the Telegram API. If the request fails or encounters an error, returns None.
 
         Raises:
-        Exception: If an exception occurs while sending the request.
+        UserBlockedBot: If raise_errors is True and the bot was blocked by the user.
+        BotForbidden: If raise_errors is True and the bot may not message the chat for another reason,
+            e.g. the user is deactivated or the bot was removed from the group.
+        InvalidFileId: If raise_errors is True and the API rejected a file_id.
+        ChatNotFound: If raise_errors is True and the chat does not exist.
+        UnAuthorizedBotToken: If raise_errors is True and the token was rejected.
+        UnKnownError: If raise_errors is True and the API reported any other error.
+        Exception: If raise_errors is True and an exception occurs while sending the request.
 
         Note:
         This method logs the request details, response status code, and response text using the logger instance.
+        The request is sent through the client's pooled transport, so it never blocks the event loop.
+        Every call except get* calls first waits for the rate limiter: for the global bucket, and for the
+        chat's bucket too when it is addressed to a chat. A 429 response pauses the chat's bucket, or the
+        global one for calls without a chat, for the retry_after Telegram asks for before the call is retried.
+        In webhook mode, the first call a handler makes (except get* calls and uploads) is returned
+        in the webhook response instead, and the result is only {'ok': True, 'result': True}.
         """
-        try:
-            response = requests.post(f"{self.base_url}/{method}", data=data, files=files)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                self.logger.error(f"Failed to send {method} request. Status code: {response.status_code}, Response: {response.text}")
+        chat_id = data.get('chat_id') if data else None
+        limited = self.rate_limiter is not None and not method.startswith('get')
+        retries = 0
+        while True:
+            if limited:
+                await self.rate_limiter.acquire(chat_id, priority)
+            if in_reply and files is None and not method.startswith('get') and claim_reply(method, data):
+                return {'ok': True, 'result': True}
+            try:
+                status, payload = await self._request(method, data, files, timeout)
+                if status == 200:
+                    return payload
+                elif status == 429 and self.rate_limiter is not None and retries < self.rate_limiter.max_retries:
+                    parameters = payload.get('parameters', {}) if isinstance(payload, dict) else {}
+                    retry_after = parameters.get('retry_after', 1)
+                    self.logger.warning(f"Flood limit hit by {method} request. Retrying in {retry_after} seconds.")
+                    retries += 1
+                    if limited:
+                        self.rate_limiter.throttle(chat_id, retry_after)
+                    else:
+                        await asyncio.sleep(retry_after)
+                    continue
+                elif raise_errors:
+                    raise self._api_error(status, payload)
+                else:
+                    self.logger.error(f"Failed to send {method} request. Status code: {status}, Response: {payload}")
+                    return None
+            except Exception as e:
+                if raise_errors:
+                    raise
+                self.logger.error(f"Exception occurred while sending {method} request: {e}")
                 return None
-        except Exception as e:
-            self.logger.error(f"Exception occurred while sending {method} request: {e}")
+
+    async def _call_method(self, method, args, kwargs):
+        """
+        Call a Bot API method described by a declarative spec from XD.methods.
+
+        Parameters:
+        method (Method): The spec of the method.
+        args (tuple): The positional arguments of the call.
+        kwargs (dict): The keyword arguments of the call.
+
+        Returns:
+        The 'result' of the API response, or None if the request failed. Methods the response cache
+        holds a TTL for are answered from the cache when possible.
+
+        Raises:
+        TypeError: If the arguments do not match the spec.
+        """
+        data = method.build(args, kwargs)
+        if self.cache is not None and method.api_name in self.cache.ttls:
+            return await self.cache.get(method.api_name, data, lambda: self._call_result(method.api_name, data))
+        return await self._call_result(method.api_name, data)
+
+    async def _call_result(self, method, data):
+        """
+        Send an API call and return the 'result' of its response, or None if the request failed.
+        """
+        response = await self._send_request(method, data)
+        if response is None:
             return None
+        return response.get('result')
+
+    def _api_error(self, status, payload):
+        """
+        Map an unsuccessful Telegram API response to the matching exception.
+
+        Parameters:
+        status (int): The HTTP status code of the response.
+        payload (dict or str): The decoded response body.
+
+        Returns:
+        Exception: The exception describing the error.
+        """
+        description = payload.get('description', '') if isinstance(payload, dict) else str(payload)
+        lowered = description.lower()
+        if status == 401:
+            return UnAuthorizedBotToken(self.token)
+        if status == 403:
+            return UserBlockedBot() if 'blocked' in lowered else BotForbidden(description)
+        if status == 400 and 'chat not found' in lowered:
+            return ChatNotFound()
+        if status == 400 and ('file identifier' in lowered or 'file_id' in lowered):
+            return InvalidFileId(description)
+        return UnKnownError(f"{status} {description}".strip())
 
     async def send_message(self, chat_id, text, parse_mode='MARKDOWN', reply_to_message_id=None):
         """
@@ -409,14 +753,59 @@ class Client:
             data['reply_to_message_id'] = reply_to_message_id
         return await self._send_request('sendMessage', data)
 
-    async def send_audio(self, chat_id, audio, reply_to_message_id=None):
+    async def _send_media(self, method, field, media, data, progress=None):
+        """
+        Send a media method, streaming the file if one has to be uploaded.
+
+        Parameters:
+        method (str): The Telegram API method to call, e.g. 'sendPhoto'.
+        field (str): The name of the media parameter, e.g. 'photo'.
+        media (str, bytes, file-like object or InputFile): The media. Paths to local files, bytes and file objects
+            are uploaded as a stream; other strings are sent as a file_id or URL.
+        data (dict): The other parameters of the call.
+        progress (callable, optional): Called as progress(sent, total) while the file is uploaded. Default is None.
+
+        Returns:
+        dict: The JSON response from the Telegram API, or None if the request failed.
+
+        Note:
+        If the client has a file cache, media uploaded before is sent by its cached file_id instead.
+        Should Telegram reject that file_id, the entry is dropped and the file is uploaded again; any other
+        failure of that call returns None without uploading, and the entry is kept.
+        """
+        if isinstance(media, str) and not is_local_file(media):
+            data[field] = media
+            return await self._send_request(method, data)
+        cache_key = None
+        if self.file_cache is not None:
+            cache_key = await self.file_cache.key(field, media)
+            file_id = await self.file_cache.get(cache_key) if cache_key is not None else None
+            if file_id is not None:
+                try:
+                    return await self._send_request(method, dict(data, **{field: file_id}), raise_errors=True)
+                except InvalidFileId:
+                    self.file_cache.discard(cache_key)
+                except Exception as e:
+                    self.logger.error(f"Exception occurred while sending {method} request: {e}")
+                    return None
+        if not isinstance(media, InputFile):
+            media = InputFile(media, progress=progress)
+        response = await self._send_request(method, data, {field: media})
+        if cache_key is not None and response is not None:
+            file_id = extract_file_id(response.get('result'), field)
+            if file_id is not None:
+                self.file_cache.put(cache_key, file_id)
+        return response
+
+    async def send_audio(self, chat_id, audio, reply_to_message_id=None, progress=None):
         """
         Send an audio file to a specified chat.
 
         Parameters:
         chat_id (int): The unique identifier for the target chat.
-        audio (file-like object or str): The audio file to send. If a string is provided, it should be the file path.
+        audio (file-like object or str): The audio file to send. A path to a local file is streamed from disk, any other string is sent as a file_id or URL.
         reply_to_message_id (int, optional): The unique identifier of the message to reply to. Default is None.
+        progress (callable, optional): Called as progress(sent, total) while the file is uploaded. Default is None.
 
         Returns:
         dict: The JSON response from the Telegram API, containing information about the sent audio.
@@ -429,20 +818,20 @@ class Client:
         The 'chat_id', 'audio', and 'reply_to_message_id' parameters are used as data for the request.
         """
         data = {'chat_id': chat_id}
-        files = {'audio': audio}
         if reply_to_message_id:
             data['reply_to_message_id'] = reply_to_message_id
-        return await self._send_request('sendAudio', data, files)
+        return await self._send_media('sendAudio', 'audio', audio, data, progress)
 
-    async def send_photo(self, chat_id, photo, caption=None, reply_to_message_id=None):
+    async def send_photo(self, chat_id, photo, caption=None, reply_to_message_id=None, progress=None):
         """
         Send a photo file to a specified chat.
 
         Parameters:
         chat_id (int): The unique identifier for the target chat.
-        photo (file-like object or str): The photo file to send. If a string is provided, it should be the file path.
+        photo (file-like object or str): The photo file to send. A path to a local file is streamed from disk, any other string is sent as a file_id or URL.
         caption (str, optional): The caption for the photo. Default is None.
         reply_to_message_id (int, optional): The unique identifier of the message to reply to. Default is None.
+        progress (callable, optional): Called as progress(sent, total) while the file is uploaded. Default is None.
 
         Returns:
         dict: The JSON response from the Telegram API, containing information about the sent photo.
@@ -457,19 +846,19 @@ class Client:
         data = {'chat_id': chat_id}
         if caption:
             data['caption'] = caption
-        files = {'photo': photo}
         if reply_to_message_id:
             data['reply_to_message_id'] = reply_to_message_id
-        return await self._send_request('sendPhoto', data, files)
+        return await self._send_media('sendPhoto', 'photo', photo, data, progress)
 
-    async def send_document(self, chat_id, document, reply_to_message_id=None):
+    async def send_document(self, chat_id, document, reply_to_message_id=None, progress=None):
         """
         Send a document file to a specified chat.
 
         Parameters:
         chat_id (int): The unique identifier for the target chat.
-        document (file-like object or str): The document file to send. If a string is provided, it should be the file path.
+        document (file-like object or str): The document file to send. A path to a local file is streamed from disk, any other string is sent as a file_id or URL.
         reply_to_message_id (int, optional): The unique identifier of the message to reply to. Default is None.
+        progress (callable, optional): Called as progress(sent, total) while the file is uploaded. Default is None.
 
         Returns:
         dict: The JSON response from the Telegram API, containing information about the sent document.
@@ -482,19 +871,19 @@ class Client:
         The 'chat_id', 'document', and 'reply_to_message_id' parameters are used as data for the request.
         """
         data = {'chat_id': chat_id}
-        files = {'document': document}
         if reply_to_message_id:
             data['reply_to_message_id'] = reply_to_message_id
-        return await self._send_request('sendDocument', data, files)
+        return await self._send_media('sendDocument', 'document', document, data, progress)
 
-    async def send_video(self, chat_id, video, reply_to_message_id=None):
+    async def send_video(self, chat_id, video, reply_to_message_id=None, progress=None):
         """
         Send a video file to a specified chat.
 
         Parameters:
         chat_id (int): The unique identifier for the target chat.
-        video (file-like object or str): The video file to send. If a string is provided, it should be the file path.
+        video (file-like object or str): The video file to send. A path to a local file is streamed from disk, any other string is sent as a file_id or URL.
         reply_to_message_id (int, optional): The unique identifier of the message to reply to. Default is None.
+        progress (callable, optional): Called as progress(sent, total) while the file is uploaded. Default is None.
 
         Returns:
         dict: The JSON response from the Telegram API, containing information about the sent video.
@@ -507,19 +896,19 @@ class Client:
         The 'chat_id', 'video', and 'reply_to_message_id' parameters are used as data for the request.
         """
         data = {'chat_id': chat_id}
-        files = {'video': video}
         if reply_to_message_id:
             data['reply_to_message_id'] = reply_to_message_id
-        return await self._send_request('sendVideo', data, files)
+        return await self._send_media('sendVideo', 'video', video, data, progress)
 
-    async def send_voice(self, chat_id, voice, reply_to_message_id=None):
+    async def send_voice(self, chat_id, voice, reply_to_message_id=None, progress=None):
         """
         Send a voice message to a specified chat.
 
         Parameters:
         chat_id (int): The unique identifier for the target chat.
-        voice (file-like object or str): The voice message to send. If a string is provided, it should be the file path.
+        voice (file-like object or str): The voice message to send. A path to a local file is streamed from disk, any other string is sent as a file_id or URL.
         reply_to_message_id (int, optional): The unique identifier of the message to reply to. Default is None.
+        progress (callable, optional): Called as progress(sent, total) while the file is uploaded. Default is None.
 
         Returns:
         dict: The JSON response from the Telegram API, containing information about the sent voice message.
@@ -532,24 +921,61 @@ class Client:
         The 'chat_id', 'voice', and 'reply_to_message_id' parameters are used as data for the request.
         """
         data = {'chat_id': chat_id}
-        files = {'voice': voice}
         if reply_to_message_id:
             data['reply_to_message_id'] = reply_to_message_id
-        return await self._send_request('sendVoice', data, files)
+        return await self._send_media('sendVoice', 'voice', voice, data, progress)
 
-    def on_message(self, command):
+    async def broadcast(self, chat_ids, text=None, method='sendMessage', concurrency=64, checkpoint=None, **params):
         """
-        Decorator function to register a message handler for a specific command.
+        Send the same message to many chats as fast as the rate limiter allows.
 
         Parameters:
-        command (str): The command for which the handler should be registered.
+        chat_ids (iterable): The target chats. Any iterable works, so recipients can be streamed from a file or a database cursor.
+        text (str, optional): The text to send with sendMessage. Default is None.
+        method (str, optional): The Telegram API method to call for every chat. Default is 'sendMessage'.
+        concurrency (int, optional): How many calls may be in flight at once. Default is 64.
+        checkpoint (str, optional): The path of a file progress is appended to. If the file already exists,
+            chats recorded in it are skipped, so a crashed broadcast resumes where it stopped. Default is None.
+        **params: The other parameters of the call, e.g. parse_mode or reply_markup.
+
+        Returns:
+        BroadcastResult: The chat ids sorted into delivered, blocked, forbidden, not_found and failed.
+
+        Note:
+        Calls are sent with the BULK priority, so interactive replies keep precedence while a broadcast runs.
+        They are never returned in a webhook response, so every chat gets its own request, even when the
+        broadcast is started from a webhook handler.
+        Chats that failed for other reasons are not recorded in the checkpoint and are retried on resume.
+        The checkpoint is matched against chat_ids by str(chat_id), so 12345 and "12345" are the same chat;
+        resume with the same recipients. Chats it records are reported with the status they reached.
+        """
+        if text is not None:
+            params['text'] = text
+        return await broadcast(self, chat_ids, method, concurrency, checkpoint, **params)
+
+    def on_message(self, command=None, regex=None, prefix=None, filters=None):
+        """
+        Decorator function to register a message handler.
+
+        Parameters:
+        command (str or list, optional): The command or commands that trigger the handler, e.g. '/start'.
+            Commands addressed to the bot as '/start@botname' match as well. Default is None.
+        regex (str or re.Pattern, optional): A regular expression the message text must contain. Default is None.
+        prefix (str or list, optional): The text prefix or prefixes that trigger the handler. Default is None.
+        filters (Filter, optional): A predicate the message must satisfy, built from XD.filters. Default is None.
 
         Returns:
         decorator: A decorator function that can be used to register a message handler.
+
+        Note:
+        Several handlers may share a command. For every message, the first registered handler
+        whose command, regex, prefix and filters all match is run.
         """
+        commands = [command] if isinstance(command, str) else command or ()
+        prefixes = [prefix] if isinstance(prefix, str) else prefix or ()
         def decorator(func):
             """
-            Decorator function to register a message handler for a specific command.
+            Decorator function to register a message handler.
 
             Parameters:
             func (function): The function to be registered as the message handler.
@@ -557,7 +983,7 @@ class Client:
             Returns:
             wrapper: A wrapper function that can be called to handle the message.
             """
-            self._message_handlers[command] = func
+            self.router.add(func, commands, prefixes, regex, filters)
             @wraps(func)
             async def wrapper(message):
                 """
@@ -576,7 +1002,7 @@ class Client:
     async def _handle_update(self, update):
         """
         Handle an incoming update by checking if it contains a message and
-        invoking the appropriate message handler.
+        invoking the message handler the router selects for it.
 
         Parameters:
         update (dict): The incoming update from the Telegram API.
@@ -587,22 +1013,65 @@ class Client:
         Raises:
         None
         """
-        if 'message' in update:
-            message = TelegramMessage(update['message'], self)
-            if message.text:
-                command = message.text.split()[0]
-                if command in self._message_handlers:
-                    await self._message_handlers[command](message)
+        try:
+            if self.cache is not None:
+                self.cache.observe(update)
+            if 'message' in update:
+                if self.metrics is None:
+                    await self.router.dispatch(TelegramMessage(update['message'], self))
+                else:
+                    self.metrics.message_received(update['message'].get('date'))
+                    await self.router.dispatch(TelegramMessage(update['message'], self), self.metrics)
+        finally:
+            if self.journal is not None:
+                self.journal.done(update['update_id'])
+
+    def _answer_waiter(self, update):
+        """
+        Hand an update to the conversation waiting for it, if any.
+
+        Parameters:
+        update (dict): The incoming update from the Telegram API.
+
+        Returns:
+        bool: True if a waiter took the update, so it must not be dispatched, False otherwise.
+        """
+        if not self.conversations.feed(update):
+            return False
+        if self.cache is not None:
+            self.cache.observe(update)
+        if self.journal is not None:
+            self.journal.done(update['update_id'])
+        return True
+
+    async def _recover_journal(self):
+        """
+        Open the journal and dispatch the updates it holds that were not handled before the last shutdown.
 
-    async def start(self):
+        Returns:
+        int: The getUpdates offset following the journaled updates, or None if the journal is empty.
+        """
+        pending = await self.journal.open()
+        if pending:
+            self.logger.warning(f"Dispatching {len(pending)} journaled updates that were not handled before the last shutdown.")
+        for update_id, body in pending:
+            update = self.codec.decode_update(body)
+            if not self._answer_waiter(update):
+                await self.dispatcher.submit(update)
+        return None if self.journal.last_id is None else self.journal.last_id + 1
+
+    async def start(self, limit=100, timeout=100, allowed_updates=None):
         """
         Start the bot and begin processing incoming updates.
 
-        This method continuously fetches updates from the Telegram API,
-        processes them, and invokes the appropriate message handlers.
+        This method continuously long-polls updates from the Telegram API and hands them
+        to the dispatcher, which invokes the appropriate message handlers. Updates from
+        one chat are handled in order, updates from different chats run concurrently.
 
         Parameters:
-        None
+        limit (int, optional): The maximum number of updates fetched per poll, between 1 and 100. Default is 100.
+        timeout (int, optional): The long-polling timeout in seconds. Default is 100.
+        allowed_updates (list, optional): The update types to receive, e.g. ['message', 'callback_query']. Default is None.
 
         Returns:
         None
@@ -610,18 +1079,185 @@ class Client:
         Raises:
         None
         """
-        if not self.validate_token():
+        if not await self._validate_token():
             self.logger.error("Bot token is invalid. Exiting...")
             return
 
+        self.router.compile(self.username)
         self.logger.info("Bot started.")
+        self.dispatcher.start(self._handle_update)
+        try:
+            await self._poll_updates(limit, timeout, allowed_updates)
+        finally:
+            await self.dispatcher.stop(drain=False)
+            await self.close()
+
+    async def _poll_updates(self, limit, timeout, allowed_updates):
+        """
+        Long-poll the Telegram API and feed every update to the dispatcher.
+
+        Handlers run on the dispatcher's workers, so the next getUpdates request is sent as soon
+        as the current batch has been accepted, while that batch is still being handled. The offset
+        is only advanced past an update once the dispatcher has accepted it, so an update is never
+        confirmed to Telegram before it has been queued for handling. With a journal, every batch is
+        durable in the journal, as the JSON Telegram sent, before it is dispatched, and polling resumes
+        after the last journaled update.
+
+        Parameters:
+        limit (int): The maximum number of updates fetched per poll.
+        timeout (int): The long-polling timeout in seconds.
+        allowed_updates (list): The update types to receive, or None for the server default.
+
+        Returns:
+        None
+        """
         offset = None
+        if self.journal is not None:
+            offset = await self._recover_journal()
+        retry_delay = 0
         while True:
-            updates = await self.get_updates(offset)
-            if updates:
-                for update in updates:
-                    await self._handle_update(update)
-                    offset = update['update_id'] + 1
+            if self.journal is None:
+                updates = await self.get_updates(offset, limit, timeout, allowed_updates)
+            else:
+                bodies = await self.get_updates(offset, limit, timeout, allowed_updates, raw=True)
+                try:
+                    updates = None if bodies is None else [self.codec.decode_update(body) for body in bodies]
+                except Exception as e:
+                    self.logger.error(f"Exception occurred while decoding updates: {e}")
+                    updates = None
+            if updates is None:
+                retry_delay = min(retry_delay * 2 or 1, 30)
+                await asyncio.sleep(retry_delay)
+                continue
+            retry_delay = 0
+            if self.journal is not None:
+                if offset is not None:
+                    kept = [index for index, update in enumerate(updates) if update['update_id'] >= offset]
+                    updates = [updates[index] for index in kept]
+                    bodies = [bodies[index] for index in kept]
+                if updates:
+                    await self.journal.append(updates, bodies)
+            elif offset is not None:
+                updates = [update for update in updates if update['update_id'] >= offset]
+            for update in updates:
+                if not self._answer_waiter(update):
+                    await self.dispatcher.submit(update)
+                offset = update['update_id'] + 1
+
+    async def wait_for(self, chat_id, filters=None, timeout=60, user_id=None):
+        """
+        Wait for the next message in a chat.
+
+        The awaited message is taken before it reaches the dispatcher, so a handler may wait for the next
+        message of its own chat. A message that answers a waiter is not passed to the normal handlers.
+
+        Parameters:
+        chat_id (int): The chat to wait in.
+        filters (Filter, optional): A predicate the message must satisfy, built from XD.filters. Messages that fail it
+            are handled by the normal handlers. Default is None.
+        timeout (float, optional): How long to wait, in seconds. None waits forever. Default is 60.
+        user_id (int, optional): Only accept a message from this user. Default is None, which accepts anyone in the chat.
+
+        Returns:
+        TelegramMessage: The message.
+
+        Raises:
+        ConversationTimeOut: If no matching message arrived in time.
+        """
+        return await self.conversations.wait(chat_id, user_id, filters, timeout)
+
+    async def start_webhook(self, url=None, host='0.0.0.0', port=8443, path='/webhook', secret_token=None, allowed_updates=None, reply_in_response=True, ssl_context=None):
+        """
+        Start the bot in webhook mode instead of polling.
+
+        An embedded aiohttp server receives the updates Telegram posts, drops retried deliveries
+        and hands the updates to the dispatcher, exactly like polled updates.
+
+        Parameters:
+        url (str, optional): The public HTTPS URL to register with setWebhook. If None, the webhook is assumed to be set already. Default is None.
+        host (str, optional): The interface the server binds to. Default is '0.0.0.0'.
+        port (int, optional): The port the server binds to. Default is 8443.
+        path (str, optional): The URL path updates are posted to. Default is '/webhook'.
+        secret_token (str, optional): The secret token Telegram must send with every update. Default is None.
+        allowed_updates (list, optional): The update types to receive. Default is None.
+        reply_in_response (bool, optional): Whether a handler's first API call may be returned in the webhook response.
+            Always off with a ShardedDispatcher, whose handlers run in other processes. Default is True.
+        ssl_context (ssl.SSLContext, optional): The TLS context, if TLS is not terminated by a proxy. Default is None.
+
+        Returns:
+        None
+        """
+        if not await self._validate_token():
+            self.logger.error("Bot token is invalid. Exiting...")
+            return
+
+        self.router.compile(self.username)
+        self.webhook = WebhookServer(self, path, secret_token, reply_in_response and isinstance(self.dispatcher, Dispatcher))
+        self.dispatcher.start(self.webhook.handle_update)
+        try:
+            if self.journal is not None:
+                await self._recover_journal()
+            port = await self.webhook.start(host, port, ssl_context)
+            if url is not None:
+                await self.set_webhook(url, secret_token, allowed_updates)
+            self.logger.info(f"Bot started. Listening for webhook requests on port {port}.")
+            await asyncio.Event().wait()
+        finally:
+            await self.webhook.stop()
+            await self.dispatcher.stop(drain=False)
+            await self.close()
+
+    async def set_webhook(self, url, secret_token=None, allowed_updates=None, max_connections=None, drop_pending_updates=None):
+        """
+        Register a webhook URL that Telegram posts updates to.
+
+        Parameters:
+        url (str): The HTTPS URL to send updates to.
+        secret_token (str, optional): A secret sent in the X-Telegram-Bot-Api-Secret-Token header of every request. Default is None.
+        allowed_updates (list, optional): The update types to receive. Default is None.
+        max_connections (int, optional): The maximum number of simultaneous HTTPS connections for update delivery. Default is None.
+        drop_pending_updates (bool, optional): Whether to drop all pending updates. Default is None.
+
+        Returns:
+        dict: The JSON response from the Telegram API.
+        """
+        data = {
+            'url': url,
+            'secret_token': secret_token,
+            'allowed_updates': allowed_updates,
+            'max_connections': max_connections,
+            'drop_pending_updates': drop_pending_updates,
+        }
+        return await self._send_request('setWebhook', data)
+
+    async def delete_webhook(self, drop_pending_updates=None):
+        """
+        Remove the webhook so updates can be fetched with getUpdates again.
+
+        Parameters:
+        drop_pending_updates (bool, optional): Whether to drop all pending updates. Default is None.
+
+        Returns:
+        dict: The JSON response from the Telegram API.
+        """
+        return await self._send_request('deleteWebhook', {'drop_pending_updates': drop_pending_updates})
+
+    async def close(self):
+        """
+        Close the client's transport and release its pooled connections.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        await self.transport.close()
+        if self.journal is not None:
+            await self.journal.close()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
     def extract_reply_json(self, update):
             """
@@ -647,31 +1283,38 @@ class Client:
             else:
                 return "Invalid update format."
 
-    async def get_updates(self, offset=None):
+    async def get_updates(self, offset=None, limit=100, timeout=100, allowed_updates=None, raw=False):
         """
         Fetch updates from the Telegram API.
 
         Parameters:
         offset (int, optional): The offset from which to fetch updates. Default is None.
+        limit (int, optional): The maximum number of updates to fetch, between 1 and 100. Default is 100.
+        timeout (int, optional): The long-polling timeout in seconds. Default is 100.
+        allowed_updates (list, optional): The update types to receive. Default is None.
+        raw (bool, optional): Whether to return the undecoded JSON of every update instead, as bytes-like objects
+            that codec.decode_update accepts. Default is False.
 
         Returns:
-        list: A list of updates received from the Telegram API.
+        list: A list of updates received from the Telegram API, or None if the request failed.
 
         Raises:
         Exception: If an exception occurs while fetching updates.
 
         Note:
-        This method makes a GET request to the Telegram API's getUpdates endpoint.
+        This method makes an asynchronous request to the Telegram API's getUpdates endpoint
+        through the client's transport, with a request timeout slightly above the polling timeout.
         It logs the status code and any exceptions that occur during the request.
         """
-        params = {'timeout': 100, 'offset': offset}
+        params = {'timeout': timeout, 'offset': offset, 'limit': limit, 'allowed_updates': allowed_updates}
         try:
-            response = self.session.get(f"{self.base_url}/getUpdates", params=params)
-            if response.status_code == 200:
-                updates = response.json()['result']
+            decode = self.codec.split_updates if raw else self.codec.decode_updates
+            status, payload = await self._request('getUpdates', params, timeout=timeout + 10, decode=decode)
+            if status == 200:
+                updates = payload['result']
                 return updates
             else:
-                self.logger.error(f"Failed to get updates. Status code: {response.status_code}")
+                self.logger.error(f"Failed to get updates. Status code: {status}")
                 return None
         except Exception as e:
             self.logger.error(f"Exception occurred while getting updates: {e}")
@@ -0,0 +1,19 @@
+"""
+Command line tools: python -m XD journal {info,replay} ...
+"""
+import sys
+from . import journal
+
+TOOLS = {'journal': journal.main}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in TOOLS:
+        print(f"usage: python -m XD {{{','.join(TOOLS)}}} ...", file=sys.stderr)
+        return 2
+    return TOOLS[argv[0]](argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import asyncio
+import os
+from .exceptions import UserBlockedBot, BotForbidden, ChatNotFound
+from .ratelimit import BULK
+
+DELIVERED = 'delivered'
+BLOCKED = 'blocked'
+FORBIDDEN = 'forbidden'
+NOT_FOUND = 'not_found'
+FAILED = 'failed'
+
+_FINAL = (DELIVERED, BLOCKED, FORBIDDEN, NOT_FOUND)
+
+
+class BroadcastResult:
+    def __init__(self):
+        """
+        The outcome of a broadcast, with the chat ids sorted by delivery status.
+
+        Attributes:
+        delivered (list): Chats the message was delivered to.
+        blocked (list): Chats whose user blocked the bot (UserBlockedBot).
+        forbidden (list): Chats the bot may not message for another reason, e.g. a deactivated user (BotForbidden).
+        not_found (list): Chats that do not exist (ChatNotFound).
+        failed (list): Chats where sending failed for any other reason. These are retried when the broadcast is resumed.
+        """
+        self.delivered = []
+        self.blocked = []
+        self.forbidden = []
+        self.not_found = []
+        self.failed = []
+
+    def add(self, status, chat_id):
+        getattr(self, status).append(chat_id)
+
+    def __repr__(self):
+        return (f"BroadcastResult(delivered={len(self.delivered)}, blocked={len(self.blocked)}, "
+                f"forbidden={len(self.forbidden)}, not_found={len(self.not_found)}, failed={len(self.failed)})")
+
+
+def _load_checkpoint(path):
+    """
+    Read a checkpoint file and return the final status of every chat recorded in it, by str(chat_id).
+
+    Ids are compared as written, so 12345 and "12345" are the same chat, like they are for the API.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as checkpoint:
+        for line in checkpoint:
+            status, _, chat_id = line.rstrip('\n').partition(' ')
+            if status in _FINAL and chat_id:
+                done.setdefault(chat_id, status)
+    return done
+
+
+async def broadcast(client, chat_ids, method='sendMessage', concurrency=64, checkpoint=None, **params):
+    """
+    Send the same API call to many chats. See Client.broadcast.
+    """
+    result = BroadcastResult()
+    done = _load_checkpoint(checkpoint) if checkpoint else {}
+    log = open(checkpoint, 'a', encoding='utf-8', buffering=1) if checkpoint else None
+    recipients = iter(chat_ids)
+
+    async def worker():
+        for chat_id in recipients:
+            status = done.get(str(chat_id))
+            if status is not None:
+                result.add(status, chat_id)
+                continue
+            data = dict(params)
+            data['chat_id'] = chat_id
+            try:
+                await client._send_request(method, data, priority=BULK, raise_errors=True, in_reply=False)
+                status = DELIVERED
+            except UserBlockedBot:
+                status = BLOCKED
+            except BotForbidden:
+                status = FORBIDDEN
+            except ChatNotFound:
+                status = NOT_FOUND
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                client.logger.error(f"Broadcast to {chat_id} failed: {e}")
+                status = FAILED
+            result.add(status, chat_id)
+            if log is not None and status != FAILED:
+                log.write(f"{status} {chat_id}\n")
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        if log is not None:
+            log.close()
+    return result
@@ -0,0 +1,243 @@
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+from .codec import CHAT_CHANGE_FIELDS
+
+DEFAULT_TTLS = {
+    'getMe': 3600.0,
+    'getChat': 60.0,
+    'getChatMember': 30.0,
+    'getChatAdministrators': 60.0,
+    'getChatMemberCount': 60.0,
+    'getMyCommands': 3600.0,
+}
+
+_MESSAGE_KINDS = ('message', 'edited_message', 'channel_post', 'edited_channel_post')
+_MEMBER_KINDS = ('my_chat_member', 'chat_member')
+
+
+class _Entry:
+    __slots__ = ('value', 'expires', 'chat_id')
+
+    def __init__(self, value, expires, chat_id):
+        self.value = value
+        self.expires = expires
+        self.chat_id = chat_id
+
+
+class ResponseCache:
+    def __init__(self, ttls=None, max_size=10000):
+        """
+        Initialize a new instance of the ResponseCache class.
+
+        A read-through cache for the results of idempotent Bot API methods. Results are kept for a
+        per-method TTL in a size-bounded LRU; only the methods listed in ttls are cached. Concurrent
+        identical calls are coalesced: while one call is in flight, the others wait for its result
+        instead of sending their own request. Entries of a chat are dropped when an update reports a
+        change to it, such as a new title or a member's new status; see observe().
+
+        One cache belongs to one client, because results depend on the bot asking. Cached results are
+        shared between callers and must not be modified.
+
+        Parameters:
+        ttls (dict, optional): The TTL in seconds of every cached method, by Bot API name. Default is DEFAULT_TTLS.
+        max_size (int, optional): The maximum number of cached results. Default is 10000.
+
+        Attributes:
+        hits (int): The calls answered from the cache.
+        misses (int): The calls that sent a request.
+        coalesced (int): The calls that waited for an identical call already in flight.
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._by_chat = {}
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(method, params):
+        if not params:
+            return (method,)
+        key = (method, tuple(sorted(params.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def _store(self, key, value, ttl, chat_id):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, monotonic() + ttl, chat_id)
+        if chat_id is not None:
+            self._by_chat.setdefault(chat_id, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.chat_id is not None:
+            keys = self._by_chat.get(entry.chat_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_chat[entry.chat_id]
+
+    def peek(self, method, params=None):
+        """
+        Return a cached result without sending anything.
+
+        Parameters:
+        method (str): The Bot API method, e.g. 'getMe'.
+        params (dict, optional): The parameters of the call. Default is None.
+
+        Returns:
+        The cached result, or None if there is no fresh one.
+        """
+        key = self._key(method, params)
+        return None if key is None else self._lookup(key)
+
+    def put(self, method, params, value):
+        """
+        Store a result obtained elsewhere, e.g. by a blocking request.
+
+        Parameters:
+        method (str): The Bot API method. Methods without a TTL are not stored.
+        params (dict): The parameters of the call, or None.
+        value: The result.
+
+        Returns:
+        None
+        """
+        ttl = self.ttls.get(method)
+        key = self._key(method, params)
+        if ttl is not None and key is not None and value is not None:
+            self._store(key, value, ttl, params.get('chat_id') if params else None)
+
+    async def get(self, method, params, fetch):
+        """
+        Return the result of a call, from the cache, from an identical call in flight, or by calling fetch.
+
+        Parameters:
+        method (str): The Bot API method.
+        params (dict): The parameters of the call, or None.
+        fetch (coroutine function): Sends the call and returns its result, or None if it failed. Failures are not cached.
+
+        Returns:
+        The result.
+        """
+        ttl = self.ttls.get(method)
+        key = self._key(method, params) if ttl is not None else None
+        if key is None:
+            return await fetch()
+        value = self._lookup(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                return await self.get(method, params, fetch)
+        self.misses += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        if value is not None:
+            self._store(key, value, ttl, params.get('chat_id') if params else None)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, chat_id=None, method=None):
+        """
+        Drop cached results.
+
+        Parameters:
+        chat_id (int or str, optional): Only drop the results of calls about this chat. Default is None.
+        method (str, optional): Only drop the results of this method. Default is None.
+
+        Returns:
+        int: The number of dropped results.
+        """
+        if chat_id is not None:
+            keys = list(self._by_chat.get(chat_id, ()))
+        else:
+            keys = list(self._entries)
+        if method is not None:
+            keys = [key for key in keys if key[0] == method]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def observe(self, update):
+        """
+        Drop the cached results an incoming update makes stale.
+
+        A chat_member or my_chat_member update, or a service message about the chat (a new title or photo,
+        members joining or leaving, a pinned message, a migration), drops every cached result about that chat.
+
+        Parameters:
+        update (dict): The incoming update from the Telegram API.
+
+        Returns:
+        None
+        """
+        if not self._by_chat:
+            return
+        for kind in _MEMBER_KINDS:
+            member = update.get(kind)
+            if member is not None:
+                self.invalidate(member.get('chat', {}).get('id'))
+                return
+        for kind in _MESSAGE_KINDS:
+            message = update.get(kind)
+            if message is not None:
+                for change in CHAT_CHANGE_FIELDS:
+                    if change in message:
+                        self.invalidate(message.get('chat', {}).get('id'))
+                        break
+                return
+
+    def stats(self):
+        """
+        Return a snapshot of the cache's state.
+
+        Returns:
+        dict: The number of entries, calls in flight, hits, misses and coalesced calls.
+        """
+        return {
+            'entries': len(self._entries),
+            'inflight': len(self._inflight),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+        }
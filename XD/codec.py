@@ -0,0 +1,246 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+CONTENT_TYPES = (
+    'text', 'photo', 'video', 'animation', 'document', 'audio', 'voice', 'video_note', 'sticker', 'contact',
+    'location', 'venue', 'poll', 'dice', 'game', 'invoice', 'successful_payment', 'new_chat_members',
+    'left_chat_member', 'new_chat_title', 'new_chat_photo', 'delete_chat_photo', 'pinned_message',
+)
+
+CHAT_CHANGE_FIELDS = (
+    'new_chat_title', 'new_chat_photo', 'delete_chat_photo', 'new_chat_members', 'left_chat_member',
+    'pinned_message', 'migrate_to_chat_id', 'migrate_from_chat_id', 'group_chat_created',
+    'supergroup_chat_created', 'channel_chat_created', 'message_auto_delete_timer_changed',
+)
+
+# Message fields read by handlers beyond the content types and service fields above. The typed Message
+# struct declares the union of these lists, so every field a consumer reads survives typed decoding.
+# The set is static rather than derived from the router: filters are opaque callables and handlers read
+# message.data freely, so the router cannot tell which fields they need, and the decoder is shared by
+# every client before any handler is registered. Only the fields hot paths read are decoded into Python
+# objects; the rest are msgspec.Raw, which keeps just the span of the body and is decoded on access.
+MESSAGE_FIELDS = (
+    'sender_chat', 'forward_origin', 'is_topic_message', 'is_automatic_forward', 'reply_to_message',
+    'external_reply', 'quote', 'via_bot', 'edit_date', 'has_protected_content', 'media_group_id',
+    'author_signature', 'entities', 'caption_entities', 'link_preview_options', 'has_media_spoiler', 'story',
+    'group_chat_created', 'supergroup_chat_created', 'channel_chat_created', 'message_auto_delete_timer_changed',
+    'users_shared', 'chat_shared', 'web_app_data', 'reply_markup',
+)
+
+class JSONCodec:
+    def __init__(self, name, loads, dumps):
+        """
+        A JSON backend: a name and a pair of bytes <-> object functions.
+
+        Parameters:
+        name (str): The name of the backend, 'msgspec', 'orjson' or 'json'.
+        loads (callable): Decodes bytes into Python objects.
+        dumps (callable): Encodes Python objects into bytes.
+
+        Attributes:
+        decode_updates (callable): Decodes a getUpdates response.
+        decode_update (callable): Decodes one update, e.g. a webhook body.
+        split_updates (callable): Decodes a getUpdates response into one whose result is the JSON of every update,
+            exactly as sent where the backend allows it, for the update journal.
+        """
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.decode_updates = loads
+        self.decode_update = loads
+        self.split_updates = self._split_updates
+
+    def _split_updates(self, body):
+        """
+        Decode a getUpdates response, keeping the JSON of every update undecoded.
+
+        This backend cannot slice the updates out of the body, so they are decoded and encoded again; as
+        they are plain dicts, nothing is lost.
+        """
+        payload = self.loads(body)
+        if isinstance(payload, dict) and isinstance(payload.get('result'), list):
+            payload['result'] = [self.dumps(update) for update in payload['result']]
+        return payload
+
+    def __repr__(self):
+        return f"JSONCodec({self.name!r})"
+
+
+def _json_dumps(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def _make_codec(name):
+    if name == 'orjson' and orjson is not None:
+        return JSONCodec('orjson', orjson.loads, orjson.dumps)
+    if name == 'msgspec' and msgspec is not None:
+        decoder = msgspec.json.Decoder()
+        encoder = msgspec.json.Encoder()
+        codec = JSONCodec('msgspec', decoder.decode, encoder.encode)
+        codec.split_updates = _raw_envelope_decoder.decode
+        return codec
+    if name == 'json':
+        return JSONCodec('json', json.loads, _json_dumps)
+    return None
+
+
+def get_codec(name='auto', typed_updates=False):
+    """
+    Return a JSON codec, using the fastest available backend unless one is named.
+
+    Parameters:
+    name (str, optional): 'auto', 'msgspec', 'orjson' or 'json'. 'auto' prefers msgspec, then orjson,
+        then the standard library. Default is 'auto'.
+    typed_updates (bool, optional): Whether getUpdates responses and webhook updates are decoded straight into
+        the typed structs of this module instead of dicts. Needs msgspec; ignored without it. Default is False.
+
+    Returns:
+    JSONCodec: The codec.
+
+    Raises:
+    ValueError: If the named backend is unknown or not installed.
+    """
+    names = ('msgspec', 'orjson', 'json') if name == 'auto' else (name,)
+    for candidate in names:
+        codec = _make_codec(candidate)
+        if codec is not None:
+            break
+    else:
+        raise ValueError(f"JSON backend {name!r} is unknown or not installed.")
+    if typed_updates and msgspec is not None:
+        codec.decode_updates = _envelope_decoder.decode
+        codec.decode_update = _update_decoder.decode
+    return codec
+
+
+if msgspec is not None:
+    _raw_decoder = msgspec.json.Decoder()
+    _ABSENT = msgspec.Raw()
+    _RENAMED = {'from': 'from_'}
+
+    class Record(msgspec.Struct, omit_defaults=True):
+        """
+        A typed struct that reads like the dict the Bot API sent.
+
+        Only the declared fields are decoded; every other field in the JSON is skipped by the decoder.
+        Fields typed as msgspec.Raw keep their undecoded JSON and are decoded on first access through
+        get() or [], so fields a handler never reads cost next to nothing.
+        """
+
+        def get(self, key, default=None):
+            attr = _RENAMED.get(key, key)
+            value = getattr(self, attr, None)
+            if isinstance(value, msgspec.Raw):
+                if not value:
+                    return default
+                value = _raw_decoder.decode(value)
+                setattr(self, attr, value)
+            if value is None:
+                return default
+            return value
+
+        def __getitem__(self, key):
+            value = self.get(key)
+            if value is None:
+                raise KeyError(key)
+            return value
+
+        def __contains__(self, key):
+            value = getattr(self, _RENAMED.get(key, key), None)
+            return value is not None and not (isinstance(value, msgspec.Raw) and not value)
+
+    class Chat(Record):
+        id: int = 0
+        type: str = ''
+        title: str | None = None
+        username: str | None = None
+        first_name: str | None = None
+        last_name: str | None = None
+        is_forum: bool | None = None
+        permissions: msgspec.Raw = _ABSENT
+
+    class User(Record):
+        id: int = 0
+        is_bot: bool = False
+        first_name: str = ''
+        last_name: str | None = None
+        username: str | None = None
+        language_code: str | None = None
+        is_premium: bool | None = None
+        emoji_status: msgspec.Raw = _ABSENT
+        photo: msgspec.Raw = _ABSENT
+
+    _MESSAGE_TYPED = [
+        ('message_id', int, 0),
+        ('date', int, 0),
+        ('chat', Chat | None, None),
+        ('from_', User | None, msgspec.field(default=None, name='from')),
+        ('message_thread_id', int | None, None),
+        ('text', str | None, None),
+        ('caption', str | None, None),
+        ('new_chat_title', str | None, None),
+        ('migrate_to_chat_id', int | None, None),
+        ('migrate_from_chat_id', int | None, None),
+    ]
+    _typed_names = {name for name, _, _ in _MESSAGE_TYPED}
+    _raw_names = dict.fromkeys(name for name in MESSAGE_FIELDS + CONTENT_TYPES + CHAT_CHANGE_FIELDS
+                               if name not in _typed_names)
+    Message = msgspec.defstruct('Message', _MESSAGE_TYPED + [(name, msgspec.Raw, _ABSENT) for name in _raw_names],
+                                bases=(Record,), omit_defaults=True, module=__name__)
+
+    class Update(Record):
+        update_id: int = 0
+        message: Message | None = None
+        edited_message: Message | None = None
+        channel_post: Message | None = None
+        edited_channel_post: Message | None = None
+        business_message: Message | None = None
+        edited_business_message: Message | None = None
+        callback_query: msgspec.Raw = _ABSENT
+        inline_query: msgspec.Raw = _ABSENT
+        chosen_inline_result: msgspec.Raw = _ABSENT
+        shipping_query: msgspec.Raw = _ABSENT
+        pre_checkout_query: msgspec.Raw = _ABSENT
+        purchased_paid_media: msgspec.Raw = _ABSENT
+        poll: msgspec.Raw = _ABSENT
+        poll_answer: msgspec.Raw = _ABSENT
+        my_chat_member: msgspec.Raw = _ABSENT
+        chat_member: msgspec.Raw = _ABSENT
+        chat_join_request: msgspec.Raw = _ABSENT
+        message_reaction: msgspec.Raw = _ABSENT
+        message_reaction_count: msgspec.Raw = _ABSENT
+        chat_boost: msgspec.Raw = _ABSENT
+        removed_chat_boost: msgspec.Raw = _ABSENT
+        business_connection: msgspec.Raw = _ABSENT
+        deleted_business_messages: msgspec.Raw = _ABSENT
+
+        def values(self):
+            return (self.get(field) for field in self.__struct_fields__ if field in self)
+
+    class UpdatesResponse(Record):
+        ok: bool = False
+        result: list[Update] = []
+        error_code: int | None = None
+        description: str | None = None
+        parameters: dict | None = None
+
+    class RawUpdatesResponse(Record):
+        ok: bool = False
+        result: list[msgspec.Raw] = []
+        error_code: int | None = None
+        description: str | None = None
+        parameters: dict | None = None
+
+    _envelope_decoder = msgspec.json.Decoder(UpdatesResponse)
+    _raw_envelope_decoder = msgspec.json.Decoder(RawUpdatesResponse)
+    _update_decoder = msgspec.json.Decoder(Update)
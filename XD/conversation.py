@@ -0,0 +1,236 @@
+import asyncio
+from math import ceil
+from .exceptions import ConversationTimeOut
+
+
+class _Timer:
+    __slots__ = ('callback', 'rounds', 'slot')
+
+    def __init__(self, callback, rounds, slot):
+        self.callback = callback
+        self.rounds = rounds
+        self.slot = slot
+
+
+class TimerWheel:
+    def __init__(self, tick=0.25, slots=1024):
+        """
+        Initialize a new instance of the TimerWheel class.
+
+        A hashed timer wheel: timers are hashed by their deadline into a ring of slots, and a single
+        loop callback advances the ring one slot per tick, firing the timers in it. Scheduling and
+        cancelling are O(1), and there is one pending loop callback however many timers are scheduled,
+        instead of one TimerHandle or task each. Deadlines are rounded up to the next tick.
+        The wheel only ticks while it holds timers.
+
+        Parameters:
+        tick (float, optional): The resolution of the wheel, in seconds. Default is 0.25.
+        slots (int, optional): The number of slots; timers further than slots * tick away wait extra rounds. Default is 1024.
+        """
+        self.tick = tick
+        self._slots = [{} for _ in range(slots)]
+        self._cursor = 0
+        self._count = 0
+        self._time = 0.0
+        self._handle = None
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, delay, callback):
+        """
+        Call a function after a delay.
+
+        Parameters:
+        delay (float): The delay in seconds.
+        callback (callable): Called without arguments when the timer fires.
+
+        Returns:
+        _Timer: The timer, to pass to cancel().
+        """
+        loop = asyncio.get_running_loop()
+        if self._handle is None:
+            self._time = loop.time()
+            self._handle = loop.call_at(self._time + self.tick, self._advance)
+        ticks = max(1, ceil((loop.time() + delay - self._time) / self.tick))
+        slots = len(self._slots)
+        slot = (self._cursor + ticks) % slots
+        timer = _Timer(callback, (ticks - 1) // slots, slot)
+        self._slots[slot][timer] = None
+        self._count += 1
+        return timer
+
+    def cancel(self, timer):
+        """
+        Cancel a timer that has not fired yet.
+
+        Returns:
+        bool: True if the timer was cancelled, False if it already fired or was cancelled.
+        """
+        slot = self._slots[timer.slot]
+        if timer not in slot:
+            return False
+        del slot[timer]
+        self._count -= 1
+        if not self._count and self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        return True
+
+    def _advance(self):
+        """
+        Move the cursor over every tick that has passed, firing the timers whose round has come.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slots = len(self._slots)
+        while self._time + self.tick <= now and self._count:
+            self._time += self.tick
+            self._cursor = (self._cursor + 1) % slots
+            slot = self._slots[self._cursor]
+            if not slot:
+                continue
+            due = []
+            for timer in slot:
+                if timer.rounds:
+                    timer.rounds -= 1
+                else:
+                    due.append(timer)
+            for timer in due:
+                del slot[timer]
+            self._count -= len(due)
+            for timer in due:
+                timer.callback()
+        if self._count:
+            self._handle = loop.call_at(self._time + self.tick, self._advance)
+        else:
+            self._handle = None
+
+
+class _Waiter:
+    __slots__ = ('key', 'future', 'filters', 'timer')
+
+    def __init__(self, key, future, filters):
+        self.key = key
+        self.future = future
+        self.filters = filters
+        self.timer = None
+
+
+def _message_key(update):
+    message = update.get('message')
+    if message is None:
+        return None, None
+    chat = message.get('chat')
+    sender = message.get('from')
+    return (chat.get('id') if chat is not None else None), (sender.get('id') if sender is not None else None)
+
+
+class Conversations:
+    def __init__(self, wrap, tick=0.25, slots=1024):
+        """
+        Initialize a new instance of the Conversations class.
+
+        The registry of handlers waiting for a chat's next message. Waiters are kept in a dict keyed by
+        (chat id, user id), so every incoming update is matched in O(1) before it reaches the dispatcher;
+        a message that resolves a waiter is not dispatched to the normal handlers. Timeouts live on a
+        shared TimerWheel, so each open conversation costs a few small objects and no task or timer handle.
+
+        Parameters:
+        wrap (callable): Turns the message dict of an update into the object passed to filters and returned to the waiter.
+        tick (float, optional): The resolution of the timeouts, in seconds. Default is 0.25.
+        slots (int, optional): The number of slots of the timer wheel. Default is 1024.
+        """
+        self.wrap = wrap
+        self.wheel = TimerWheel(tick, slots)
+        self._waiters = {}
+
+    def __len__(self):
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def wait(self, chat_id, user_id=None, filters=None, timeout=60):
+        """
+        Wait for the next message in a chat.
+
+        Parameters:
+        chat_id (int): The chat to wait in.
+        user_id (int, optional): Only accept a message sent by this user. Default is None, which accepts anyone in the chat.
+        filters (callable, optional): A predicate the message must satisfy, e.g. an XD.filters filter. Messages that fail it
+            are handled as usual. Default is None.
+        timeout (float, optional): How long to wait, in seconds. None waits forever. Default is 60.
+
+        Returns:
+        The message, as returned by wrap.
+
+        Raises:
+        ConversationTimeOut: If no matching message arrived in time.
+        """
+        return await self.register(chat_id, user_id, filters, timeout)
+
+    def register(self, chat_id, user_id=None, filters=None, timeout=60):
+        """
+        Start waiting for the next message in a chat, before the awaited message can possibly be requested.
+
+        Takes the same parameters as wait().
+
+        Returns:
+        asyncio.Future: Resolves to the message, or fails with ConversationTimeOut. Cancelling it stops the wait.
+        """
+        key = (chat_id, user_id)
+        waiter = _Waiter(key, asyncio.get_running_loop().create_future(), filters)
+        self._waiters.setdefault(key, []).append(waiter)
+        if timeout is not None:
+            waiter.timer = self.wheel.schedule(timeout, lambda: self._expire(waiter, timeout))
+        waiter.future.add_done_callback(lambda future: self._discard(waiter))
+        return waiter.future
+
+    def _expire(self, waiter, timeout):
+        waiter.timer = None
+        if not waiter.future.done():
+            waiter.future.set_exception(ConversationTimeOut(timeout))
+
+    def _discard(self, waiter):
+        waiters = self._waiters.get(waiter.key)
+        if waiters is not None:
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+            if not waiters:
+                del self._waiters[waiter.key]
+        if waiter.timer is not None:
+            self.wheel.cancel(waiter.timer)
+            waiter.timer = None
+
+    def feed(self, update):
+        """
+        Hand an update to the waiter it answers, if any.
+
+        Parameters:
+        update (dict): The incoming update from the Telegram API.
+
+        Returns:
+        bool: True if a waiter took the update, so it must not be dispatched, False otherwise.
+        """
+        if not self._waiters:
+            return False
+        chat_id, user_id = _message_key(update)
+        if chat_id is None:
+            return False
+        message = None
+        for key in ((chat_id, user_id), (chat_id, None)):
+            for waiter in self._waiters.get(key, ()):
+                if waiter.future.done():
+                    continue
+                if message is None:
+                    message = self.wrap(update['message'])
+                if waiter.filters is not None:
+                    try:
+                        if not waiter.filters(message):
+                            continue
+                    except Exception as e:
+                        waiter.future.set_exception(e)
+                        return True
+                waiter.future.set_result(message)
+                return True
+        return False
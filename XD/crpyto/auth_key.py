@@ -0,0 +1,346 @@
+import asyncio
+import os
+import time
+from hashlib import sha1, sha256
+from math import gcd
+from random import randrange
+from . import tl
+from .mtproto import ige256
+from ..exceptions import SecurityError, TransportError
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+_ZERO_AUTH_KEY_ID = b'\x00' * 8
+_PLAIN_HEADER = 20
+_SAFE_PRIMES = set()
+_GENERATOR_CHECKS = {
+    2: lambda p: p % 8 == 7,
+    3: lambda p: p % 3 == 2,
+    4: lambda p: True,
+    5: lambda p: p % 5 in (1, 4),
+    6: lambda p: p % 24 in (19, 23),
+    7: lambda p: p % 7 in (3, 5, 6),
+}
+
+
+def powmod(base, exponent, modulus):
+    """
+    Modular exponentiation, through GMP when gmpy2 is installed and the built-in pow otherwise.
+    """
+    if gmpy2 is not None:
+        return int(gmpy2.powmod(base, exponent, modulus))
+    return pow(base, exponent, modulus)
+
+
+def factorize(pq):
+    """
+    Split the pq of resPQ into its two prime factors with Brent's variant of Pollard's rho.
+
+    Differences are multiplied together and a gcd is only taken once per batch of 128 steps,
+    which makes the search several times faster than Floyd's cycle detection. With gmpy2 installed
+    the arithmetic runs on GMP integers.
+
+    Parameters:
+    pq (int): The product of two primes.
+
+    Returns:
+    tuple: The factors (p, q) with p < q.
+    """
+    if pq % 2 == 0:
+        return 2, pq // 2
+    n = gmpy2.mpz(pq) if gmpy2 is not None else pq
+    batch = 128
+    while True:
+        y, c = randrange(1, pq), randrange(1, pq)
+        g = r = q = 1
+        x = ys = y
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(batch, r - k)):
+                    y = (y * y + c) % n
+                    q = q * (x - y) % n
+                g = gcd(int(q), pq)
+                k += batch
+            r <<= 1
+        if g == pq:
+            while True:
+                ys = (ys * ys + c) % n
+                g = gcd(int(x - ys), pq)
+                if g > 1:
+                    break
+        if g != pq:
+            p = min(g, pq // g)
+            return p, pq // p
+
+
+def is_probable_prime(n, rounds=30):
+    """
+    Miller-Rabin primality test.
+    """
+    if n < 2:
+        return False
+    for small in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % small == 0:
+            return n == small
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for _ in range(rounds):
+        x = powmod(randrange(2, n - 1), d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def check_dh_params(g, dh_prime):
+    """
+    Check that dh_prime is a 2048-bit safe prime and that g generates its subgroup of order (dh_prime - 1) / 2.
+
+    Primes that passed are remembered, so the costly primality tests run once per prime and process.
+
+    Raises:
+    SecurityError: If the parameters are unsafe.
+    """
+    if dh_prime.bit_length() != 2048:
+        raise SecurityError("dh_prime is not a 2048-bit number")
+    if g not in _GENERATOR_CHECKS or not _GENERATOR_CHECKS[g](dh_prime):
+        raise SecurityError("g does not generate the safe subgroup")
+    if dh_prime not in _SAFE_PRIMES:
+        if not (is_probable_prime(dh_prime) and is_probable_prime((dh_prime - 1) // 2)):
+            raise SecurityError("dh_prime is not a safe prime")
+        _SAFE_PRIMES.add(dh_prime)
+
+
+def check_dh_value(value, dh_prime):
+    """
+    Check that g_a or g_b is in the range the protocol requires.
+
+    Raises:
+    SecurityError: If it is not.
+    """
+    bound = 1 << (2048 - 64)
+    if not (1 < value < dh_prime - 1 and bound <= value <= dh_prime - bound):
+        raise SecurityError("g_a or g_b is out of range")
+
+
+def load_public_keys(keys):
+    """
+    Index RSA public keys by the fingerprint resPQ refers to them with.
+
+    Parameters:
+    keys (iterable): PEM strings or bytes, cryptography RSA public keys, or (n, e) tuples.
+
+    Returns:
+    dict: (n, e) tuples keyed by fingerprint.
+    """
+    from cryptography.hazmat.primitives.serialization import load_pem_public_key
+    indexed = {}
+    for key in keys:
+        if isinstance(key, str):
+            key = key.encode()
+        if isinstance(key, bytes):
+            key = load_pem_public_key(key)
+        if not isinstance(key, tuple):
+            numbers = key.public_numbers()
+            key = (numbers.n, numbers.e)
+        indexed[rsa_fingerprint(*key)] = key
+    return indexed
+
+
+def rsa_fingerprint(n, e):
+    """
+    Return the fingerprint of an RSA public key: the lower 64 bits of SHA-1 of its TL-serialized n and e.
+    """
+    return int.from_bytes(sha1(tl.pack_int(n) + tl.pack_int(e)).digest()[-8:], 'little', signed=True)
+
+
+def rsa_pad_encrypt(data, n, e):
+    """
+    Encrypt p_q_inner_data for req_DH_params with the RSA_PAD scheme of MTProto 2.0.
+    """
+    if len(data) > 144:
+        raise ValueError("RSA_PAD data must be at most 144 bytes long.")
+    data_with_padding = data + os.urandom(192 - len(data))
+    data_pad_reversed = data_with_padding[::-1]
+    while True:
+        temp_key = os.urandom(32)
+        data_with_hash = data_pad_reversed + sha256(temp_key + data_with_padding).digest()
+        aes_encrypted = bytes(ige256(data_with_hash, temp_key, b'\x00' * 32, True))
+        temp_key_xor = bytes(a ^ b for a, b in zip(temp_key, sha256(aes_encrypted).digest()))
+        key_aes_encrypted = int.from_bytes(temp_key_xor + aes_encrypted, 'big')
+        if key_aes_encrypted < n:
+            return powmod(key_aes_encrypted, e, n).to_bytes(256, 'big')
+
+
+def tmp_aes_key_iv(server_nonce, new_nonce):
+    """
+    Derive the temporary AES key and IV that protect server_DH_inner_data and client_DH_inner_data.
+    """
+    new_server = sha1(new_nonce + server_nonce).digest()
+    server_new = sha1(server_nonce + new_nonce).digest()
+    new_new = sha1(new_nonce + new_nonce).digest()
+    return new_server + server_new[:12], server_new[12:20] + new_new + new_nonce[:4]
+
+
+def new_nonce_hash(new_nonce, number, auth_key):
+    """
+    Return new_nonce_hash1, 2 or 3 for dh_gen_ok, dh_gen_retry and dh_gen_fail respectively.
+    """
+    return sha1(new_nonce + bytes((number,)) + sha1(auth_key).digest()[:8]).digest()[4:20]
+
+
+def _answer_res_pq(res_pq, nonce, public_keys, dc_id):
+    """
+    Check resPQ, factorize pq and build req_DH_params. Pure and picklable, so it can run in a process pool.
+
+    Returns:
+    tuple: The server_nonce, the new_nonce and the serialized req_DH_params.
+    """
+    view = memoryview(res_pq)
+    if tl.constructor(view) != tl.RES_PQ or view[4:20] != nonce:
+        raise SecurityError("resPQ does not answer req_pq_multi")
+    server_nonce = bytes(view[20:36])
+    pq_bytes, offset = tl.unpack_bytes(view, 36)
+    fingerprints, _ = tl.unpack_longs(view, offset)
+    fingerprint = next((fp for fp in fingerprints if fp in public_keys), None)
+    if fingerprint is None:
+        raise SecurityError("the server offered no known RSA key")
+    pq = int.from_bytes(pq_bytes, 'big')
+    p, q = factorize(pq)
+    new_nonce = os.urandom(32)
+    inner = (tl.INT.pack(tl.P_Q_INNER_DATA_DC) + tl.pack_bytes(pq_bytes) + tl.pack_int(p) + tl.pack_int(q)
+             + nonce + server_nonce + new_nonce + dc_id.to_bytes(4, 'little', signed=True))
+    encrypted = rsa_pad_encrypt(inner, *public_keys[fingerprint])
+    request = (tl.INT.pack(tl.REQ_DH_PARAMS) + nonce + server_nonce + tl.pack_int(p) + tl.pack_int(q)
+               + tl.LONG.pack(fingerprint) + tl.pack_bytes(encrypted))
+    return server_nonce, new_nonce, request
+
+
+def _answer_server_dh(answer, nonce, server_nonce, new_nonce, retry_id):
+    """
+    Decrypt and check server_DH_params_ok, pick b and build set_client_DH_params. Pure and picklable.
+
+    Returns:
+    tuple: The auth_key, the server time and the serialized set_client_DH_params.
+    """
+    view = memoryview(answer)
+    kind = tl.constructor(view)
+    if kind == tl.SERVER_DH_PARAMS_FAIL:
+        raise SecurityError("the server answered server_DH_params_fail")
+    if kind != tl.SERVER_DH_PARAMS_OK or view[4:20] != nonce or view[20:36] != server_nonce:
+        raise SecurityError("server_DH_params does not answer req_DH_params")
+    encrypted, _ = tl.unpack_bytes(view, 36)
+    key, iv = tmp_aes_key_iv(server_nonce, new_nonce)
+    plain = memoryview(ige256(encrypted, key, iv, False))
+    inner = plain[20:]
+    if tl.constructor(inner) != tl.SERVER_DH_INNER_DATA or inner[4:20] != nonce or inner[20:36] != server_nonce:
+        raise SecurityError("server_DH_inner_data does not match the handshake")
+    g = tl.INT.unpack_from(inner, 36)[0]
+    dh_prime, offset = tl.unpack_int(inner, 40)
+    g_a, offset = tl.unpack_int(inner, offset)
+    server_time = tl.INT.unpack_from(inner, offset)[0]
+    if sha1(inner[:offset + 4]).digest() != plain[:20]:
+        raise SecurityError("server_DH_inner_data has a wrong hash")
+    check_dh_params(g, dh_prime)
+    check_dh_value(g_a, dh_prime)
+    while True:
+        b = int.from_bytes(os.urandom(256), 'big')
+        g_b = powmod(g, b, dh_prime)
+        try:
+            check_dh_value(g_b, dh_prime)
+            break
+        except SecurityError:
+            continue
+    auth_key = powmod(g_a, b, dh_prime).to_bytes(256, 'big')
+    data = (tl.INT.pack(tl.CLIENT_DH_INNER_DATA) + nonce + server_nonce + tl.LONG.pack(retry_id) + tl.pack_int(g_b))
+    data_with_hash = sha1(data).digest() + data
+    data_with_hash += os.urandom(-len(data_with_hash) % 16)
+    encrypted = bytes(ige256(data_with_hash, key, iv, True))
+    request = tl.INT.pack(tl.SET_CLIENT_DH_PARAMS) + nonce + server_nonce + tl.pack_bytes(encrypted)
+    return auth_key, server_time, request
+
+
+async def _call(executor, function, *args):
+    if executor is None:
+        return function(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+
+async def create_auth_key(reader, writer, framing, public_keys, dc_id=2, executor=None, timeout=10, retries=5):
+    """
+    Create an auth_key with the Diffie-Hellman handshake, over an open connection whose framing tag was sent.
+
+    The handshake runs req_pq_multi, factorizes pq, sends the RSA_PAD-encrypted p_q_inner_data with req_DH_params,
+    checks dh_prime and g_a, and completes the exchange with set_client_DH_params. The CPU-heavy steps, the
+    factorization and the two 2048-bit modular exponentiations, run in executor when one is given; pass a
+    ProcessPoolExecutor to bring many sessions up at once without blocking the event loop.
+
+    Parameters:
+    reader (asyncio.StreamReader): The connection's reader.
+    writer (asyncio.StreamWriter): The connection's writer.
+    framing (type): The framing class of the connection, e.g. AbridgedFraming.
+    public_keys (dict): The server RSA keys, as returned by load_public_keys().
+    dc_id (int, optional): The data center id sent in p_q_inner_data_dc. Default is 2.
+    executor (concurrent.futures.Executor, optional): Where the CPU-heavy steps run. Default is None, which runs
+        them inline.
+    timeout (float, optional): How long to wait for each server answer, in seconds. Default is 10.
+    retries (int, optional): How many times dh_gen_retry is followed. Default is 5.
+
+    Returns:
+    tuple: The 256-byte auth_key, the first server salt, and the clock offset to the server in seconds.
+
+    Raises:
+    SecurityError: If an answer of the server fails a check.
+    TransportError: If the server closes the connection with a transport error.
+    """
+    last_msg_id = 0
+
+    async def exchange(body):
+        nonlocal last_msg_id
+        last_msg_id = max(int(time.time() * 4294967296) & ~3, last_msg_id + 4)
+        writer.writelines((framing.header(_PLAIN_HEADER + len(body)), _ZERO_AUTH_KEY_ID,
+                           tl.LONG.pack(last_msg_id), tl.INT.pack(len(body)), body))
+        frame = await asyncio.wait_for(framing.read(reader), timeout)
+        if len(frame) == 4:
+            raise TransportError(int.from_bytes(frame, 'little', signed=True))
+        if frame[:8] != _ZERO_AUTH_KEY_ID:
+            raise SecurityError("the server answered with an encrypted message")
+        length = tl.INT.unpack_from(frame, 16)[0]
+        return frame[20:20 + length]
+
+    nonce = os.urandom(16)
+    res_pq = await exchange(tl.INT.pack(tl.REQ_PQ_MULTI) + nonce)
+    server_nonce, new_nonce, request = await _call(executor, _answer_res_pq, res_pq, nonce, public_keys, dc_id)
+    answer = await exchange(request)
+    retry_id = 0
+    for _ in range(retries + 1):
+        auth_key, server_time, request = await _call(executor, _answer_server_dh, answer, nonce, server_nonce, new_nonce, retry_id)
+        result = memoryview(await exchange(request))
+        kind = tl.constructor(result)
+        if result[4:20] != nonce or result[20:36] != server_nonce:
+            raise SecurityError("dh_gen does not match the handshake")
+        if kind == tl.DH_GEN_OK:
+            if result[36:52] != new_nonce_hash(new_nonce, 1, auth_key):
+                raise SecurityError("new_nonce_hash1 does not match")
+            salt = int.from_bytes(bytes(a ^ b for a, b in zip(new_nonce[:8], server_nonce[:8])), 'little', signed=True)
+            return auth_key, salt, server_time - time.time()
+        if kind == tl.DH_GEN_RETRY and result[36:52] == new_nonce_hash(new_nonce, 2, auth_key):
+            retry_id = int.from_bytes(sha1(auth_key).digest()[:8], 'little', signed=True)
+            continue
+        raise SecurityError("the server refused the key")
+    raise SecurityError("too many dh_gen_retry answers")
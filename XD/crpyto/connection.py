@@ -0,0 +1,543 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+import zlib
+from collections import OrderedDict, deque
+from cryptography.exceptions import InvalidSignature
+from . import tl
+from .auth_key import create_auth_key, load_public_keys
+from .mtproto import CryptoContext
+from ..exceptions import RPCError, TransportError
+
+
+class AbridgedFraming:
+    """
+    The abridged MTProto transport: a 0xef tag, then every packet prefixed with its length in 4-byte words.
+    """
+    name = 'abridged'
+    tag = b'\xef'
+
+    @staticmethod
+    def header(length):
+        words = length >> 2
+        if words < 127:
+            return bytes((words,))
+        return b'\x7f' + words.to_bytes(3, 'little')
+
+    @staticmethod
+    async def read(reader):
+        words = (await reader.readexactly(1))[0]
+        if words == 127:
+            words = int.from_bytes(await reader.readexactly(3), 'little')
+        return await reader.readexactly(words << 2)
+
+
+class IntermediateFraming:
+    """
+    The intermediate MTProto transport: a 0xeeeeeeee tag, then every packet prefixed with its 4-byte length.
+    """
+    name = 'intermediate'
+    tag = b'\xee\xee\xee\xee'
+
+    @staticmethod
+    def header(length):
+        return length.to_bytes(4, 'little')
+
+    @staticmethod
+    async def read(reader):
+        length = int.from_bytes(await reader.readexactly(4), 'little')
+        return await reader.readexactly(length)
+
+
+FRAMINGS = {'abridged': AbridgedFraming, 'intermediate': IntermediateFraming}
+
+DEFAULT_MAX_CONTAINER_SIZE = 64 * 1024
+MAX_CONTAINER_MESSAGES = 1020
+MAX_TRACKED_CONTAINERS = 1000
+
+
+class Session:
+    __slots__ = ('session_id', 'salt', 'time_offset', '_last_msg_id', '_content_count', '_acks')
+
+    def __init__(self, session_id=None, salt=0):
+        """
+        Initialize a new instance of the Session class.
+
+        The session hands out msg_ids and seq_nos, tracks the current server salt and the clock offset
+        to the server, and collects the msg_ids of received messages that still have to be acknowledged.
+
+        Parameters:
+        session_id (bytes, optional): The 8-byte session id. Default is a random one.
+        salt (int, optional): The initial server salt. Default is 0, which the server corrects with bad_server_salt.
+        """
+        self.session_id = session_id if session_id is not None else os.urandom(8)
+        self.salt = salt
+        self.time_offset = 0
+        self._last_msg_id = 0
+        self._content_count = 0
+        self._acks = []
+
+    def msg_id(self, server=False):
+        """
+        Return a new msg_id: the current time as a 32.32 fixed-point number, strictly increasing,
+        divisible by 4 for client messages and 1 modulo 4 for server responses.
+        """
+        msg_id = int((time.time() + self.time_offset) * 4294967296) & ~3 | (1 if server else 0)
+        if msg_id <= self._last_msg_id:
+            msg_id = self._last_msg_id + 4
+        self._last_msg_id = msg_id
+        return msg_id
+
+    def seq_no(self, content_related=True):
+        """
+        Return the seq_no of the next message: odd and counted for content-related messages, even otherwise.
+        """
+        if content_related:
+            seq_no = self._content_count * 2 + 1
+            self._content_count += 1
+            return seq_no
+        return self._content_count * 2
+
+    def sync_time(self, server_msg_id):
+        """
+        Adjust the clock offset to the time carried by a server msg_id.
+        """
+        self.time_offset = (server_msg_id >> 32) - time.time()
+
+    def ack(self, msg_id):
+        self._acks.append(msg_id)
+
+    def take_acks(self):
+        """
+        Return and forget the msg_ids waiting to be acknowledged.
+        """
+        acks, self._acks = self._acks, []
+        return acks
+
+
+class _Request:
+    __slots__ = ('future', 'query', 'msg_id')
+
+    def __init__(self, future, query):
+        self.future = future
+        self.query = query
+        self.msg_id = None
+
+
+class MTProtoConnection:
+    def __init__(self, host, port, auth_key=None, framing='abridged', salt=0, session_id=None, executor=None, timeout=30, on_update=None,
+                 containers=True, pack_delay=0.0, ack_delay=0.5, max_container_size=DEFAULT_MAX_CONTAINER_SIZE,
+                 public_keys=None, dc_id=2, handshake_executor=None):
+        """
+        Initialize a new instance of the MTProtoConnection class.
+
+        The connection keeps one TCP socket to a data center open and multiplexes RPCs over it: every call
+        is sent as soon as it is made, and its result is matched back to the caller by msg_id, so any number
+        of calls can be in flight at once. Received messages are acknowledged, and calls rejected because of
+        a stale server salt or a skewed clock are resent transparently.
+
+        Calls queued within pack_delay of each other, or in the same event loop iteration, leave in a single
+        msg_container together with every pending ack, so a burst of small calls pays for one encryption,
+        padding and frame, and acks rarely need a packet of their own.
+        Containers received from the server are unpacked in place, without copying their messages.
+
+        Parameters:
+        host (str): The server address.
+        port (int): The server port.
+        auth_key (bytes, optional): The 256-byte authorization key. If None, a new one is created with the
+            Diffie-Hellman handshake on connect() and kept in the auth_key attribute. Default is None.
+        framing (str, optional): The transport framing, 'abridged' or 'intermediate'. Default is 'abridged'.
+        salt (int, optional): The initial server salt. Default is 0.
+        session_id (bytes, optional): The 8-byte session id. Default is a random one.
+        executor (CryptoExecutor, optional): Runs encryption and decryption off the event loop. Default is None,
+            which encrypts inline.
+        timeout (float, optional): The default timeout of a call, in seconds. Default is 30.
+        on_update (callable, optional): Called with the body of every message that is not a reply to a call,
+            such as updates. Default is None.
+        containers (bool, optional): Whether queued messages are packed into msg_containers. If False, every
+            call and every msgs_ack is sent as a packet of its own. Default is True.
+        pack_delay (float, optional): How long a queued message waits for others to share its container,
+            in seconds. 0 packs only what is queued in the same event loop iteration. Default is 0.
+        ack_delay (float, optional): How long acks wait to ride along with the next outgoing packet before they
+            are sent on their own, in seconds. Default is 0.5.
+        max_container_size (int, optional): A container is sent as soon as its messages reach this many bytes.
+            Larger messages are always sent alone. Default is 64 KiB.
+        public_keys (iterable, optional): The server RSA public keys the handshake may use, as PEM or (n, e).
+            Required if auth_key is None. Default is None.
+        dc_id (int, optional): The data center id sent in the handshake. Default is 2.
+        handshake_executor (concurrent.futures.Executor, optional): Runs the CPU-heavy steps of the handshake,
+            e.g. a ProcessPoolExecutor shared by many connections. Default is None, which runs them inline.
+        """
+        if framing not in FRAMINGS:
+            raise ValueError(f"Unknown framing {framing!r}.")
+        self.host = host
+        self.port = port
+        self.framing = FRAMINGS[framing]
+        self.session = Session(session_id, salt)
+        self.auth_key = auth_key
+        self.crypto = CryptoContext(auth_key, self.session.session_id) if auth_key is not None else None
+        if auth_key is None and public_keys is None:
+            raise ValueError("Either an auth_key or the server public_keys to create one are required.")
+        self.public_keys = load_public_keys(public_keys) if public_keys is not None else None
+        self.dc_id = dc_id
+        self.handshake_executor = handshake_executor
+        self.executor = executor
+        self.timeout = timeout
+        self.on_update = on_update
+        self.containers = containers
+        self.pack_delay = pack_delay
+        self.ack_delay = ack_delay
+        self.max_container_size = max_container_size
+        self.logger = logging.getLogger(__name__)
+        self._requests = {}
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._encrypting = deque()
+        self._write_task = None
+        self._outbox = []
+        self._outbox_size = 0
+        self._flush_handle = None
+        self._ack_handle = None
+        self._containers = OrderedDict()
+        self.messages_sent = 0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        """
+        Open the TCP connection, create an auth_key if there is none yet, and start reading from it.
+
+        Returns:
+        None
+        """
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(self.framing.tag)
+        if self.crypto is None:
+            try:
+                self.auth_key, self.session.salt, self.session.time_offset = await create_auth_key(
+                    self._reader, self._writer, self.framing, self.public_keys, self.dc_id,
+                    self.handshake_executor, self.timeout,
+                )
+            except BaseException:
+                self._writer.close()
+                self._writer = None
+                raise
+            self.crypto = CryptoContext(self.auth_key, self.session.session_id)
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def invoke(self, query, timeout=None):
+        """
+        Call a method and wait for its result.
+
+        Parameters:
+        query (bytes-like): The TL-serialized method call.
+        timeout (float, optional): How long to wait for the result, in seconds. Default is the connection timeout.
+
+        Returns:
+        memoryview: The TL-serialized result, unpacked from gzip_packed if needed.
+
+        Raises:
+        RPCError: If the server answered with rpc_error.
+        ConnectionError: If the connection was lost before the result arrived.
+        asyncio.TimeoutError: If the result did not arrive in time.
+        """
+        if not self.connected:
+            raise ConnectionError("The MTProto connection is not open.")
+        request = _Request(asyncio.get_running_loop().create_future(), bytes(query))
+        self._enqueue(request.query, True, request)
+        await self._writer.drain()
+        try:
+            return await asyncio.wait_for(request.future, timeout or self.timeout)
+        finally:
+            if self._requests.get(request.msg_id) is request:
+                del self._requests[request.msg_id]
+
+    async def ping(self, ping_id=None):
+        """
+        Send a ping and wait for the pong.
+
+        Returns:
+        float: The round-trip time, in seconds.
+        """
+        started = time.perf_counter()
+        ping_id = ping_id if ping_id is not None else int.from_bytes(os.urandom(8), 'little', signed=True)
+        await self.invoke(tl.INT.pack(tl.PING) + tl.LONG.pack(ping_id))
+        return time.perf_counter() - started
+
+    def _enqueue(self, body, content_related=True, request=None):
+        """
+        Give a message body a msg_id and seq_no and queue it for the next packet.
+        """
+        msg_id = self.session.msg_id()
+        message = tl.MESSAGE_HEADER.pack(msg_id, self.session.seq_no(content_related), len(body)) + body
+        if request is not None:
+            request.msg_id = msg_id
+            self._requests[msg_id] = request
+        if not self.containers or len(message) > self.max_container_size:
+            self._send(message)
+            return
+        self._outbox.append((msg_id, message))
+        self._outbox_size += len(message)
+        if self._outbox_size >= self.max_container_size or len(self._outbox) >= MAX_CONTAINER_MESSAGES:
+            self._flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            if self.pack_delay:
+                self._flush_handle = loop.call_later(self.pack_delay, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+
+    def _flush(self):
+        """
+        Send everything queued since the last flush, pending acks included, as one packet.
+
+        A single message is sent as is; several are packed into a msg_container, which is encrypted once.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._ack_handle is not None:
+            self._ack_handle.cancel()
+            self._ack_handle = None
+        acks = self.session.take_acks()
+        if acks:
+            msg_id = self.session.msg_id()
+            body = tl.INT.pack(tl.MSGS_ACK) + tl.pack_longs(acks)
+            message = tl.MESSAGE_HEADER.pack(msg_id, self.session.seq_no(False), len(body)) + body
+            if self.containers:
+                self._outbox.append((msg_id, message))
+            else:
+                self._send(message)
+        outbox, self._outbox, self._outbox_size = self._outbox, [], 0
+        if not outbox:
+            return
+        if len(outbox) == 1:
+            self._send(outbox[0][1])
+            return
+        container_id = self.session.msg_id()
+        parts = [tl.CONTAINER_HEADER.pack(tl.MSG_CONTAINER, len(outbox))]
+        parts.extend(message for _, message in outbox)
+        length = sum(map(len, parts))
+        parts.insert(0, tl.MESSAGE_HEADER.pack(container_id, self.session.seq_no(False), length))
+        self._containers[container_id] = [msg_id for msg_id, _ in outbox]
+        if len(self._containers) > MAX_TRACKED_CONTAINERS:
+            self._containers.popitem(last=False)
+        self._send(b''.join(parts), len(outbox))
+
+    def _send(self, message, count=1):
+        """
+        Encrypt one message and write it as one packet.
+        """
+        if not self.connected:
+            return
+        self.messages_sent += count
+        if self.executor is not None:
+            self._encrypting.append(asyncio.ensure_future(self.executor.encrypt(self.crypto, message, self.session.salt)))
+            if self._write_task is None:
+                self._write_task = asyncio.get_running_loop().create_task(self._write_loop())
+            return
+        self._write_packet(self.crypto.encrypt(message, self.session.salt))
+
+    async def _write_loop(self):
+        """
+        Write the packets encrypted on the executor as they become ready, in the order they were sent,
+        so msg_ids reach the socket in increasing order however the executor schedules the jobs.
+        """
+        try:
+            while self._encrypting:
+                data = await self._encrypting[0]
+                self._encrypting.popleft()
+                if self.connected:
+                    self._write_packet(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self._lose_connection(ConnectionError(f"Encrypting an outgoing packet failed: {exc}"))
+        finally:
+            self._write_task = None
+
+    def _lose_connection(self, error):
+        """
+        Fail every call in flight with error and close the socket, which also ends the read loop.
+        """
+        self.logger.warning(f"MTProto connection lost: {error}")
+        encrypting, self._encrypting = self._encrypting, deque()
+        for future in encrypting:
+            future.cancel()
+        self._fail_requests(error)
+        if self._writer is not None:
+            self._writer.close()
+
+    def _write_packet(self, data):
+        header = self.framing.header(len(data))
+        self._writer.writelines((header, data))
+        self.packets_sent += 1
+        self.bytes_sent += len(header) + len(data)
+
+    def _resend(self, msg_id):
+        inner = self._containers.pop(msg_id, None)
+        if inner is not None:
+            for inner_msg_id in inner:
+                self._resend(inner_msg_id)
+            return
+        request = self._requests.pop(msg_id, None)
+        if request is not None and not request.future.done():
+            self._enqueue(request.query, True, request)
+
+    def stats(self):
+        """
+        Return the connection counters.
+
+        Returns:
+        dict: The number of messages and packets sent, the bytes written to the socket, and calls in flight.
+        """
+        return {
+            'messages_sent': self.messages_sent,
+            'packets_sent': self.packets_sent,
+            'bytes_sent': self.bytes_sent,
+            'in_flight': len(self._requests),
+        }
+
+    async def _read_loop(self):
+        error = ConnectionError("The MTProto connection was closed.")
+        try:
+            while True:
+                frame = await self.framing.read(self._reader)
+                if len(frame) == 4:
+                    raise TransportError(int.from_bytes(frame, 'little', signed=True))
+                if self.executor is not None:
+                    message = await self.executor.decrypt(self.crypto, frame)
+                else:
+                    message = self.crypto.decrypt(frame)
+                self._handle_message(message)
+        except asyncio.CancelledError:
+            pass
+        except (asyncio.IncompleteReadError, ConnectionError, InvalidSignature) as exc:
+            error = exc if isinstance(exc, ConnectionError) else ConnectionError(str(exc) or type(exc).__name__)
+            self.logger.warning(f"MTProto connection lost: {error}")
+        except (ValueError, IndexError, struct.error, zlib.error) as exc:
+            error = ConnectionError(f"Received a malformed MTProto packet: {exc}")
+            self.logger.warning(f"MTProto connection lost: {error}")
+        finally:
+            self._fail_requests(error)
+            if self._writer is not None:
+                self._writer.close()
+
+    def _handle_message(self, message, offset=0):
+        """
+        Handle the message at an offset of a decrypted packet and return the offset just past it.
+        """
+        msg_id, seq_no, length = tl.MESSAGE_HEADER.unpack_from(message, offset)
+        start = offset + 16
+        if seq_no & 1:
+            self.session.ack(msg_id)
+            if self._ack_handle is None:
+                self._ack_handle = asyncio.get_running_loop().call_later(self.ack_delay, self._flush)
+        self._handle_body(msg_id, message[start:start + length])
+        return start + length
+
+    def _handle_body(self, msg_id, body):
+        """
+        Handle the body of one received message.
+        """
+        kind = tl.constructor(body)
+        if kind == tl.MSG_CONTAINER:
+            offset = 8
+            for _ in range(tl.INT.unpack_from(body, 4)[0]):
+                offset = self._handle_message(body, offset)
+        elif kind == tl.RPC_RESULT:
+            req_msg_id = tl.LONG.unpack_from(body, 4)[0]
+            request = self._requests.get(req_msg_id)
+            if request is not None:
+                # Resolved before it is forgotten, so a result that fails to unpack leaves the call
+                # to be failed with the connection.
+                if not request.future.done():
+                    self._resolve(request.future, body[12:])
+                del self._requests[req_msg_id]
+        elif kind == tl.PONG:
+            req_msg_id = tl.PONG_BODY.unpack_from(body, 4)[0]
+            request = self._requests.pop(req_msg_id, None)
+            if request is not None and not request.future.done():
+                request.future.set_result(body)
+        elif kind == tl.BAD_SERVER_SALT:
+            bad_msg_id, _, _, new_salt = tl.BAD_SERVER_SALT_BODY.unpack_from(body, 4)
+            self.session.salt = new_salt
+            self._resend(bad_msg_id)
+        elif kind == tl.BAD_MSG_NOTIFICATION:
+            bad_msg_id, _, code = tl.BAD_MSG_NOTIFICATION_BODY.unpack_from(body, 4)
+            if code in (16, 17):
+                self.session.sync_time(msg_id)
+                self._resend(bad_msg_id)
+            else:
+                request = self._requests.pop(bad_msg_id, None)
+                if request is not None and not request.future.done():
+                    request.future.set_exception(RPCError(code, 'BAD_MSG_NOTIFICATION'))
+        elif kind == tl.NEW_SESSION_CREATED:
+            self.session.salt = tl.NEW_SESSION_CREATED_BODY.unpack_from(body, 4)[2]
+        elif kind == tl.MSGS_ACK:
+            pass
+        elif self.on_update is not None:
+            self.on_update(body)
+
+    @staticmethod
+    def _resolve(future, result):
+        kind = tl.constructor(result)
+        if kind == tl.RPC_ERROR:
+            code = tl.RPC_ERROR_HEADER.unpack_from(result, 0)[1]
+            message = bytes(tl.unpack_bytes(result, 8)[0]).decode('utf-8', 'replace')
+            future.set_exception(RPCError(code, message))
+        elif kind == tl.GZIP_PACKED:
+            future.set_result(memoryview(zlib.decompress(tl.unpack_bytes(result, 4)[0])))
+        else:
+            future.set_result(result)
+
+    def _fail_requests(self, error):
+        requests, self._requests = self._requests, {}
+        for request in requests.values():
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    async def close(self):
+        """
+        Close the connection, failing every call still in flight.
+
+        Returns:
+        None
+        """
+        for handle in (self._flush_handle, self._ack_handle):
+            if handle is not None:
+                handle.cancel()
+        self._flush_handle = self._ack_handle = None
+        self._outbox, self._outbox_size = [], 0
+        if self._write_task is not None:
+            self._write_task.cancel()
+            await asyncio.gather(self._write_task, return_exceptions=True)
+            self._write_task = None
+        encrypting, self._encrypting = self._encrypting, deque()
+        for future in encrypting:
+            future.cancel()
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except asyncio.CancelledError:
+                pass
+            self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = None
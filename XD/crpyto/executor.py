@@ -0,0 +1,159 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_INLINE_THRESHOLD = 16 * 1024
+
+
+class CryptoExecutor:
+    def __init__(self, workers=None, inline_threshold=DEFAULT_INLINE_THRESHOLD, max_batch=64):
+        """
+        Initialize a new instance of the CryptoExecutor class.
+
+        The executor runs encrypt and decrypt jobs of many sessions on a thread pool, so that AES work
+        does not serialize on the event loop thread. Jobs submitted in the same loop iteration are collected
+        and handed to the pool in batches, one batch per worker, and each batch reports its results back to the
+        loop with a single wakeup. Payloads smaller than inline_threshold are processed inline, because
+        handing them to a thread costs more than encrypting them.
+
+        Threads only run in parallel while the AES code has released the GIL. tgcrypto does so for the whole
+        message; the AES-ECB fallback of mtproto.ige256 chains blocks in Python and mostly holds it.
+
+        Parameters:
+        workers (int, optional): The number of threads. Default is the number of CPUs.
+        inline_threshold (int, optional): Payloads below this many bytes are processed inline. Default is 16 KiB.
+        max_batch (int, optional): The maximum number of jobs run by one thread in one go. Default is 64.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.inline_threshold = inline_threshold
+        self.max_batch = max_batch
+        self.inline = 0
+        self.offloaded = 0
+        self.batches = 0
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='XD-crypto')
+        self._pending = []
+        self._scheduled = False
+
+    async def encrypt(self, context, message, salt, out=None):
+        """
+        Encrypt a message with a session's CryptoContext.
+
+        Parameters:
+        context (CryptoContext): The session's crypto context.
+        message (bytes-like): The message (msg_id, seq_no, length and body).
+        salt (int): The server salt.
+        out (writable bytes-like, optional): The buffer to encrypt into. Default is a new bytearray.
+
+        Returns:
+        memoryview: The encrypted message.
+        """
+        return await self._submit(len(message), context.encrypt, message, salt, out)
+
+    async def decrypt(self, context, encrypted_data, out=None):
+        """
+        Decrypt a message with a session's CryptoContext.
+
+        Parameters:
+        context (CryptoContext): The session's crypto context.
+        encrypted_data (bytes-like): The encrypted message.
+        out (writable bytes-like, optional): The buffer to decrypt into. Default is a new bytearray.
+
+        Returns:
+        memoryview: The decrypted message, starting at msg_id.
+
+        Raises:
+        InvalidSignature: If the message does not belong to the session.
+        """
+        return await self._submit(len(encrypted_data), context.decrypt, encrypted_data, out)
+
+    async def map(self, jobs):
+        """
+        Run a batch of jobs across sessions and wait for all of them.
+
+        Parameters:
+        jobs (iterable): Tuples of ('encrypt', context, message, salt) or ('decrypt', context, encrypted_data).
+
+        Returns:
+        list: The results in job order. A job that failed has its exception in its place.
+        """
+        calls = []
+        for kind, context, *args in jobs:
+            if kind == 'encrypt':
+                calls.append(self.encrypt(context, *args))
+            elif kind == 'decrypt':
+                calls.append(self.decrypt(context, *args))
+            else:
+                raise ValueError(f"Unknown crypto job {kind!r}.")
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    def _submit(self, size, function, *args):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if size < self.inline_threshold:
+            self.inline += 1
+            try:
+                future.set_result(function(*args))
+            except Exception as error:
+                future.set_exception(error)
+            return future
+        self.offloaded += 1
+        self._pending.append((future, function, args))
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._flush, loop)
+        return future
+
+    def _flush(self, loop):
+        """
+        Hand the jobs collected during this loop iteration to the pool.
+        """
+        self._scheduled = False
+        pending, self._pending = self._pending, []
+        groups = max(min(self.workers, len(pending)), -(-len(pending) // self.max_batch))
+        for index in range(groups):
+            self.batches += 1
+            self._pool.submit(self._run_batch, loop, pending[index::groups])
+
+    @staticmethod
+    def _run_batch(loop, batch):
+        """
+        Run a batch on a pool thread and report all of its results to the loop at once.
+        """
+        results = []
+        for future, function, args in batch:
+            try:
+                results.append((future, function(*args), None))
+            except Exception as error:
+                results.append((future, None, error))
+        loop.call_soon_threadsafe(CryptoExecutor._resolve, results)
+
+    @staticmethod
+    def _resolve(results):
+        for future, value, error in results:
+            if future.cancelled():
+                continue
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(error)
+
+    def stats(self):
+        """
+        Return the executor counters.
+
+        Returns:
+        dict: The number of jobs run inline, jobs offloaded, and batches handed to the pool.
+        """
+        return {'inline': self.inline, 'offloaded': self.offloaded, 'batches': self.batches}
+
+    def close(self, wait=True):
+        """
+        Shut the thread pool down.
+
+        Parameters:
+        wait (bool, optional): Whether to wait for running batches to finish. Default is True.
+
+        Returns:
+        None
+        """
+        self._pool.shutdown(wait=wait)
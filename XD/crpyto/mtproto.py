@@ -1,12 +1,64 @@
-from hashlib import sha256
-from io import BytesIO
+from hashlib import sha1, sha256
+from hmac import compare_digest
 from os import urandom
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.exceptions import InvalidSignature
 
+try:
+    import tgcrypto
+except ImportError:
+    tgcrypto = None
+
+
+def ige256(data, key: bytes, iv: bytes, encrypt: bool, out=None):
+    """
+    Run AES-256 in IGE mode over data.
+
+    cryptography has no IGE mode, so the chaining is done here over single AES-ECB blocks,
+    unless tgcrypto is installed, whose C implementation is used instead.
+
+    Parameters:
+    data (bytes-like): The input, a multiple of 16 bytes long.
+    key (bytes): The 32-byte AES key.
+    iv (bytes): The 32-byte IGE initialization vector.
+    encrypt (bool): Whether to encrypt or decrypt.
+    out (writable bytes-like, optional): Where the result is written; it may be the input itself.
+        tgcrypto always returns a new object, which is then copied into out. Default is None, which
+        returns tgcrypto's result as is, or a new bytearray without tgcrypto.
+
+    Returns:
+    bytes-like: out, or the new object holding the result.
+    """
+    length = len(data)
+    if length % 16:
+        raise ValueError("IGE input must be a multiple of 16 bytes long.")
+    if tgcrypto is not None:
+        result = (tgcrypto.ige256_encrypt if encrypt else tgcrypto.ige256_decrypt)(data, key, iv)
+        if out is None:
+            return result
+        out[:length] = result
+        return out
+    if out is None:
+        out = bytearray(length)
+    cipher = Cipher(algorithms.AES(key), modes.ECB())
+    block = (cipher.encryptor() if encrypt else cipher.decryptor()).update
+    source = memoryview(data)
+    target = memoryview(out)
+    from_bytes = int.from_bytes
+    # Both directions chain the same way: out_i = AES(in_i ^ out_{i-1}) ^ in_{i-1}.
+    if encrypt:
+        previous_out, previous_in = from_bytes(iv[:16], 'little'), from_bytes(iv[16:32], 'little')
+    else:
+        previous_out, previous_in = from_bytes(iv[16:32], 'little'), from_bytes(iv[:16], 'little')
+    for start in range(0, length, 16):
+        end = start + 16
+        current_in = from_bytes(source[start:end], 'little')
+        previous_out = from_bytes(block((current_in ^ previous_out).to_bytes(16, 'little')), 'little') ^ previous_in
+        target[start:end] = previous_out.to_bytes(16, 'little')
+        previous_in = current_in
+    return out
+
+
 def derive_aes_keys(auth_key: bytes, msg_key: bytes, outgoing: bool) -> tuple:
     """
     Derive AES encryption and initialization vector keys.
@@ -52,15 +104,13 @@ def encrypt_message(message: bytes, salt: int, session_id: bytes, auth_key: byte
     The data is then encrypted using AES-IGE256 with the derived keys.
     The encrypted data is finally constructed by concatenating the auth_key_id, message key, encrypted data, and padding.
     """
-    data = int.to_bytes(salt, 8, 'big') + session_id + message
+    data = int.to_bytes(salt, 8, 'little', signed=True) + session_id + message
     padding = urandom(-(len(data) + 12) % 16 + 12)
     msg_key_large = sha256(auth_key[88 : 88 + 32] + data + padding).digest()
     msg_key = msg_key_large[8:24]
     aes_key, aes_iv = derive_aes_keys(auth_key, msg_key, True)
 
-    cipher = Cipher(algorithms.AES(aes_key), modes.IGE256(aes_iv))
-    encryptor = cipher.encryptor()
-    encrypted_data = auth_key_id + msg_key + encryptor.update(data + padding) + encryptor.finalize()
+    encrypted_data = auth_key_id + msg_key + bytes(ige256(data + padding, aes_key, aes_iv, True))
 
     return encrypted_data
 
@@ -78,13 +128,13 @@ def decrypt_message(encrypted_data: bytes, session_id: bytes, auth_key: bytes, a
     bytes: The decrypted data.
 
     Raises:
-    InvalidSignature: If the auth_key_id, salt, or session_id in the decrypted data does not match the provided values.
+    InvalidSignature: If the auth_key_id or session_id in the decrypted data does not match the provided values.
 
     The function first checks if the provided auth_key_id matches the one in the encrypted data.
     If not, it raises an InvalidSignature exception.
     It then extracts the message key from the encrypted data and derives the AES encryption and initialization vector keys.
     The encrypted data is decrypted using AES-IGE256 with the derived keys.
-    The decrypted data is checked for validity by comparing the salt and session_id with the provided values.
+    The decrypted data is checked for validity by comparing the session_id with the provided value.
     If any of the checks fail, an InvalidSignature exception is raised.
     Finally, the decrypted data is returned, excluding the salt, session_id, and auth_key_id.
     """
@@ -94,14 +144,146 @@ def decrypt_message(encrypted_data: bytes, session_id: bytes, auth_key: bytes, a
     msg_key = encrypted_data[8:24]
     aes_key, aes_iv = derive_aes_keys(auth_key, msg_key, False)
 
-    cipher = Cipher(algorithms.AES(aes_key), modes.IGE256(aes_iv))
-    decryptor = cipher.decryptor()
-    decrypted_data = decryptor.update(encrypted_data[24:]) + decryptor.finalize()
-
-    if decrypted_data[:8] != int.to_bytes(int.from_bytes(decrypted_data[:8], 'big'), 8, 'big'):
-        raise InvalidSignature("Invalid salt")
+    decrypted_data = bytes(ige256(encrypted_data[24:], aes_key, aes_iv, False))
 
     if decrypted_data[8:16] != session_id:
         raise InvalidSignature("Invalid session_id")
 
-    return decrypted_data[16:]
\ No newline at end of file
+    return decrypted_data[16:]
+
+
+class CryptoContext:
+    __slots__ = (
+        'auth_key_id', 'session_id',
+        '_encrypt_msg_key', '_encrypt_a', '_encrypt_b',
+        '_decrypt_msg_key', '_decrypt_a', '_decrypt_b',
+    )
+
+    def __init__(self, auth_key: bytes, session_id: bytes, auth_key_id: bytes = None, server: bool = False):
+        """
+        Initialize a new instance of the CryptoContext class.
+
+        The context is bound to one auth_key and session. Every auth_key slice used by the key derivation
+        is taken once here, and the hashes that start with a fixed slice are kept as pre-fed SHA-256 states,
+        so encrypting or decrypting a message only hashes the message itself. Without an out buffer, the
+        cipher's output is returned as is. An out buffer lets the caller reuse memory; as tgcrypto always
+        returns a new object, filling it costs one extra copy with tgcrypto.
+
+        Parameters:
+        auth_key (bytes): The 256-byte authorization key.
+        session_id (bytes): The 8-byte session id.
+        auth_key_id (bytes, optional): The 8-byte auth_key_id. Default is the lower 64 bits of SHA-1(auth_key).
+        server (bool, optional): Whether this is the server side of the session, which encrypts with the keys
+            the client decrypts with and vice versa. Default is False.
+        """
+        if len(auth_key) != 256:
+            raise ValueError("auth_key must be 256 bytes long.")
+        if auth_key_id is None:
+            auth_key_id = sha1(auth_key).digest()[-8:]
+        self.auth_key_id = bytes(auth_key_id)
+        self.session_id = bytes(session_id)
+        encrypt_x, decrypt_x = (8, 0) if server else (0, 8)
+        self._encrypt_msg_key, self._encrypt_a, self._encrypt_b = self._slices(auth_key, encrypt_x)
+        self._decrypt_msg_key, self._decrypt_a, self._decrypt_b = self._slices(auth_key, decrypt_x)
+
+    @staticmethod
+    def _slices(auth_key, x):
+        return (
+            sha256(auth_key[88 + x:120 + x]),
+            bytes(auth_key[x:x + 36]),
+            sha256(auth_key[40 + x:76 + x]),
+        )
+
+    @staticmethod
+    def _aes_keys(msg_key, a_slice, b_state):
+        sha256_a = sha256(msg_key)
+        sha256_a.update(a_slice)
+        sha256_a = sha256_a.digest()
+        sha256_b = b_state.copy()
+        sha256_b.update(msg_key)
+        sha256_b = sha256_b.digest()
+        aes_key = sha256_a[:8] + sha256_b[8:24] + sha256_a[24:32]
+        aes_iv = sha256_b[:8] + sha256_a[8:24] + sha256_b[24:32]
+        return aes_key, aes_iv
+
+    @staticmethod
+    def encrypted_size(length: int) -> int:
+        """
+        Return the size of the encrypted form of a message.
+
+        Parameters:
+        length (int): The length of the message (msg_id, seq_no, length and body).
+
+        Returns:
+        int: The number of bytes encrypt() writes for it.
+        """
+        data = 16 + length
+        return 24 + data + (-(data + 12) % 16 + 12)
+
+    def encrypt(self, message, salt: int, out=None):
+        """
+        Encrypt a message, optionally into a buffer supplied by the caller.
+
+        Parameters:
+        message (bytes-like): The message (msg_id, seq_no, length and body).
+        salt (int): The server salt.
+        out (writable bytes-like, optional): The buffer to write into, at least encrypted_size(len(message))
+            bytes long. Default is None, which returns a new object.
+
+        Returns:
+        memoryview: The encrypted message, a view of out if one was given.
+
+        Raises:
+        ValueError: If out is too small.
+        """
+        length = len(message)
+        total = self.encrypted_size(length)
+        if out is not None and len(out) < total:
+            raise ValueError(f"The output buffer needs {total} bytes, got {len(out)}.")
+        plain = b''.join((salt.to_bytes(8, 'little', signed=True), self.session_id, message, urandom(total - 40 - length)))
+        msg_key_large = self._encrypt_msg_key.copy()
+        msg_key_large.update(plain)
+        msg_key = msg_key_large.digest()[8:24]
+        aes_key, aes_iv = self._aes_keys(msg_key, self._encrypt_a, self._encrypt_b)
+        if out is None:
+            return memoryview(b''.join((self.auth_key_id, msg_key, ige256(plain, aes_key, aes_iv, True))))
+        view = memoryview(out)[:total]
+        view[:8] = self.auth_key_id
+        view[8:24] = msg_key
+        ige256(plain, aes_key, aes_iv, True, view[24:])
+        return view
+
+    def decrypt(self, encrypted_data, out=None):
+        """
+        Decrypt a message, optionally into a buffer supplied by the caller.
+
+        Parameters:
+        encrypted_data (bytes-like): The encrypted message, starting with the auth_key_id.
+        out (writable bytes-like, optional): The buffer to decrypt into, at least len(encrypted_data) - 24 bytes
+            long. It may be a view of encrypted_data[24:]. Default is None, which returns a new object.
+
+        Returns:
+        memoryview: The decrypted message without salt and session_id, starting at msg_id, padding included.
+
+        Raises:
+        InvalidSignature: If the auth_key_id, msg_key or session_id does not match this context.
+        ValueError: If the message is malformed or out is too small.
+        """
+        source = memoryview(encrypted_data)
+        if source[:8] != self.auth_key_id:
+            raise InvalidSignature("Invalid auth_key_id")
+        length = len(source) - 24
+        if length < 32:
+            raise ValueError("The encrypted message is too short.")
+        if out is not None and len(out) < length:
+            raise ValueError(f"The output buffer needs {length} bytes, got {len(out)}.")
+        msg_key = bytes(source[8:24])
+        aes_key, aes_iv = self._aes_keys(msg_key, self._decrypt_a, self._decrypt_b)
+        plain = memoryview(ige256(source[24:], aes_key, aes_iv, False, None if out is None else memoryview(out)[:length]))
+        msg_key_large = self._decrypt_msg_key.copy()
+        msg_key_large.update(plain)
+        if not compare_digest(msg_key_large.digest()[8:24], msg_key):
+            raise InvalidSignature("Invalid msg_key")
+        if plain[8:16] != self.session_id:
+            raise InvalidSignature("Invalid session_id")
+        return plain[16:]
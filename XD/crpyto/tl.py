@@ -0,0 +1,115 @@
+"""
+The few TL constructors of the MTProto service layer, and helpers to read and write TL primitives.
+
+Everything here works on memoryviews and offsets, so parsing a message never copies its body.
+"""
+import struct
+
+RPC_RESULT = 0xf35c6d01
+RPC_ERROR = 0x2144ca19
+MSG_CONTAINER = 0x73f1f8dc
+MSGS_ACK = 0x62d6b459
+BAD_SERVER_SALT = 0xedab447b
+BAD_MSG_NOTIFICATION = 0xa7eff811
+NEW_SESSION_CREATED = 0x9ec20908
+GZIP_PACKED = 0x3072cfa1
+PING = 0x7abe77ec
+PONG = 0x347773c5
+VECTOR = 0x1cb5c415
+
+REQ_PQ_MULTI = 0xbe7e8ef1
+RES_PQ = 0x05162463
+P_Q_INNER_DATA_DC = 0xa9f55f95
+REQ_DH_PARAMS = 0xd712e4be
+SERVER_DH_PARAMS_OK = 0xd0e8075c
+SERVER_DH_PARAMS_FAIL = 0x79cb045d
+SERVER_DH_INNER_DATA = 0xb5890dba
+CLIENT_DH_INNER_DATA = 0x6643b654
+SET_CLIENT_DH_PARAMS = 0xf5045f1f
+DH_GEN_OK = 0x3bcbf734
+DH_GEN_RETRY = 0x46dc1fb9
+DH_GEN_FAIL = 0xa69dae02
+
+MESSAGE_HEADER = struct.Struct('<qii')
+INT = struct.Struct('<I')
+LONG = struct.Struct('<q')
+CONTAINER_HEADER = struct.Struct('<II')
+RPC_RESULT_HEADER = struct.Struct('<Iq')
+RPC_ERROR_HEADER = struct.Struct('<Ii')
+BAD_SERVER_SALT_BODY = struct.Struct('<qiiq')
+BAD_MSG_NOTIFICATION_BODY = struct.Struct('<qii')
+NEW_SESSION_CREATED_BODY = struct.Struct('<qqq')
+PONG_BODY = struct.Struct('<qq')
+
+
+def constructor(view, offset=0):
+    """
+    Return the constructor id at an offset.
+    """
+    return INT.unpack_from(view, offset)[0]
+
+
+def pack_bytes(data):
+    """
+    Serialize a TL bytes/string value, padded to a multiple of 4 bytes.
+    """
+    length = len(data)
+    if length < 254:
+        header = bytes((length,))
+    else:
+        header = b'\xfe' + length.to_bytes(3, 'little')
+    padding = -(len(header) + length) % 4
+    return header + bytes(data) + b'\x00' * padding
+
+
+def unpack_bytes(view, offset):
+    """
+    Read a TL bytes/string value.
+
+    Returns:
+    tuple: A memoryview of the value and the offset just past it.
+    """
+    length = view[offset]
+    start = offset + 1
+    if length == 254:
+        length = int.from_bytes(view[offset + 1:offset + 4], 'little')
+        start = offset + 4
+    end = start + length
+    return view[start:end], end + (-(end - offset) % 4)
+
+
+def pack_int(value):
+    """
+    Serialize a non-negative integer as a TL bytes value holding its big-endian bytes.
+    """
+    return pack_bytes(value.to_bytes((value.bit_length() + 7) // 8 or 1, 'big'))
+
+
+def unpack_int(view, offset):
+    """
+    Read a TL bytes value holding a big-endian integer.
+
+    Returns:
+    tuple: The integer and the offset just past it.
+    """
+    data, offset = unpack_bytes(view, offset)
+    return int.from_bytes(data, 'big'), offset
+
+
+def pack_longs(values):
+    """
+    Serialize a TL Vector<long>.
+    """
+    return struct.pack(f"<II{len(values)}q", VECTOR, len(values), *values)
+
+
+def unpack_longs(view, offset):
+    """
+    Read a TL Vector<long>.
+
+    Returns:
+    tuple: The values and the offset just past them.
+    """
+    count = INT.unpack_from(view, offset + 4)[0]
+    start = offset + 8
+    return struct.unpack_from(f"<{count}q", view, start), start + 8 * count
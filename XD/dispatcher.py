@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from collections import deque
+
+
+def chat_key(update):
+    """
+    Return the key used to order an update relative to other updates.
+
+    Updates that belong to the same chat share a key and are handled one after another.
+    Updates without a chat fall back to the sender, and then to their own update_id.
+
+    Parameters:
+    update (dict): The incoming update from the Telegram API.
+
+    Returns:
+    int: The ordering key of the update.
+    """
+    for kind in ('message', 'edited_message', 'channel_post', 'edited_channel_post'):
+        message = update.get(kind)
+        if message is not None:
+            return message.get('chat', {}).get('id', 0)
+    callback_query = update.get('callback_query')
+    if callback_query is not None:
+        message = callback_query.get('message')
+        if message is not None:
+            return message.get('chat', {}).get('id', 0)
+        return callback_query.get('from', {}).get('id', 0)
+    for kind in ('my_chat_member', 'chat_member', 'chat_join_request'):
+        member = update.get(kind)
+        if member is not None:
+            return member.get('chat', {}).get('id', 0)
+    for value in update.values():
+        if isinstance(value, dict) and 'from' in value:
+            return value['from'].get('id', 0)
+    return ('update', update.get('update_id'))
+
+
+class _ChatQueue:
+    __slots__ = ('items', 'waiters', 'scheduled')
+
+    def __init__(self):
+        self.items = deque()
+        self.waiters = deque()
+        self.scheduled = False
+
+
+class Dispatcher:
+    def __init__(self, workers=16, chat_queue_size=100, key=chat_key):
+        """
+        Initialize a new instance of the Dispatcher class.
+
+        The dispatcher spreads updates across a bounded pool of asyncio worker tasks.
+        Updates with the same key (by default the chat id) are handled strictly in the order
+        they were submitted, while updates for different chats are handled in parallel.
+
+        Parameters:
+        workers (int, optional): The number of worker tasks, i.e. how many handlers may run at once. Default is 16.
+        chat_queue_size (int, optional): The maximum number of pending updates per chat. Once a chat's queue is full,
+            submit() waits until a worker takes an update from it. Default is 100.
+        key (callable, optional): A function mapping an update to its ordering key. Default is chat_key.
+        """
+        if workers < 1:
+            raise ValueError("A dispatcher needs at least one worker.")
+        if chat_queue_size < 1:
+            raise ValueError("The per-chat queue size must be at least 1.")
+        self.workers = workers
+        self.chat_queue_size = chat_queue_size
+        self.key = key
+        self.logger = logging.getLogger(__name__)
+        self._handler = None
+        self._chats = {}
+        self._ready = None
+        self._tasks = []
+        self._pending = 0
+        self._idle = None
+
+    @property
+    def running(self):
+        """
+        bool: True if the worker pool has been started and not stopped.
+        """
+        return bool(self._tasks)
+
+    @property
+    def pending(self):
+        """
+        int: The number of updates submitted but not yet fully handled.
+        """
+        return self._pending
+
+    def start(self, handler):
+        """
+        Start the worker pool.
+
+        Parameters:
+        handler (coroutine function): The coroutine called with every submitted update.
+
+        Returns:
+        None
+        """
+        if self._tasks:
+            return
+        self._handler = handler
+        self._ready = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, update):
+        """
+        Queue an update for handling.
+
+        Returns as soon as the update has been accepted into its chat queue. If the chat already has
+        chat_queue_size pending updates, this waits until there is room, which applies backpressure
+        to the update source instead of buffering without bound.
+
+        Parameters:
+        update (dict): The incoming update from the Telegram API.
+
+        Returns:
+        None
+        """
+        key = self.key(update)
+        while True:
+            chat = self._chats.get(key)
+            if chat is None:
+                chat = self._chats[key] = _ChatQueue()
+            if len(chat.items) < self.chat_queue_size:
+                break
+            waiter = asyncio.get_running_loop().create_future()
+            chat.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in chat.waiters:
+                    chat.waiters.remove(waiter)
+                raise
+        chat.items.append(update)
+        self._pending += 1
+        self._idle.clear()
+        if not chat.scheduled:
+            chat.scheduled = True
+            self._ready.put_nowait(key)
+
+    async def _worker(self):
+        """
+        Take chats that have pending updates and handle their next update.
+        """
+        while True:
+            key = await self._ready.get()
+            chat = self._chats[key]
+            update = chat.items.popleft()
+            while chat.waiters:
+                waiter = chat.waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    break
+            try:
+                await self._handler(update)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Exception occurred while handling update {update.get('update_id')}: {e}", exc_info=True)
+            finally:
+                self._pending -= 1
+                if chat.items:
+                    self._ready.put_nowait(key)
+                else:
+                    chat.scheduled = False
+                    if not chat.waiters:
+                        del self._chats[key]
+                if not self._pending:
+                    self._idle.set()
+
+    async def join(self):
+        """
+        Wait until every submitted update has been handled.
+
+        Returns:
+        None
+        """
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def stop(self, drain=True):
+        """
+        Stop the worker pool.
+
+        Parameters:
+        drain (bool, optional): Whether to finish the already submitted updates first. Default is True.
+
+        Returns:
+        None
+        """
+        if not self._tasks:
+            return
+        if drain:
+            await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._chats.clear()
+        self._pending = 0
@@ -0,0 +1,124 @@
+from collections import OrderedDict
+
+
+class _Interned:
+    __slots__ = ('factory', 'max_size', 'hits', 'updates', '_entries')
+
+    def __init__(self, factory, max_size):
+        self.factory = factory
+        self.max_size = max_size
+        self.hits = 0
+        self.updates = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, entity_id):
+        entry = self._entries.get(entity_id)
+        return entry[0] if entry is not None else None
+
+    def intern(self, data):
+        entity_id = data.get('id')
+        if not entity_id:
+            return self.factory(data)
+        entry = self._entries.get(entity_id)
+        if entry is None:
+            entity = self.factory(data)
+            self._entries[entity_id] = [entity, data]
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return entity
+        self._entries.move_to_end(entity_id)
+        if entry[1] == data:
+            self.hits += 1
+            return entry[0]
+        entity = entry[0] = self.factory(data)
+        entry[1] = data
+        self.updates += 1
+        return entity
+
+
+class EntityStore:
+    def __init__(self, max_chats=10000, max_users=100000):
+        """
+        Initialize a new instance of the EntityStore class.
+
+        An identity map of the chats and users seen in incoming messages. Every message from the same
+        chat or sender shares one TelegramMessage.Chat or TelegramMessage.FromUser object instead of
+        building its own. When a payload differs from the one the object was built from, e.g. after
+        a rename, a new object replaces it for the messages that follow; messages already holding the
+        old one keep the snapshot they were delivered with. The least recently seen entities are
+        forgotten once a bound is reached.
+
+        Entities are shared between handlers and must not be modified.
+
+        Parameters:
+        max_chats (int, optional): The maximum number of chats kept. Default is 10000.
+        max_users (int, optional): The maximum number of users kept. Default is 100000.
+        """
+        from . import TelegramMessage
+        self._chats = _Interned(TelegramMessage.Chat, max_chats)
+        self._users = _Interned(TelegramMessage.FromUser, max_users)
+
+    def chat(self, chat_data):
+        """
+        Return the chat object for a chat payload, reusing the stored one when possible.
+
+        Parameters:
+        chat_data (dict): The 'chat' of a message.
+
+        Returns:
+        TelegramMessage.Chat: The chat.
+        """
+        return self._chats.intern(chat_data)
+
+    def user(self, from_data):
+        """
+        Return the user object for a user payload, reusing the stored one when possible.
+
+        Parameters:
+        from_data (dict): The 'from' of a message.
+
+        Returns:
+        TelegramMessage.FromUser: The user.
+        """
+        return self._users.intern(from_data)
+
+    def get_chat(self, chat_id):
+        """
+        Look up a chat seen recently, without any API call.
+
+        Parameters:
+        chat_id (int): The id of the chat.
+
+        Returns:
+        TelegramMessage.Chat: The chat, or None if it is not stored.
+        """
+        return self._chats.get(chat_id)
+
+    def get_user(self, user_id):
+        """
+        Look up a user seen recently, without any API call.
+
+        Parameters:
+        user_id (int): The id of the user.
+
+        Returns:
+        TelegramMessage.FromUser: The user, or None if it is not stored.
+        """
+        return self._users.get(user_id)
+
+    def stats(self):
+        """
+        Return a snapshot of the store's state.
+
+        Returns:
+        dict: The number of stored chats and users, how many lookups reused an unchanged entity, and how many replaced a changed one.
+        """
+        return {
+            'chats': len(self._chats),
+            'users': len(self._users),
+            'hits': self._chats.hits + self._users.hits,
+            'updates': self._chats.updates + self._users.updates,
+        }
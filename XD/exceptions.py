@@ -35,6 +35,16 @@ class UserBlockedBot(Exception):
         msg = 'Bot was blocked by the user.'
         super().__init__(msg)
 
+class BotForbidden(Exception):
+    def __init__(self, description):
+        msg = 'The bot is not allowed to message this chat: {}.'.format(description)
+        super().__init__(msg)
+
+class InvalidFileId(Exception):
+    def __init__(self, description):
+        msg = 'Telegram rejected the file_id: {}.'.format(description)
+        super().__init__(msg)
+
 class ConversationTimeOut(Exception):
     def __init__(self, timeout):
         msg = 'The conversation response timeout of {} seconds was timed out.'.format(timeout)
@@ -50,5 +60,20 @@ class QueryError(Exception):
         msg = 'Query is too old and response timeouted or Query ID is invalid.'
         super().__init__(msg)
 
+class RPCError(Exception):
+    def __init__(self, code, message):
+        self.code = code
+        self.message = message
+        msg = 'RPC call failed with {}: {}.'.format(code, message)
+        super().__init__(msg)
+
+class TransportError(ConnectionError):
+    def __init__(self, code):
+        self.code = code
+        msg = 'The MTProto server closed the connection with transport error {}.'.format(code)
+        super().__init__(msg)
 
-      
+class SecurityError(Exception):
+    def __init__(self, reason):
+        msg = 'The auth_key handshake failed a security check: {}.'.format(reason)
+        super().__init__(msg)
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .upload import InputFile
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+_INLINE_HASH_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class FileIdCache:
+    def __init__(self, path=None, max_size=10000):
+        """
+        Initialize a new instance of the FileIdCache class.
+
+        The cache remembers the file_id Telegram assigned to uploaded media, so the same content
+        is sent by file_id instead of being uploaded again. Local files are identified by their path,
+        modification time and size; bytes and file objects by the SHA-256 of their content.
+        Entries live in a bounded in-memory LRU, backed by an optional SQLite file that survives restarts.
+        The SQLite file is only touched from one worker thread: lookups that miss the LRU wait for it,
+        while new and discarded entries are written behind, so the event loop never blocks on a commit.
+
+        Parameters:
+        path (str, optional): The SQLite database file. If None, the cache only lives in memory. Default is None.
+        max_size (int, optional): The maximum number of entries kept in memory. Default is 10000.
+
+        Attributes:
+        hits (int): The number of lookups answered with a file_id.
+        misses (int): The number of lookups that required an upload.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._db = None
+        self._io = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS file_ids (key TEXT PRIMARY KEY, file_id TEXT NOT NULL)')
+            self._db.commit()
+            self._io = ThreadPoolExecutor(1, thread_name_prefix='XD-filecache')
+
+    def _select(self, key):
+        row = self._db.execute('SELECT file_id FROM file_ids WHERE key = ?', (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _execute(self, statement, params):
+        try:
+            self._db.execute(statement, params)
+            self._db.commit()
+        except sqlite3.Error:
+            logger.exception("Failed to write the file_id cache.")
+
+    def _write_behind(self, statement, params):
+        if self._io is not None:
+            self._io.submit(self._execute, statement, params)
+
+    @staticmethod
+    def _hash_file(file):
+        start = file.tell()
+        digest = hashlib.sha256()
+        try:
+            for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        finally:
+            file.seek(start)
+        return digest.hexdigest()
+
+    async def key(self, kind, media):
+        """
+        Compute the cache key of a piece of media.
+
+        Parameters:
+        kind (str): The media parameter, e.g. 'photo' or 'video'. The same content gets separate keys per kind.
+        media (str, bytes, file-like object or InputFile): The media about to be uploaded.
+
+        Returns:
+        str: The cache key, or None if the media cannot be identified (e.g. an unseekable stream).
+        """
+        if isinstance(media, InputFile):
+            media = media._value
+        if isinstance(media, str):
+            stat = os.stat(media)
+            identity = f"path:{os.path.abspath(media)}:{stat.st_mtime_ns}:{stat.st_size}"
+        elif isinstance(media, (bytes, bytearray, memoryview)):
+            if len(media) <= _INLINE_HASH_SIZE:
+                digest = hashlib.sha256(media).hexdigest()
+            else:
+                digest = await asyncio.get_running_loop().run_in_executor(None, _hash_bytes, media)
+            identity = 'sha256:' + digest
+        else:
+            try:
+                digest = await asyncio.get_running_loop().run_in_executor(None, self._hash_file, media)
+            except (OSError, AttributeError, ValueError):
+                return None
+            identity = 'sha256:' + digest
+        return f"{kind}:{identity}"
+
+    async def get(self, key):
+        """
+        Look up the file_id stored for a key, counting a hit or a miss.
+
+        Parameters:
+        key (str): The cache key.
+
+        Returns:
+        str: The file_id, or None if it is not cached.
+        """
+        file_id = self._entries.get(key)
+        if file_id is not None:
+            self._entries.move_to_end(key)
+        elif self._io is not None:
+            file_id = await asyncio.get_running_loop().run_in_executor(self._io, self._select, key)
+            if file_id is not None and key not in self._entries:
+                self._remember(key, file_id)
+        if file_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return file_id
+
+    def _remember(self, key, file_id):
+        self._entries[key] = file_id
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def put(self, key, file_id):
+        """
+        Store the file_id of uploaded media.
+
+        Parameters:
+        key (str): The cache key.
+        file_id (str): The file_id Telegram returned.
+
+        Returns:
+        None
+        """
+        self._remember(key, file_id)
+        self._write_behind('INSERT OR REPLACE INTO file_ids (key, file_id) VALUES (?, ?)', (key, file_id))
+
+    def discard(self, key):
+        """
+        Forget a key, e.g. because Telegram no longer accepts its file_id.
+
+        Parameters:
+        key (str): The cache key.
+
+        Returns:
+        None
+        """
+        self._entries.pop(key, None)
+        self._write_behind('DELETE FROM file_ids WHERE key = ?', (key,))
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+        dict: The number of hits, misses and entries held in memory.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+    async def flush(self):
+        """
+        Wait until every entry stored or discarded so far is written to the SQLite file.
+
+        Returns:
+        None
+        """
+        if self._io is not None:
+            await asyncio.get_running_loop().run_in_executor(self._io, _noop)
+
+    def close(self):
+        """
+        Close the SQLite store once the pending writes are done, without waiting for them.
+
+        Returns:
+        None
+        """
+        if self._io is not None:
+            self._io.submit(self._close_db)
+            self._io.shutdown(wait=False)
+            self._io = None
+
+    def _close_db(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def _noop():
+    pass
+
+
+def _hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_file_id(result, kind):
+    """
+    Return the file_id of the media in a sent message.
+
+    Parameters:
+    result (dict): The message returned by a send method.
+    kind (str): The media parameter that was sent, e.g. 'photo'.
+
+    Returns:
+    str: The file_id, or None if the message carries no media.
+    """
+    if not isinstance(result, dict):
+        return None
+    for field in (kind, 'animation', 'video', 'document', 'audio', 'voice', 'photo'):
+        media = result.get(field)
+        if isinstance(media, list) and media:
+            media = media[-1]
+        if isinstance(media, dict) and 'file_id' in media:
+            return media['file_id']
+    return None
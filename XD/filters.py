@@ -0,0 +1,80 @@
+import re
+
+
+class Filter:
+    def __init__(self, func):
+        """
+        Wrap a predicate so it can be combined with other filters.
+
+        Filters are combined with & (and), | (or) and ~ (not), e.g. private & ~user(42).
+
+        Parameters:
+        func (callable): A function taking a TelegramMessage and returning a truthy value if it matches.
+        """
+        self.func = func
+
+    def __call__(self, message):
+        return self.func(message)
+
+    def __and__(self, other):
+        return Filter(lambda message: self.func(message) and other(message))
+
+    def __or__(self, other):
+        return Filter(lambda message: self.func(message) or other(message))
+
+    def __invert__(self):
+        return Filter(lambda message: not self.func(message))
+
+
+def chat_type(*types):
+    """
+    Match messages sent in chats of the given types ('private', 'group', 'supergroup', 'channel').
+    """
+    types = frozenset(types)
+    return Filter(lambda message: message.data.get('chat', {}).get('type') in types)
+
+
+def chat(*chat_ids):
+    """
+    Match messages sent in one of the given chats.
+    """
+    chat_ids = frozenset(chat_ids)
+    return Filter(lambda message: message.data.get('chat', {}).get('id') in chat_ids)
+
+
+def user(*user_ids):
+    """
+    Match messages sent by one of the given users.
+    """
+    user_ids = frozenset(user_ids)
+    return Filter(lambda message: message.data.get('from', {}).get('id') in user_ids)
+
+
+def content(*content_types):
+    """
+    Match messages with one of the given content types, e.g. content('photo', 'video').
+    """
+    content_types = frozenset(content_types)
+    return Filter(lambda message: message.content_type in content_types)
+
+
+def regex(pattern, flags=0):
+    """
+    Match messages whose text contains a match of the given regular expression.
+    """
+    pattern = re.compile(pattern, flags)
+    return Filter(lambda message: bool(message.text) and pattern.search(message.text) is not None)
+
+
+def prefix(*prefixes):
+    """
+    Match messages whose text starts with one of the given prefixes.
+    """
+    prefixes = tuple(prefixes)
+    return Filter(lambda message: bool(message.text) and message.text.startswith(prefixes))
+
+
+text = Filter(lambda message: bool(message.text))
+private = chat_type('private')
+group = chat_type('group', 'supergroup')
+channel = chat_type('channel')
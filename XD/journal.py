@@ -0,0 +1,406 @@
+"""
+An append-only, segmented write-ahead journal of received updates.
+
+Every update is written to the journal, and fsynced, before the offset that confirms it to Telegram is
+sent, so an update that was received is never lost. Handled updates are recorded in a small checkpoint
+file; after a crash, the updates in the journal that were not handled are dispatched again.
+
+Run python -m XD journal --help for the offline tools: info, and replay, which pushes a journal
+through a client's handlers at full speed for load testing.
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from .codec import get_codec
+
+_RECORD = struct.Struct('<IqI')
+_CHECKPOINT_HEADER = struct.Struct('<qI')
+_SEGMENT_PREFIX = 'updates-'
+_SEGMENT_SUFFIX = '.log'
+_CHECKPOINT = 'checkpoint'
+
+logger = logging.getLogger(__name__)
+
+
+def _segment_name(first_id):
+    return f"{_SEGMENT_PREFIX}{first_id:020d}{_SEGMENT_SUFFIX}"
+
+
+def _segments(path):
+    """
+    Return the (first update_id, file path) of every segment in a journal directory, oldest first.
+    """
+    segments = []
+    for name in os.listdir(path):
+        if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+            segments.append((int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]), os.path.join(path, name)))
+    segments.sort()
+    return segments
+
+
+def _read_segment(file_path):
+    """
+    Read the intact records of a segment.
+
+    Returns:
+    tuple: The list of (update_id, body) records and the size of the intact prefix of the file.
+        A record cut short by a crash, or failing its CRC, ends the segment.
+    """
+    with open(file_path, 'rb') as segment:
+        data = segment.read()
+    records = []
+    position = 0
+    while position + _RECORD.size <= len(data):
+        length, update_id, crc = _RECORD.unpack_from(data, position)
+        start = position + _RECORD.size
+        body = data[start:start + length]
+        if len(body) != length or zlib.crc32(body) != crc:
+            break
+        records.append((update_id, body))
+        position = start + length
+    return records, position
+
+
+def read_journal(path):
+    """
+    Iterate over every intact record of a journal.
+
+    Parameters:
+    path (str): The journal directory.
+
+    Yields:
+    tuple: The update_id and the encoded update, in the order they were written.
+    """
+    for first_id, file_path in _segments(path):
+        records, size = _read_segment(file_path)
+        _warn_torn(file_path, records, size)
+        yield from records
+
+
+def _warn_torn(file_path, records, size):
+    torn = os.path.getsize(file_path) - size
+    if torn:
+        logger.warning(f"Journal segment {os.path.basename(file_path)} is damaged after record {len(records)}: "
+                       f"skipping its last {torn} bytes.")
+
+
+def _read_checkpoint(path):
+    try:
+        with open(os.path.join(path, _CHECKPOINT), 'rb') as checkpoint:
+            data = checkpoint.read()
+        last_id, count = _CHECKPOINT_HEADER.unpack_from(data)
+        return last_id, set(struct.unpack_from(f'<{count}q', data, _CHECKPOINT_HEADER.size))
+    except (OSError, struct.error):
+        return None, set()
+
+
+class UpdateJournal:
+    def __init__(self, path, codec=None, segment_size=64 * 1024 * 1024, fsync=True, checkpoint_interval=1.0):
+        """
+        Initialize a new instance of the UpdateJournal class.
+
+        Updates are appended as length-prefixed, CRC-checked records to segment files named after their first
+        update_id. Concurrent appends are grouped, so one write and one fsync cover every update that arrived
+        while the previous write was in progress. Handled updates are not written per update: every
+        checkpoint_interval seconds a checkpoint file is atomically replaced with the last journaled update_id
+        and the ids of the journaled updates that are still unhandled. Segments that only hold handled updates
+        are deleted at the same time.
+
+        Parameters:
+        path (str): The journal directory. It is created if needed.
+        codec (JSONCodec, optional): Encodes the updates appended without their raw JSON. Default is the fastest available.
+        segment_size (int, optional): The size in bytes after which a new segment is started. Default is 64 MiB.
+        fsync (bool, optional): Whether every write is fsynced. Without fsync the journal survives a crash of the
+            process, but not of the machine. Default is True.
+        checkpoint_interval (float, optional): How often the checkpoint is written, in seconds. Default is 1.0.
+
+        Attributes:
+        last_id (int): The highest update_id in the journal, or None if it is empty.
+        """
+        self.path = path
+        self.codec = codec if codec is not None else get_codec()
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.checkpoint_interval = checkpoint_interval
+        self.last_id = None
+        self._open = set()
+        self._buffer = bytearray()
+        self._buffer_first = None
+        self._commit = None
+        self._writer = None
+        self._file = None
+        self._segments = []
+        self._dirty = False
+        self._checkpointer = None
+        self._io = None
+
+    @property
+    def unhandled(self):
+        """
+        int: The number of journaled updates that have not been handled yet.
+        """
+        return len(self._open)
+
+    def _recover(self):
+        """
+        Read the journal directory and return the records that were not handled before the last shutdown.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        checkpoint_id, unhandled = _read_checkpoint(self.path)
+        self._segments = _segments(self.path)
+        pending = []
+        last_id = checkpoint_id
+        for index, (first_id, file_path) in enumerate(self._segments):
+            records, size = _read_segment(file_path)
+            if index == len(self._segments) - 1:
+                if size != os.path.getsize(file_path):
+                    with open(file_path, 'r+b') as segment:
+                        segment.truncate(size)
+            else:
+                _warn_torn(file_path, records, size)
+            for update_id, body in records:
+                if update_id in unhandled or checkpoint_id is None or update_id > checkpoint_id:
+                    pending.append((update_id, body))
+                if last_id is None or update_id > last_id:
+                    last_id = update_id
+        self.last_id = last_id
+        self._open = {update_id for update_id, body in pending}
+        if self._segments:
+            self._file = open(self._segments[-1][1], 'ab')
+        return pending
+
+    async def open(self):
+        """
+        Open the journal and start writing checkpoints.
+
+        Returns:
+        list: The (update_id, encoded update) records that were journaled but not handled, to dispatch again.
+            Empty if the journal is already open.
+        """
+        if self._checkpointer is not None:
+            return []
+        self._io = ThreadPoolExecutor(1, thread_name_prefix='XD-journal')
+        loop = asyncio.get_running_loop()
+        pending = await loop.run_in_executor(self._io, self._recover)
+        self._checkpointer = loop.create_task(self._checkpoint_loop())
+        return pending
+
+    async def append(self, updates, bodies=None):
+        """
+        Write updates to the journal and wait until they are durable.
+
+        Parameters:
+        updates (list): The decoded updates.
+        bodies (list, optional): The JSON of every update, exactly as received from the Telegram API, which is what
+            is written. Default is None, which encodes the updates with the journal's codec; decoding into typed
+            structs drops fields, so pass the bodies whenever updates are typed.
+
+        Returns:
+        None
+        """
+        if bodies is None:
+            bodies = [self.codec.dumps(update) for update in updates]
+        for update, body in zip(updates, bodies):
+            update_id = update['update_id']
+            if self._buffer_first is None:
+                self._buffer_first = update_id
+            self._buffer += _RECORD.pack(len(body), update_id, zlib.crc32(body))
+            self._buffer += body
+            if self.last_id is None or update_id > self.last_id:
+                self.last_id = update_id
+            self._open.add(update_id)
+        if not self._buffer:
+            return
+        loop = asyncio.get_running_loop()
+        commit = self._commit
+        if commit is None:
+            commit = self._commit = loop.create_future()
+        if self._writer is None:
+            self._writer = loop.create_task(self._write_loop())
+        await asyncio.shield(commit)
+
+    async def _write_loop(self):
+        """
+        Write the buffered records, one batch at a time, resolving the commit every batch was waiting on.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while self._buffer:
+                data, first_id, commit = bytes(self._buffer), self._buffer_first, self._commit
+                self._buffer.clear()
+                self._buffer_first = None
+                self._commit = None
+                try:
+                    await loop.run_in_executor(self._io, self._write, data, first_id)
+                except Exception as e:
+                    commit.set_exception(e)
+                else:
+                    commit.set_result(None)
+        finally:
+            self._writer = None
+
+    def _write(self, data, first_id):
+        if self._file is None or self._file.tell() >= self.segment_size:
+            if self._file is not None:
+                self._file.close()
+            file_path = os.path.join(self.path, _segment_name(first_id))
+            self._file = open(file_path, 'ab')
+            self._segments.append((first_id, file_path))
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def done(self, update_id):
+        """
+        Record that an update has been handled, so it is not dispatched again after a restart.
+
+        Parameters:
+        update_id (int): The update_id of the handled update.
+
+        Returns:
+        None
+        """
+        self._open.discard(update_id)
+        self._dirty = True
+
+    async def _checkpoint_loop(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            if self._dirty:
+                try:
+                    await self.checkpoint()
+                except Exception:
+                    self._dirty = True
+                    logger.exception("Failed to write the journal checkpoint; retrying.")
+
+    async def checkpoint(self):
+        """
+        Write the checkpoint now and delete the segments that only hold handled updates.
+
+        Returns:
+        None
+        """
+        if self.last_id is None or self._io is None:
+            return
+        self._dirty = False
+        unhandled = sorted(self._open)
+        low = unhandled[0] if unhandled else self.last_id + 1
+        data = _CHECKPOINT_HEADER.pack(self.last_id, len(unhandled)) + struct.pack(f'<{len(unhandled)}q', *unhandled)
+        await asyncio.get_running_loop().run_in_executor(self._io, self._write_checkpoint, data, low)
+
+    def _write_checkpoint(self, data, low):
+        file_path = os.path.join(self.path, _CHECKPOINT)
+        with open(file_path + '.tmp', 'wb') as checkpoint:
+            checkpoint.write(data)
+            checkpoint.flush()
+            if self.fsync:
+                os.fsync(checkpoint.fileno())
+        os.replace(file_path + '.tmp', file_path)
+        while len(self._segments) > 1 and self._segments[1][0] <= low:
+            first_id, segment_path = self._segments.pop(0)
+            os.remove(segment_path)
+
+    async def close(self):
+        """
+        Finish pending writes, write a final checkpoint and close the journal.
+
+        Returns:
+        None
+        """
+        if self._writer is not None:
+            await asyncio.gather(self._writer, return_exceptions=True)
+        if self._checkpointer is not None:
+            self._checkpointer.cancel()
+            await asyncio.gather(self._checkpointer, return_exceptions=True)
+            self._checkpointer = None
+        if self._io is None:
+            return
+        await self.checkpoint()
+        if self._file is not None:
+            await asyncio.get_running_loop().run_in_executor(self._io, self._file.close)
+            self._file = None
+        self._io.shutdown(wait=False)
+        self._io = None
+
+
+async def replay(client, path, limit=None):
+    """
+    Push the updates of a journal through a client's handlers as fast as they are handled.
+
+    The client's own journal, if any, is not touched. Nothing is polled; the handlers' API calls go to
+    the client's api_url, so point it at a test server for load testing.
+
+    Parameters:
+    client (Client): The client whose handlers run.
+    path (str): The journal directory.
+    limit (int, optional): The maximum number of updates to replay. Default is None, which replays all of them.
+
+    Returns:
+    dict: The number of updates replayed, the seconds it took and the updates per second.
+    """
+    journal, client.journal = client.journal, None
+    client.router.compile(client.username)
+    client.dispatcher.start(client._handle_update)
+    count = 0
+    started = time.perf_counter()
+    try:
+        for update_id, body in read_journal(path):
+            if limit is not None and count >= limit:
+                break
+            await client.dispatcher.submit(client.codec.decode_update(body))
+            count += 1
+        await client.dispatcher.join()
+    finally:
+        elapsed = time.perf_counter() - started
+        await client.dispatcher.stop(drain=False)
+        client.journal = journal
+    return {'updates': count, 'seconds': round(elapsed, 3), 'updates_per_second': round(count / elapsed, 1) if elapsed else 0.0}
+
+
+def _load_client(spec):
+    module_name, _, attribute = spec.partition(':')
+    sys.path.insert(0, os.getcwd())
+    client = getattr(importlib.import_module(module_name), attribute or 'client')
+    return client() if callable(client) and not hasattr(client, 'router') else client
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m XD journal', description='Inspect or replay an XD update journal.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    info = commands.add_parser('info', help='Show the segments, records and checkpoint of a journal.')
+    info.add_argument('path')
+    replay_parser = commands.add_parser('replay', help="Push a journal through a client's handlers at full speed.")
+    replay_parser.add_argument('path')
+    replay_parser.add_argument('client', help="The client as module:attribute, e.g. mybot:client, or a function returning it.")
+    replay_parser.add_argument('--limit', type=int, help='Replay at most this many updates.')
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        checkpoint_id, unhandled = _read_checkpoint(args.path)
+        records = 0
+        for first_id, file_path in _segments(args.path):
+            segment_records, size = _read_segment(file_path)
+            records += len(segment_records)
+            torn = os.path.getsize(file_path) - size
+            print(f"{os.path.basename(file_path)}: {len(segment_records)} records, {size} bytes" + (f", {torn} torn bytes" if torn else ''))
+        print(f"records: {records}, checkpoint last_id: {checkpoint_id}, unhandled at checkpoint: {len(unhandled)}")
+        return 0
+
+    async def run_replay():
+        client = _load_client(args.client)
+        try:
+            return await replay(client, args.path, args.limit)
+        finally:
+            await client.close()
+
+    result = asyncio.run(run_replay())
+    print(f"replayed {result['updates']} updates in {result['seconds']} s: {result['updates_per_second']} updates/s")
+    return 0
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+from .dispatcher import Dispatcher, chat_key
+from .transport import HTTPTransport
+from .codec import get_codec
+from .exceptions import UnAuthorizedBotToken
+
+
+class _BotUpdate:
+    __slots__ = ('client', 'update')
+
+    def __init__(self, client, update):
+        self.client = client
+        self.update = update
+
+    def get(self, key, default=None):
+        return self.update.get(key, default)
+
+
+def _bot_chat_key(item):
+    return (item.client.token, chat_key(item.update))
+
+
+async def _handle_bot_update(item):
+    await item.client._handle_update(item.update)
+
+
+class _SharedDispatcher:
+    __slots__ = ('dispatcher', 'client')
+
+    def __init__(self, dispatcher, client):
+        """
+        The dispatcher of a hosted bot: it tags every update with its bot and submits it to the shared dispatcher.
+        """
+        self.dispatcher = dispatcher
+        self.client = client
+
+    @property
+    def running(self):
+        return self.dispatcher.running
+
+    @property
+    def pending(self):
+        return self.dispatcher.pending
+
+    async def submit(self, update):
+        await self.dispatcher.submit(_BotUpdate(self.client, update))
+
+    async def join(self):
+        await self.dispatcher.join()
+
+
+class BotManager:
+    def __init__(self, api_url='https://api.telegram.org', transport=None, workers=64, chat_queue_size=100, codec=None, metrics=None):
+        """
+        Initialize a new instance of the BotManager class.
+
+        The manager hosts many bots in one process and on one event loop. Every bot is a regular Client
+        with its own router, rate limiter and getUpdates offset, but they all share one pooled HTTPTransport,
+        one codec and one Dispatcher, so a hosted bot costs a router, a long-poll task and the connection that
+        poll holds. Updates keep their order per bot and chat. Bots can be added and removed while the manager runs.
+
+        Parameters:
+        api_url (str, optional): The root URL of the Bot API server. Default is 'https://api.telegram.org'.
+        transport (HTTPTransport, optional): The transport shared by every bot. Default is a new HTTPTransport without a
+            connection limit, because every polling bot keeps one connection busy with its long poll.
+        workers (int, optional): The number of updates, across all bots, that may be handled concurrently. Default is 64.
+        chat_queue_size (int, optional): The maximum number of pending updates per chat. Default is 100.
+        codec (JSONCodec, optional): The codec every bot decodes updates with. Default is the fastest available JSON backend.
+        metrics (Metrics, optional): Where every bot records its API calls and handlers. Default is None.
+
+        Attributes:
+        bots (dict): The hosted clients, by token.
+        transport (HTTPTransport): The shared transport.
+        dispatcher (Dispatcher): The shared worker pool.
+        """
+        self.api_url = api_url
+        self.transport = transport if transport is not None else HTTPTransport(limit=0)
+        self.dispatcher = Dispatcher(workers, chat_queue_size, key=_bot_chat_key)
+        self.codec = codec if codec is not None else get_codec()
+        self.metrics = metrics
+        self.logger = logging.getLogger(__name__)
+        self.bots = {}
+        self._tasks = {}
+        self._replaced = {}
+        self._polling = None
+        if metrics is not None:
+            metrics.add_gauge('dispatcher_pending_updates', 'Updates submitted to the dispatcher but not yet handled.',
+                              lambda: self.dispatcher.pending)
+            metrics.add_gauge('hosted_bots', 'Bots hosted by the manager.', lambda: len(self.bots))
+
+    def __len__(self):
+        return len(self.bots)
+
+    def __contains__(self, token):
+        return token in self.bots
+
+    def __getitem__(self, token):
+        return self.bots[token]
+
+    def add(self, bot, **kwargs):
+        """
+        Host a bot. If the manager is running, the bot starts polling right away.
+
+        Parameters:
+        bot (str or Client): The bot token, or an existing Client, which is moved onto the shared transport and codec.
+        **kwargs: Further arguments for the Client created from a token, e.g. rate_limiter or file_cache.
+
+        Returns:
+        Client: The hosted client. Register its handlers with client.on_message as usual.
+
+        Raises:
+        ValueError: If a bot with the same token is already hosted, or the token is invalid.
+        """
+        from . import Client
+        if isinstance(bot, Client):
+            client = bot
+        else:
+            client = Client(bot, self.api_url, transport=self.transport, codec=self.codec, **kwargs)
+        if client.token in self.bots:
+            raise ValueError("This bot is already hosted by the manager.")
+        if client.transport is not self.transport:
+            self._replaced[client.token] = client.transport
+            client.transport = self.transport
+        client.codec = self.codec
+        client.dispatcher = _SharedDispatcher(self.dispatcher, client)
+        client.metrics = self.metrics
+        self.bots[client.token] = client
+        if self._polling is not None:
+            self._start_bot(client)
+        return client
+
+    async def remove(self, token, drain=True):
+        """
+        Stop polling for a bot and forget it.
+
+        Parameters:
+        token (str): The token of the bot.
+        drain (bool, optional): Whether to wait until every update already submitted, by any bot, has been handled. Default is True.
+
+        Returns:
+        Client: The removed client, or None if no bot with this token is hosted.
+        """
+        client = self.bots.pop(token, None)
+        if client is None:
+            return None
+        task = self._tasks.pop(token, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if drain:
+            await self.dispatcher.join()
+        await self._release(client)
+        return client
+
+    async def _release(self, client):
+        """
+        Close what a hosted client owns: its journal, its requests session and the transport it had before it
+        was added. The shared transport stays open.
+        """
+        if client.journal is not None:
+            await client.journal.close()
+        if client._session is not None:
+            client._session.close()
+            client._session = None
+        transport = self._replaced.pop(client.token, None)
+        if transport is not None:
+            await transport.close()
+
+    def _start_bot(self, client):
+        limit, timeout, allowed_updates = self._polling
+        task = asyncio.get_running_loop().create_task(self._run_bot(client, limit, timeout, allowed_updates))
+        self._tasks[client.token] = task
+
+    async def _run_bot(self, client, limit, timeout, allowed_updates):
+        """
+        Validate a bot's token without blocking the loop, then long-poll its updates into the shared dispatcher.
+
+        Failures to reach the API are retried with a growing delay; only a token Telegram rejects removes the bot.
+        """
+        bot_id = client.token.split(':', 1)[0]
+        retry_delay = 0
+        while True:
+            try:
+                response = await client._send_request('getMe', {}, raise_errors=True)
+                break
+            except UnAuthorizedBotToken:
+                self.logger.error(f"Bot token {bot_id}:... is invalid. Removing the bot.")
+                self.bots.pop(client.token, None)
+                self._tasks.pop(client.token, None)
+                await self._release(client)
+                return
+            except Exception as e:
+                retry_delay = min(retry_delay * 2 or 1, 30)
+                self.logger.warning(f"Could not validate bot {bot_id}: {e}. Retrying in {retry_delay} seconds.")
+                await asyncio.sleep(retry_delay)
+        me = response.get('result') or {}
+        if client.cache is not None:
+            client.cache.put('getMe', None, me)
+        client.username = me.get('username')
+        client.router.compile(client.username)
+        await client._poll_updates(limit, timeout, allowed_updates)
+
+    async def start(self, limit=100, timeout=100, allowed_updates=None):
+        """
+        Start every hosted bot and process their updates until cancelled.
+
+        Parameters:
+        limit (int, optional): The maximum number of updates fetched per poll, between 1 and 100. Default is 100.
+        timeout (int, optional): The long-polling timeout in seconds. Default is 100.
+        allowed_updates (list, optional): The update types to receive. Default is None.
+
+        Returns:
+        None
+        """
+        self._polling = (limit, timeout, allowed_updates)
+        self.dispatcher.start(_handle_bot_update)
+        for client in list(self.bots.values()):
+            self._start_bot(client)
+        self.logger.info(f"Bot manager started with {len(self.bots)} bots.")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """
+        Stop polling for every bot, stop the dispatcher and close the shared transport.
+
+        Returns:
+        None
+        """
+        self._polling = None
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.dispatcher.stop(drain=False)
+        for client in self.bots.values():
+            await self._release(client)
+        await self.transport.close()
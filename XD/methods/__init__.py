@@ -0,0 +1,27 @@
+from .base import Method
+from .copy_message import copy_message
+from .delete_message import delete_message
+from .edit_message_text import edit_message_text
+from .forward_message import forward_message
+from .get_chat import get_chat
+from .get_chat_member import get_chat_member
+from .get_me import get_me
+
+METHODS = {
+    method.name: method
+    for method in (copy_message, delete_message, edit_message_text, forward_message, get_chat, get_chat_member, get_me)
+}
+
+
+class BotMethods:
+    """
+    Client methods generated from the declarative specs in METHODS.
+
+    Methods that need more than a plain call, such as send_message, send_photo, send_video or get_updates,
+    are defined on the client itself and have no spec here.
+    """
+
+
+for _method in METHODS.values():
+    setattr(BotMethods, _method.name, _method.bind())
+del _method
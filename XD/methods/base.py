@@ -0,0 +1,74 @@
+from .parse import parse_buttons
+
+
+class Method:
+    __slots__ = ('name', 'api_name', 'required', 'params', '_positions')
+
+    def __init__(self, name, api_name, required=(), optional=()):
+        """
+        The declarative description of a Telegram Bot API method.
+
+        Parameters:
+        name (str): The Python name of the method, e.g. 'copy_message'.
+        api_name (str): The Bot API name of the method, e.g. 'copyMessage'.
+        required (tuple, optional): The parameters that must be given, in positional order. Default is ().
+        optional (tuple, optional): The optional parameters, in positional order after the required ones. Default is ().
+        """
+        self.name = name
+        self.api_name = api_name
+        self.required = tuple(required)
+        self.params = self.required + tuple(optional)
+        self._positions = len(self.params)
+
+    def build(self, args, kwargs):
+        """
+        Turn call arguments into the parameters of the API request.
+
+        Positional arguments follow the declared parameter order. Keyword arguments that are not
+        declared are passed through unchanged, so newer Bot API parameters can be used right away.
+        None values are dropped and list keyboards are converted with parse_buttons.
+
+        Parameters:
+        args (tuple): The positional arguments of the call.
+        kwargs (dict): The keyword arguments of the call.
+
+        Returns:
+        dict: The request parameters.
+
+        Raises:
+        TypeError: If there are too many positional arguments, a parameter is given twice, or a required one is missing.
+        """
+        if len(args) > self._positions:
+            raise TypeError(f"{self.name}() takes at most {self._positions} positional arguments ({len(args)} given)")
+        data = dict(zip(self.params, args))
+        for key, value in kwargs.items():
+            if key in data:
+                raise TypeError(f"{self.name}() got multiple values for argument '{key}'")
+            data[key] = value
+        for key in self.required:
+            if data.get(key) is None:
+                raise TypeError(f"{self.name}() missing required argument: '{key}'")
+        markup = data.get('reply_markup')
+        if isinstance(markup, list):
+            data['reply_markup'] = parse_buttons(markup)
+        return {key: value for key, value in data.items() if value is not None}
+
+    def bind(self):
+        """
+        Create the client method that calls this API method.
+
+        Returns:
+        function: A coroutine function taking the client, the positional and the keyword arguments.
+        """
+        method = self
+
+        async def call(self, *args, **kwargs):
+            return await self._call_method(method, args, kwargs)
+
+        call.__name__ = call.__qualname__ = self.name
+        call.__doc__ = (
+            f"Call the {self.api_name} method of the Telegram Bot API.\n\n"
+            f"Parameters:\n" + ''.join(f"{param} ({'required' if param in self.required else 'optional'})\n" for param in self.params)
+            + "\nReturns:\nThe 'result' of the API response, or None if the request failed."
+        )
+        return call
@@ -0,0 +1,3 @@
+from .base import Method
+
+delete_message = Method('delete_message', 'deleteMessage', required=('chat_id', 'message_id'))
@@ -0,0 +1,8 @@
+from .base import Method
+
+edit_message_text = Method(
+    'edit_message_text', 'editMessageText',
+    required=('text',),
+    optional=('chat_id', 'message_id', 'inline_message_id', 'parse_mode', 'entities', 'disable_web_page_preview',
+              'reply_markup'),
+)
@@ -0,0 +1,3 @@
+from .base import Method
+
+get_chat = Method('get_chat', 'getChat', required=('chat_id',))
@@ -0,0 +1,3 @@
+from .base import Method
+
+get_chat_member = Method('get_chat_member', 'getChatMember', required=('chat_id', 'user_id'))
@@ -1,4 +1,4 @@
-import requests
+from urllib.parse import urlparse
 
 def parse_buttons(buttons):
     try:
@@ -16,6 +16,6 @@ def parse_buttons(buttons):
         return None
 
 def parse_url(url):
-    parsed_url = requests.utils.urlparse(url)
+    parsed_url = urlparse(url)
     query_params = dict(param.split('=') for param in parsed_url.query.split('&'))
     return query_params
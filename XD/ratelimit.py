@@ -0,0 +1,249 @@
+import asyncio
+import itertools
+from heapq import heappush, heappop
+from time import monotonic
+
+INTERACTIVE = 0
+BULK = 1
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate, capacity):
+        """
+        A token bucket refilled at a constant rate.
+
+        Parameters:
+        rate (float): The number of tokens added per second.
+        capacity (float): The maximum number of tokens, i.e. the largest allowed burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now):
+        """
+        Return how many seconds to wait before a token can be taken.
+        """
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds, now):
+        """
+        Stop handing out tokens for the given number of seconds, e.g. after a 429 response.
+        """
+        self.paused_until = max(self.paused_until, now + seconds)
+        self._refill(now)
+        self.tokens = min(self.tokens, 0)
+
+    def idle(self, now):
+        """
+        bool: True if the bucket is full and not paused, so forgetting it changes nothing.
+        """
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.paused_until
+
+
+class _PriorityGate:
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._task = None
+
+    def depth(self, priority=None):
+        if priority is None:
+            return len(self._waiters)
+        return sum(1 for waiter in self._waiters if waiter[0] == priority)
+
+    async def acquire(self, priority):
+        now = monotonic()
+        if not self._waiters and self.bucket.delay(now) <= 0:
+            self.bucket.take(now)
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._release())
+        await future
+
+    async def _release(self):
+        """
+        Hand out tokens to the waiters, highest priority (lowest number) first.
+        """
+        while self._waiters:
+            delay = self.bucket.delay(monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            future = heappop(self._waiters)[2]
+            if future.done():
+                continue
+            self.bucket.take(monotonic())
+            future.set_result(None)
+
+
+class _ChatSlot:
+    __slots__ = ('bucket', 'lock', 'users')
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class RateLimiter:
+    def __init__(self, global_rate=30, global_burst=30, private_rate=1, private_burst=3, group_rate=20 / 60, group_burst=5, max_retries=3, max_idle_chats=10000):
+        """
+        Initialize a new instance of the RateLimiter class.
+
+        The limiter schedules outgoing API calls so they stay within Telegram's flood limits:
+        a global limit for the whole bot, a per-chat limit for private chats and a stricter
+        per-chat limit for groups and channels. Calls of a higher priority class get global
+        capacity before lower ones, so interactive replies are not stuck behind bulk traffic.
+        When Telegram answers with 429, the affected bucket is paused for retry_after seconds.
+
+        Parameters:
+        global_rate (float, optional): Messages per second across all chats. Default is 30.
+        global_burst (float, optional): The largest global burst. Default is 30.
+        private_rate (float, optional): Messages per second to one private chat. Default is 1.
+        private_burst (float, optional): The largest burst to one private chat. Default is 3.
+        group_rate (float, optional): Messages per second to one group or channel. Default is 20 per minute.
+        group_burst (float, optional): The largest burst to one group or channel. Default is 5.
+        max_retries (int, optional): How many times a call rejected with 429 is retried. Default is 3.
+        max_idle_chats (int, optional): How many per-chat buckets are kept before idle ones are dropped. Default is 10000.
+        """
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_retries = max_retries
+        self.max_idle_chats = max_idle_chats
+        self._global = _PriorityGate(TokenBucket(global_rate, global_burst))
+        self._chats = {}
+        self._acquired = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _new_bucket(self, chat_id):
+        if isinstance(chat_id, int) and chat_id > 0:
+            return TokenBucket(self.private_rate, self.private_burst)
+        return TokenBucket(self.group_rate, self.group_burst)
+
+    def _evict_idle(self):
+        now = monotonic()
+        for chat_id in [chat_id for chat_id, slot in self._chats.items() if not slot.users and slot.bucket.idle(now)]:
+            del self._chats[chat_id]
+
+    async def acquire(self, chat_id=None, priority=INTERACTIVE):
+        """
+        Wait until a call to the given chat may be sent.
+
+        Calls to one chat are admitted in the order they arrived. A call first waits for its
+        chat's bucket and then for the global bucket.
+
+        Parameters:
+        chat_id (int or str, optional): The target chat, or None for calls that only count globally. Default is None.
+        priority (int, optional): The priority class, INTERACTIVE or BULK. Lower numbers go first. Default is INTERACTIVE.
+
+        Returns:
+        float: The number of seconds the call waited.
+        """
+        started = monotonic()
+        if chat_id is None:
+            await self._global.acquire(priority)
+        else:
+            slot = self._chats.get(chat_id)
+            if slot is None:
+                if len(self._chats) >= self.max_idle_chats:
+                    self._evict_idle()
+                slot = self._chats[chat_id] = _ChatSlot(self._new_bucket(chat_id))
+            slot.users += 1
+            try:
+                async with slot.lock:
+                    while True:
+                        delay = slot.bucket.delay(monotonic())
+                        if delay <= 0:
+                            break
+                        await asyncio.sleep(delay)
+                    await self._global.acquire(priority)
+                    slot.bucket.take(monotonic())
+            finally:
+                slot.users -= 1
+        waited = monotonic() - started
+        self._acquired += 1
+        self._wait_total += waited
+        if waited > self._wait_max:
+            self._wait_max = waited
+        return waited
+
+    def throttle(self, chat_id, retry_after):
+        """
+        Pause a bucket after Telegram answered with 429 Too Many Requests.
+
+        Parameters:
+        chat_id (int or str): The chat the rejected call was sent to, or None to pause the global bucket.
+        retry_after (float): The number of seconds Telegram asked to wait.
+
+        Returns:
+        None
+        """
+        self._throttled += 1
+        now = monotonic()
+        slot = self._chats.get(chat_id) if chat_id is not None else None
+        if slot is not None:
+            slot.bucket.pause(retry_after, now)
+        else:
+            self._global.bucket.pause(retry_after, now)
+
+    def scale_global(self, factor):
+        """
+        Scale the global limit, e.g. to split it between several worker processes that share one bot.
+
+        Parameters:
+        factor (float): The share of the global rate and burst this limiter may use.
+
+        Returns:
+        None
+        """
+        bucket = self._global.bucket
+        bucket.rate *= factor
+        bucket.capacity = max(bucket.capacity * factor, 1)
+        bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    def stats(self):
+        """
+        Return a snapshot of the scheduler's state.
+
+        Returns:
+        dict: The queue depth (total and per priority class), the number of chats with waiting calls,
+            the number of admitted and throttled calls, and the mean and maximum wait in seconds.
+        """
+        return {
+            'queued': self._global.depth() + sum(max(slot.users - 1, 0) for slot in self._chats.values()),
+            'queued_interactive': self._global.depth(INTERACTIVE),
+            'queued_bulk': self._global.depth(BULK),
+            'busy_chats': sum(1 for slot in self._chats.values() if slot.users),
+            'acquired': self._acquired,
+            'throttled': self._throttled,
+            'wait_mean': self._wait_total / self._acquired if self._acquired else 0.0,
+            'wait_max': self._wait_max,
+        }
@@ -0,0 +1,207 @@
+import re
+from heapq import merge
+from operator import attrgetter
+from time import perf_counter
+
+_by_index = attrgetter('index')
+
+
+class Handler:
+    __slots__ = ('callback', 'index', 'commands', 'prefixes', 'pattern', 'filters', 'name')
+
+    def __init__(self, callback, index, commands=(), prefixes=(), pattern=None, filters=None):
+        self.callback = callback
+        self.index = index
+        self.commands = commands
+        self.prefixes = prefixes
+        self.pattern = pattern
+        self.filters = filters
+        self.name = commands[0] if commands else getattr(callback, '__name__', 'handler')
+
+    def check(self, message):
+        """
+        Check the conditions that the router's indexes did not already guarantee.
+
+        Returns:
+        re.Match or bool: The regex match if the handler has a pattern, otherwise True if the handler applies.
+        """
+        match = True
+        if self.pattern is not None:
+            match = self.pattern.search(message.text)
+            if match is None:
+                return False
+        if self.prefixes and self.commands and not message.text.startswith(self.prefixes):
+            return False
+        if self.filters is not None and not self.filters(message):
+            return False
+        return match
+
+
+class Router:
+    def __init__(self):
+        """
+        Initialize a new instance of the Router class.
+
+        Handlers are registered in order and compiled into lookup tables once, before updates
+        are handled: a dict of commands, a table of prefixes grouped by length, the list of regex
+        handlers and the list of filter-only handlers. For every message the router only looks at
+        the handlers those tables return, and runs the first, in registration order, whose
+        conditions and filters all match.
+
+        Attributes:
+        username (str): The bot username, used to accept commands addressed as /command@username.
+        """
+        self.username = None
+        self._handlers = []
+        self._compiled = False
+        self._commands = {}
+        self._prefixes = []
+        self._patterns = []
+        self._others = []
+
+    def add(self, callback, commands=(), prefixes=(), pattern=None, filters=None):
+        """
+        Register a handler.
+
+        Parameters:
+        callback (coroutine function): The handler, called with the matching TelegramMessage.
+        commands (tuple, optional): Commands that trigger the handler, e.g. ('/start',). Default is ().
+        prefixes (tuple, optional): Text prefixes that trigger the handler. Default is ().
+        pattern (str or re.Pattern, optional): A regular expression the text must contain. Default is None.
+        filters (callable, optional): A predicate the message must satisfy, e.g. an XD.filters filter. Default is None.
+
+        Returns:
+        Handler: The registered handler.
+        """
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern)
+        handler = Handler(callback, len(self._handlers), tuple(commands), tuple(prefixes), pattern, filters)
+        self._handlers.append(handler)
+        self._compiled = False
+        return handler
+
+    def compile(self, username=None):
+        """
+        Build the lookup tables from the registered handlers.
+
+        Parameters:
+        username (str, optional): The bot username, without the leading '@'. Default is the current username.
+
+        Returns:
+        None
+        """
+        if username is not None:
+            self.username = username
+        commands, prefixes, patterns, others = {}, {}, [], []
+        for handler in self._handlers:
+            if handler.commands:
+                for command in handler.commands:
+                    commands.setdefault(command, []).append(handler)
+            elif handler.prefixes:
+                for prefix in handler.prefixes:
+                    prefixes.setdefault(len(prefix), {}).setdefault(prefix, []).append(handler)
+            elif handler.pattern is not None:
+                patterns.append(handler)
+            else:
+                others.append(handler)
+        self._commands = commands
+        self._prefixes = sorted(prefixes.items())
+        self._patterns = patterns
+        self._others = others
+        self._compiled = True
+
+    def _command(self, text):
+        """
+        Return the command at the start of the text, with a matching @username suffix removed.
+        """
+        end = 0
+        length = len(text)
+        while end < length and not text[end].isspace():
+            end += 1
+        command = text[:end]
+        if not command:
+            return None
+        at = command.find('@') if command[0] == '/' else -1
+        if at != -1:
+            if self.username is not None and command[at + 1:].lower() != self.username.lower():
+                return None
+            command = command[:at]
+        return command
+
+    def candidates(self, message):
+        """
+        Return the handlers that may apply to a message, in registration order.
+
+        Parameters:
+        message (TelegramMessage): The incoming message.
+
+        Returns:
+        iterator: The candidate handlers.
+        """
+        if not self._compiled:
+            self.compile()
+        text = message.text
+        if not text:
+            return iter(self._others)
+        groups = []
+        if self._commands:
+            command = self._command(text)
+            if command in self._commands:
+                groups.append(self._commands[command])
+        for length, table in self._prefixes:
+            if length > len(text):
+                break
+            found = table.get(text[:length])
+            if found is not None:
+                groups.append(found)
+        if self._patterns:
+            groups.append(self._patterns)
+        if self._others:
+            groups.append(self._others)
+        if len(groups) == 1:
+            return iter(groups[0])
+        return merge(*groups, key=_by_index)
+
+    def match(self, message):
+        """
+        Find the handler for a message.
+
+        Parameters:
+        message (TelegramMessage): The incoming message.
+
+        Returns:
+        Handler: The first matching handler, or None. If the handler has a pattern, message.match is set.
+        """
+        for handler in self.candidates(message):
+            match = handler.check(message)
+            if match:
+                if match is not True:
+                    message.match = match
+                return handler
+        return None
+
+    async def dispatch(self, message, metrics=None):
+        """
+        Run the handler matching a message, if any.
+
+        Parameters:
+        message (TelegramMessage): The incoming message.
+        metrics (Metrics, optional): Where to record the handler's run time, by its name. Default is None.
+
+        Returns:
+        bool: True if a handler ran, False otherwise.
+        """
+        handler = self.match(message)
+        if handler is None:
+            return False
+        if metrics is None:
+            await handler.callback(message)
+            return True
+        started = perf_counter()
+        try:
+            await handler.callback(message)
+        except BaseException:
+            metrics.handler_finished(handler.name, started, failed=True)
+            raise
+        metrics.handler_finished(handler.name, started)
+        return True
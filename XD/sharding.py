@@ -0,0 +1,467 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import socket
+import struct
+from .dispatcher import Dispatcher, chat_key
+
+_FRAME = struct.Struct('<IBq')
+_STATUS = struct.Struct('<H')
+_TIMEOUT = struct.Struct('<d')
+
+UPDATE = 0
+DONE = 1
+CALL = 2
+RESULT = 3
+
+_WRITE_BUFFER_LIMIT = 1024 * 1024
+
+
+def _frame(kind, ident, payload=b''):
+    return _FRAME.pack(len(payload), kind, ident) + payload
+
+
+async def _read_frame(reader):
+    length, kind, ident = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    payload = await reader.readexactly(length) if length else b''
+    return kind, ident, payload
+
+
+class _FunnelTransport:
+    def __init__(self, writer, direct):
+        """
+        The transport of a worker process that sends its API calls through the parent process.
+
+        Calls with files are still sent directly, through the worker's own transport.
+
+        Parameters:
+        writer (asyncio.StreamWriter): The worker's end of the pipe to the parent.
+        direct (HTTPTransport): The transport used for uploads.
+        """
+        self.writer = writer
+        self.direct = direct
+        self.codec = direct.codec
+        self._calls = {}
+        self._ids = itertools.count()
+
+    async def request(self, url, data=None, files=None, timeout=None, decode=None):
+        if files:
+            return await self.direct.request(url, data, files, timeout, decode)
+        body = b''
+        if data:
+            if not isinstance(data, bytes):
+                if None in data.values():
+                    data = {key: value for key, value in data.items() if value is not None}
+                data = self.codec.dumps(data)
+            body = data
+        ident = next(self._ids)
+        future = self._calls[ident] = asyncio.get_running_loop().create_future()
+        method = url.rsplit('/', 1)[1].encode()
+        if self.writer.is_closing():
+            raise ConnectionError("The pipe to the parent process is closed.")
+        self.writer.write(_frame(CALL, ident, _TIMEOUT.pack(timeout or 0.0) + method + b'\n' + body))
+        try:
+            status, body = await future
+        finally:
+            self._calls.pop(ident, None)
+        if not status:
+            raise ConnectionError(body.decode('utf-8', 'replace'))
+        try:
+            payload = (decode or self.codec.loads)(body)
+        except Exception:
+            payload = body.decode('utf-8', 'replace')
+        return status, payload
+
+    def resolve(self, ident, payload):
+        future = self._calls.get(ident)
+        if future is not None and not future.done():
+            future.set_result((_STATUS.unpack_from(payload)[0], payload[_STATUS.size:]))
+
+    def fail(self, error):
+        for future in self._calls.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self):
+        self.fail(ConnectionError("The worker process is shutting down."))
+        await self.direct.close()
+
+
+def _run_shard(client, factory, sock, inherited, username, outbound, workers, chat_queue_size, share):
+    """
+    The entry point of a worker process.
+
+    A forked worker first closes the parent's ends of every socket pair, so that each worker sees
+    end of file as soon as the parent closes its pipe.
+    """
+    for fd in inherited:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+    if factory is not None:
+        client = factory()
+    else:
+        client.transport.after_fork()
+    try:
+        asyncio.run(_serve_shard(client, sock, username, outbound, workers, chat_queue_size, share))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve_shard(client, sock, username, outbound, workers, chat_queue_size, share):
+    """
+    Handle the updates the parent process sends, on a local dispatcher, and report each one when done.
+    """
+    reader, writer = await asyncio.open_connection(sock=sock)
+    if outbound == 'funnel':
+        client.transport = _FunnelTransport(writer, client.transport)
+    client.journal = None
+    if client.rate_limiter is not None and share < 1:
+        client.rate_limiter.scale_global(share)
+    client.router.compile(username)
+    client.dispatcher = dispatcher = Dispatcher(workers, chat_queue_size)
+
+    async def handle(update):
+        try:
+            await client._handle_update(update)
+        finally:
+            if not writer.is_closing():
+                writer.write(_frame(DONE, update['update_id']))
+
+    dispatcher.start(handle)
+    try:
+        while True:
+            kind, ident, payload = await _read_frame(reader)
+            if kind == UPDATE:
+                update = client.codec.decode_update(payload)
+                if client.conversations.feed(update):
+                    writer.write(_frame(DONE, ident))
+                else:
+                    await dispatcher.submit(update)
+            elif kind == RESULT:
+                client.transport.resolve(ident, payload)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        await dispatcher.stop(drain=False)
+        await client.transport.close()
+        writer.close()
+
+
+class _Shard:
+    __slots__ = ('index', 'process', 'writer', 'pending', 'attempts', 'ready', 'wakeup', 'restarts')
+
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.writer = None
+        self.pending = {}
+        self.attempts = {}
+        self.ready = False
+        self.wakeup = asyncio.Event()
+        self.restarts = 0
+
+
+class ShardedDispatcher:
+    def __init__(self, client, processes=None, factory=None, outbound='direct', workers=16, chat_queue_size=100,
+                 max_pending=1000, max_redeliveries=2, restart_delay=1.0, max_restart_delay=30.0, key=chat_key, start_method=None):
+        """
+        Initialize a new instance of the ShardedDispatcher class.
+
+        A drop-in replacement for the client's Dispatcher that runs handlers in worker processes,
+        so CPU-heavy handlers scale across cores. The process that polls (or receives webhooks) routes
+        every update by the hash of its key, by default the chat id, to one of the workers. Updates of
+        one chat therefore always go to the same worker and keep their order. Updates travel as
+        length-prefixed JSON frames over a socket pair, encoded with the client's codec. Each worker
+        handles them on its own Dispatcher and reports every handled update back.
+
+        A supervisor task per worker restarts it when it exits, with exponential backoff. The updates
+        it had not finished are delivered again to the new process one at a time, before any new update,
+        and an update the process dies while handling is delivered at most max_redeliveries times, so one
+        update that crashes its worker cannot crash it forever, nor take the updates beside it down too.
+
+        Install it with client.dispatcher = ShardedDispatcher(client, processes=4) before start()
+        or start_webhook(). The workers are forked from the client, so they inherit its handlers. Where
+        fork is not available, pass a factory instead: a picklable function, e.g. defined at module
+        level, that builds and returns the configured Client in the worker.
+
+        Parameters:
+        client (Client): The client whose updates are dispatched.
+        processes (int, optional): The number of worker processes. Default is the number of CPUs.
+        factory (callable, optional): Builds the Client of each worker. Default is None, which forks the given client.
+        outbound (str, optional): 'direct' to send API calls from each worker over its own connections,
+            or 'funnel' to send them through the parent's transport. Uploads are always sent directly. Default is 'direct'.
+        workers (int, optional): The number of concurrent handlers in each worker process. Default is 16.
+        chat_queue_size (int, optional): The maximum number of pending updates per chat in a worker. Default is 100.
+        max_pending (int, optional): The maximum number of unfinished updates per worker, before submit() waits. Default is 1000.
+        max_redeliveries (int, optional): How many times an update is delivered again after its worker died. Default is 2.
+        restart_delay (float, optional): The first delay before a dead worker is restarted, in seconds. Default is 1.0.
+        max_restart_delay (float, optional): The longest delay between restarts, in seconds. Default is 30.0.
+        key (callable, optional): A function mapping an update to its ordering key. Default is chat_key.
+        start_method (str, optional): The multiprocessing start method. Default is 'fork' without a factory,
+            and the platform default with one.
+
+        Raises:
+        ValueError: If processes or outbound is invalid, or fork is unavailable and no factory is given.
+        """
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if processes < 1:
+            raise ValueError("A sharded dispatcher needs at least one process.")
+        if outbound not in ('direct', 'funnel'):
+            raise ValueError("outbound must be 'direct' or 'funnel'.")
+        if start_method is None and factory is None:
+            start_method = 'fork'
+        if start_method is not None and start_method not in multiprocessing.get_all_start_methods():
+            raise ValueError(f"The {start_method!r} start method is not available; pass a factory instead.")
+        self.client = client
+        self.processes = processes
+        self.factory = factory
+        self.outbound = outbound
+        self.workers = workers
+        self.chat_queue_size = chat_queue_size
+        self.max_pending = max_pending
+        self.max_redeliveries = max_redeliveries
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.key = key
+        self.logger = logging.getLogger(__name__)
+        self._context = multiprocessing.get_context(start_method)
+        self._shards = []
+        self._tasks = []
+        self._calls = set()
+        self._pending = 0
+        self._idle = None
+        self._stopping = False
+
+    @property
+    def running(self):
+        """
+        bool: True if the worker processes have been started and not stopped.
+        """
+        return bool(self._tasks)
+
+    @property
+    def pending(self):
+        """
+        int: The number of updates submitted but not yet reported as handled by a worker.
+        """
+        return self._pending
+
+    def start(self, handler=None):
+        """
+        Start the worker processes and their supervisors.
+
+        Parameters:
+        handler (coroutine function, optional): Ignored. Workers always run the client's _handle_update. Default is None.
+
+        Returns:
+        None
+        """
+        if self._tasks:
+            return
+        self._stopping = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._shards = [_Shard(index) for index in range(self.processes)]
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._supervise(shard)) for shard in self._shards]
+
+    def _spawn(self, shard):
+        parent_sock, child_sock = socket.socketpair()
+        client = self.client if self.factory is None else None
+        inherited = []
+        if self._context.get_start_method() == 'fork':
+            inherited = [parent_sock.fileno()]
+            inherited.extend(other.writer.get_extra_info('socket').fileno() for other in self._shards if other.writer is not None)
+        process = self._context.Process(
+            target=_run_shard,
+            args=(client, self.factory, child_sock, inherited, self.client.username, self.outbound, self.workers,
+                  self.chat_queue_size, 1 / self.processes),
+            name=f"XD-shard-{shard.index}",
+            daemon=True,
+        )
+        process.start()
+        child_sock.close()
+        shard.process = process
+        return parent_sock
+
+    async def _supervise(self, shard):
+        """
+        Run one worker process, and restart it whenever it exits until the dispatcher is stopped.
+        """
+        loop = asyncio.get_running_loop()
+        delay = self.restart_delay
+        while not self._stopping:
+            reader, writer = await asyncio.open_connection(sock=self._spawn(shard))
+            shard.writer = writer
+            reading = loop.create_task(self._read(shard, reader))
+            started = loop.time()
+            try:
+                if await self._redeliver(shard, writer, reading):
+                    shard.ready = True
+                    shard.wakeup.set()
+                await reading
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                reading.cancel()
+                shard.ready = False
+                shard.writer = None
+                writer.close()
+            await loop.run_in_executor(None, shard.process.join, 5)
+            if shard.process.is_alive():
+                shard.process.kill()
+                await loop.run_in_executor(None, shard.process.join)
+            if self._stopping:
+                return
+            if loop.time() - started > self.max_restart_delay:
+                delay = self.restart_delay
+            shard.restarts += 1
+            self.logger.error(f"Worker process {shard.index} exited with code {shard.process.exitcode}. "
+                              f"Restarting it in {delay} seconds with {len(shard.pending)} unfinished updates.")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_restart_delay)
+
+    async def _redeliver(self, shard, writer, reading):
+        """
+        Deliver the updates a dead worker had not finished to its new process, one at a time.
+
+        Only the update being handled when a worker dies counts as a failed attempt, so the updates that merely
+        shared the process with it are not dropped along with it.
+
+        Returns:
+        bool: True if every update was delivered and handled, False if the new process died as well.
+        """
+        for update_id, frame in list(shard.pending.items()):
+            attempts = shard.attempts[update_id] = shard.attempts.get(update_id, 0) + 1
+            if attempts > self.max_redeliveries:
+                self.logger.error(f"Dropping update {update_id}: its worker died {attempts} times while handling it.")
+                self._done(shard, update_id)
+                continue
+            writer.write(frame)
+            while update_id in shard.pending:
+                if reading.done():
+                    return False
+                shard.wakeup.clear()
+                wakeup = asyncio.ensure_future(shard.wakeup.wait())
+                await asyncio.wait((reading, wakeup), return_when=asyncio.FIRST_COMPLETED)
+                wakeup.cancel()
+        return True
+
+    async def _read(self, shard, reader):
+        loop = asyncio.get_running_loop()
+        while True:
+            kind, ident, payload = await _read_frame(reader)
+            if kind == DONE:
+                self._done(shard, ident)
+            elif kind == CALL:
+                task = loop.create_task(self._call(shard, ident, payload))
+                self._calls.add(task)
+                task.add_done_callback(self._calls.discard)
+
+    def _done(self, shard, update_id):
+        if shard.pending.pop(update_id, None) is None:
+            return
+        shard.attempts.pop(update_id, None)
+        if self.client.journal is not None:
+            self.client.journal.done(update_id)
+        self._pending -= 1
+        shard.wakeup.set()
+        if not self._pending:
+            self._idle.set()
+
+    async def _call(self, shard, ident, payload):
+        """
+        Send an API call funneled from a worker through the client's transport, and return the raw response.
+        """
+        timeout = _TIMEOUT.unpack_from(payload)[0] or None
+        newline = payload.index(b'\n', _TIMEOUT.size)
+        method = payload[_TIMEOUT.size:newline].decode()
+        try:
+            status, body = await self.client._request(method, payload[newline + 1:], timeout=timeout, decode=bytes)
+        except Exception as e:
+            status, body = 0, f"{type(e).__name__}: {e}".encode()
+        if shard.writer is not None and not shard.writer.is_closing():
+            shard.writer.write(_frame(RESULT, ident, _STATUS.pack(status) + body))
+
+    async def submit(self, update):
+        """
+        Send an update to the worker process that owns its key.
+
+        Returns once the update has been written to the worker. If the worker already has max_pending
+        unfinished updates, or is being restarted, this waits, which applies backpressure to the update source.
+
+        Parameters:
+        update (dict): The incoming update from the Telegram API.
+
+        Returns:
+        None
+        """
+        shard = self._shards[hash(self.key(update)) % len(self._shards)]
+        while not shard.ready or len(shard.pending) >= self.max_pending:
+            shard.wakeup.clear()
+            await shard.wakeup.wait()
+        update_id = update['update_id']
+        frame = _frame(UPDATE, update_id, self.client.codec.dumps(update))
+        shard.pending[update_id] = frame
+        self._pending += 1
+        self._idle.clear()
+        shard.writer.write(frame)
+        if shard.writer.transport.get_write_buffer_size() > _WRITE_BUFFER_LIMIT:
+            await shard.writer.drain()
+
+    async def join(self):
+        """
+        Wait until every submitted update has been handled.
+
+        Returns:
+        None
+        """
+        if self._idle is not None:
+            await self._idle.wait()
+
+    def stats(self):
+        """
+        Return the state of every worker process.
+
+        Returns:
+        list: A dict per worker with its pid, whether it is alive, its unfinished updates and how often it was restarted.
+        """
+        return [{
+            'pid': shard.process.pid if shard.process is not None else None,
+            'alive': shard.process is not None and shard.process.is_alive(),
+            'pending': len(shard.pending),
+            'restarts': shard.restarts,
+        } for shard in self._shards]
+
+    async def stop(self, drain=True):
+        """
+        Stop the worker processes.
+
+        Parameters:
+        drain (bool, optional): Whether to wait until the already submitted updates are handled. Default is True.
+
+        Returns:
+        None
+        """
+        if not self._tasks:
+            return
+        if drain:
+            await self.join()
+        self._stopping = True
+        for shard in self._shards:
+            if shard.writer is not None:
+                shard.writer.close()
+        done, waiting = await asyncio.wait(self._tasks, timeout=10)
+        for task in itertools.chain(waiting, self._calls):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._calls, return_exceptions=True)
+        for shard in self._shards:
+            if shard.process is not None and shard.process.is_alive():
+                shard.process.kill()
+        self._tasks = []
+        self._pending = 0
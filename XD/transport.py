@@ -0,0 +1,147 @@
+import io
+import aiohttp
+from aiohttp.payload import Payload
+from .codec import get_codec
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+class HTTPTransport:
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=30, timeout=60, connect_timeout=10, dns_cache_ttl=300, codec=None, upload_timeout=600):
+        """
+        Initialize a new instance of the HTTPTransport class.
+
+        The transport owns a single aiohttp ClientSession that is shared by every request made
+        through it, so TCP/TLS connections are kept alive and reused instead of being opened per call.
+        The session is created lazily on the first request, because aiohttp needs a running event loop.
+
+        Parameters:
+        limit (int, optional): The maximum number of simultaneous connections in the pool. Default is 100.
+        limit_per_host (int, optional): The maximum number of simultaneous connections to a single host. 0 means no limit. Default is 0.
+        keepalive_timeout (float, optional): How long an idle connection is kept open for reuse, in seconds. Default is 30.
+        timeout (float, optional): The default total timeout of a request, in seconds. Default is 60.
+        connect_timeout (float, optional): The timeout for acquiring and establishing a connection, in seconds. Default is 10.
+        dns_cache_ttl (int, optional): How long resolved host names are cached, in seconds. Default is 300.
+        codec (JSONCodec, optional): The codec for request and response bodies. Default is the fastest available.
+        upload_timeout (float, optional): The total timeout of a request that uploads files, in seconds. Uploads also
+            fail if the connection stalls for longer than timeout. Default is 600.
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.upload_timeout = upload_timeout
+        self.codec = codec if codec is not None else get_codec()
+        self._session = None
+
+    def _get_session(self):
+        """
+        Return the shared ClientSession, creating it and its connection pool if needed.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout),
+            )
+        return self._session
+
+    def _form_value(self, value):
+        """
+        Convert a request parameter into a value accepted by a multipart form.
+        """
+        if isinstance(value, (str, bytes, io.IOBase, Payload)):
+            return value
+        if isinstance(value, (dict, list)):
+            return self.codec.dumps(value).decode()
+        return str(value)
+
+    def _build_body(self, data, files):
+        """
+        Build the request body for the given parameters and files.
+
+        Without files, the parameters are encoded straight into a JSON body; a filtered copy is only made
+        if some of them are None. Parameters that are already JSON-encoded bytes are sent as they are. When files are present, a multipart form is built and every parameter
+        is added as a separate field.
+        """
+        if not files:
+            if not data:
+                return None
+            if isinstance(data, bytes):
+                return data
+            if None in data.values():
+                data = {key: value for key, value in data.items() if value is not None}
+            return self.codec.dumps(data)
+        form = aiohttp.FormData()
+        if data:
+            for key, value in data.items():
+                if value is not None:
+                    form.add_field(key, self._form_value(value))
+        for key, value in files.items():
+            if isinstance(value, Payload):
+                form.add_field(key, value, filename=value.filename)
+            else:
+                form.add_field(key, self._form_value(value))
+        return form
+
+    async def request(self, url, data=None, files=None, timeout=None, decode=None):
+        """
+        Send a POST request through the shared connection pool.
+
+        Parameters:
+        url (str): The full URL of the API method.
+        data (dict or bytes, optional): The parameters to send in the request body, or the already encoded JSON body. Default is None.
+        files (dict, optional): The files to send in the request. Default is None.
+        timeout (float, optional): The total timeout of this request, in seconds. Default is the transport timeout,
+            except for uploads, which get upload_timeout and also fail if the connection stalls for timeout.
+        decode (callable, optional): Decodes the response body. Default is the codec's loads.
+
+        Returns:
+        tuple: The HTTP status code and the response body, decoded from JSON when possible.
+
+        Raises:
+        aiohttp.ClientError: If the request could not be completed.
+        asyncio.TimeoutError: If the request timed out.
+        """
+        session = self._get_session()
+        kwargs = {}
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout, connect=self.connect_timeout)
+        elif files:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=self.upload_timeout, connect=self.connect_timeout, sock_read=self.timeout)
+        if not files:
+            kwargs['headers'] = _JSON_HEADERS
+        async with session.post(url, data=self._build_body(data, files), **kwargs) as response:
+            body = await response.read()
+            try:
+                payload = (decode or self.codec.loads)(body)
+            except Exception:
+                payload = body.decode('utf-8', 'replace')
+            return response.status, payload
+
+    def after_fork(self):
+        """
+        Forget a session inherited from the parent process, so a forked child opens its own connections.
+
+        The inherited session is not closed, because its sockets still belong to the parent.
+
+        Returns:
+        None
+        """
+        self._session = None
+
+    async def close(self):
+        """
+        Close the shared session and every pooled connection.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,105 @@
+import asyncio
+import io
+import os
+from inspect import isawaitable
+from aiohttp.payload import Payload
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class InputFile(Payload):
+    def __init__(self, file, filename=None, progress=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        A file to upload, streamed from disk in chunks.
+
+        The file is read in chunk_size pieces on the default executor and written to the connection
+        one piece at a time, so memory use stays constant whatever the file size and the event loop
+        is never blocked by disk reads. There is no mmap or sendfile path: aiohttp writes request bodies
+        through its own buffered writer, inside a multipart body and possibly TLS, so the kernel cannot
+        send the file directly, and page faults on a mapped file would block the event loop.
+
+        Parameters:
+        file (str, bytes or file-like object): A path to a local file, the file content, or a binary file object.
+        filename (str, optional): The file name sent to Telegram. Default is the base name of the path or file object.
+        progress (callable, optional): Called as progress(sent, total) after every chunk. May be a coroutine function.
+            total is None if the size is unknown. Default is None.
+        chunk_size (int, optional): The number of bytes read and sent at a time. Default is 256 KiB.
+        """
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            file = io.BytesIO(file)
+        if filename is None:
+            name = file if isinstance(file, str) else getattr(file, 'name', None)
+            filename = os.path.basename(name) if isinstance(name, str) else 'file'
+        super().__init__(file, filename=filename)
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self._start = None if isinstance(file, str) else self._tell(file)
+        self._size = self._measure()
+
+    @staticmethod
+    def _tell(file):
+        try:
+            return file.tell()
+        except (OSError, AttributeError):
+            return None
+
+    def _measure(self):
+        """
+        Return the number of bytes that will be uploaded, or None if it cannot be known up front.
+        """
+        file = self._value
+        try:
+            if isinstance(file, str):
+                return os.path.getsize(file)
+            if self._start is None:
+                return None
+            try:
+                return os.fstat(file.fileno()).st_size - self._start
+            except (OSError, AttributeError, io.UnsupportedOperation):
+                end = file.seek(0, io.SEEK_END)
+                file.seek(self._start)
+                return end - self._start
+        except (OSError, AttributeError, ValueError):
+            return None
+
+    def _open(self):
+        """
+        Return the file object to read from and whether it was opened here.
+        """
+        if isinstance(self._value, str):
+            return open(self._value, 'rb'), True
+        if self._start is not None:
+            self._value.seek(self._start)
+        return self._value, False
+
+    async def write(self, writer):
+        """
+        Stream the file to the connection chunk by chunk.
+        """
+        loop = asyncio.get_running_loop()
+        file, opened = await loop.run_in_executor(None, self._open)
+        try:
+            sent = 0
+            while True:
+                chunk = await loop.run_in_executor(None, file.read, self.chunk_size)
+                if not chunk:
+                    break
+                await writer.write(chunk)
+                sent += len(chunk)
+                if self.progress is not None:
+                    result = self.progress(sent, self._size)
+                    if isawaitable(result):
+                        await result
+        finally:
+            if opened:
+                await loop.run_in_executor(None, file.close)
+
+    def decode(self, encoding='utf-8', errors='strict'):
+        raise TypeError("An InputFile cannot be decoded to text.")
+
+
+def is_local_file(value):
+    """
+    Return True if the value is a path to an existing local file rather than a file_id or URL.
+    """
+    return isinstance(value, str) and '://' not in value and os.path.isfile(value)
@@ -0,0 +1,184 @@
+import asyncio
+import contextvars
+import hmac
+import logging
+from collections import OrderedDict
+from aiohttp import web
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+_reply_slot = contextvars.ContextVar('webhook_reply_slot', default=None)
+
+
+class _ReplySlot:
+    __slots__ = ('future',)
+
+    def __init__(self, future):
+        self.future = future
+
+    def claim(self, method, data):
+        """
+        Use this slot to answer the webhook request with a method call.
+
+        Returns:
+        bool: True if the slot was still open and now carries the call, False otherwise.
+        """
+        if self.future.done():
+            return False
+        body = {'method': method}
+        body.update((key, value) for key, value in data.items() if value is not None)
+        self.future.set_result(body)
+        return True
+
+    def close(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+def claim_reply(method, data):
+    """
+    Try to send a method call as the response to the webhook request being handled.
+
+    Parameters:
+    method (str): The Telegram API method to call.
+    data (dict): The parameters of the call.
+
+    Returns:
+    bool: True if the call will be delivered in the webhook response, False if it must be sent separately.
+    """
+    slot = _reply_slot.get()
+    if slot is None:
+        return False
+    return slot.claim(method, data)
+
+
+class WebhookServer:
+    def __init__(self, client, path='/webhook', secret_token=None, reply_in_response=True, reply_timeout=1.0, dedup_size=10000):
+        """
+        Initialize a new instance of the WebhookServer class.
+
+        The server receives update POSTs from Telegram and passes them to the client's dispatcher,
+        which runs them through the same _handle_update pipeline used for polling.
+
+        Parameters:
+        client (Client): The client whose handlers process the received updates.
+        path (str, optional): The URL path updates are posted to. Default is '/webhook'.
+        secret_token (str, optional): The secret token given to setWebhook. When set, requests without a
+            matching X-Telegram-Bot-Api-Secret-Token header are rejected. Default is None.
+        reply_in_response (bool, optional): Whether the first API call a handler makes may be returned in the
+            webhook response body instead of being sent as a separate request. Default is True.
+        reply_timeout (float, optional): How long to wait for a handler's first API call before answering the
+            webhook with an empty response, in seconds. Default is 1.0.
+        dedup_size (int, optional): How many recent update_ids are remembered to drop retried deliveries. Default is 10000.
+        """
+        self.client = client
+        self.path = path
+        self.secret_token = secret_token
+        self.reply_in_response = reply_in_response
+        self.reply_timeout = reply_timeout
+        self.dedup_size = dedup_size
+        self.logger = logging.getLogger(__name__)
+        self._seen = OrderedDict()
+        self._slots = {}
+        self._runner = None
+        self.app = web.Application()
+        self.app.router.add_post(path, self._handle_request)
+
+    def _is_duplicate(self, update_id):
+        """
+        Remember an update_id and report whether it was already received.
+        """
+        if update_id in self._seen:
+            return True
+        self._seen[update_id] = None
+        if len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+        return False
+
+    async def _handle_request(self, request):
+        """
+        Receive one update POST from Telegram.
+        """
+        if self.secret_token is not None:
+            received = request.headers.get(SECRET_TOKEN_HEADER, '')
+            if not hmac.compare_digest(received.encode(), self.secret_token.encode()):
+                return web.Response(status=403)
+        try:
+            body = await request.read()
+            update = self.client.codec.decode_update(body)
+            update_id = update['update_id']
+        except Exception:
+            return web.Response(status=400)
+        if self._is_duplicate(update_id):
+            return web.Response()
+        if self.client.journal is not None:
+            await self.client.journal.append([update], [body])
+        if self.client._answer_waiter(update):
+            return web.Response()
+
+        if not self.reply_in_response:
+            await self.client.dispatcher.submit(update)
+            return web.Response()
+
+        slot = _ReplySlot(asyncio.get_running_loop().create_future())
+        self._slots[update_id] = slot
+        await self.client.dispatcher.submit(update)
+        try:
+            body = await asyncio.wait_for(asyncio.shield(slot.future), self.reply_timeout)
+        except asyncio.TimeoutError:
+            body = None
+        finally:
+            slot.close()
+            self._slots.pop(update_id, None)
+        if body is None:
+            return web.Response()
+        return web.json_response(body)
+
+    async def handle_update(self, update):
+        """
+        Handle an update on a dispatcher worker, with its webhook reply slot in context.
+
+        Parameters:
+        update (dict): The incoming update from the Telegram API.
+
+        Returns:
+        None
+        """
+        slot = self._slots.get(update.get('update_id'))
+        if slot is None:
+            return await self.client._handle_update(update)
+        token = _reply_slot.set(slot)
+        try:
+            await self.client._handle_update(update)
+        finally:
+            _reply_slot.reset(token)
+            slot.close()
+
+    async def start(self, host='0.0.0.0', port=8443, ssl_context=None):
+        """
+        Start listening for webhook requests.
+
+        Parameters:
+        host (str, optional): The interface to bind to. Default is '0.0.0.0'.
+        port (int, optional): The port to bind to. Default is 8443.
+        ssl_context (ssl.SSLContext, optional): The TLS context, if TLS is not terminated by a proxy. Default is None.
+
+        Returns:
+        int: The port the server is listening on.
+        """
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port, ssl_context=ssl_context)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """
+        Stop the server.
+
+        Returns:
+        None
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
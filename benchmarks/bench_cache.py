@@ -0,0 +1,72 @@
+"""
+Read-through caching of idempotent methods, against the local fake Bot API with a small artificial latency:
+a burst of identical concurrent get_chat calls, and a stream of get_chat_member lookups over a working set of
+chats and users, as handlers that check a sender's status would make. Compares a Client with a ResponseCache
+and one without.
+
+Run with: python benchmarks/bench_cache.py
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import Client, ResponseCache
+from fake_api import FakeBotAPI, TOKEN
+
+
+async def _measure(cache, burst, lookups, chats, users, concurrency, latency):
+    api = await FakeBotAPI(latency=latency).start()
+    client = Client(TOKEN, api.url, rate_limiter=False, cache=ResponseCache() if cache else None)
+    try:
+        calls = api.calls
+        started = time.perf_counter()
+        await asyncio.gather(*(client.get_chat(-1001) for _ in range(burst)))
+        burst_elapsed = time.perf_counter() - started
+        burst_requests = api.calls - calls
+
+        rng = random.Random(0)
+        keys = [(-rng.randrange(chats), rng.randrange(users)) for _ in range(lookups)]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def lookup(chat_id, user_id):
+            async with semaphore:
+                await client.get_chat_member(chat_id, user_id)
+
+        calls = api.calls
+        started = time.perf_counter()
+        await asyncio.gather(*(lookup(chat_id, user_id) for chat_id, user_id in keys))
+        elapsed = time.perf_counter() - started
+        return {
+            'burst_requests': burst_requests,
+            'burst_ms': round(burst_elapsed * 1e3, 2),
+            'lookup_requests': api.calls - calls,
+            'lookups_per_second': round(lookups / elapsed),
+        }
+    finally:
+        await client.close()
+        await api.stop()
+
+
+def run(burst=1000, lookups=20000, chats=50, users=20, concurrency=100, latency=0.005):
+    logging.getLogger('XD').setLevel(logging.WARNING)
+    return {
+        'benchmark': 'cache',
+        'burst': burst,
+        'lookups': lookups,
+        'working_set': chats * users,
+        'latency_ms': latency * 1e3,
+        'results': {
+            'cached': asyncio.run(_measure(True, burst, lookups, chats, users, concurrency, latency)),
+            'uncached': asyncio.run(_measure(False, burst, lookups, chats, users, concurrency, latency)),
+        },
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
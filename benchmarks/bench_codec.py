@@ -0,0 +1,120 @@
+"""
+Decode throughput of getUpdates responses for every available JSON codec.
+
+By default a deterministic corpus of realistic updates is generated. Pass the path of a recorded
+corpus (one update per line, as JSON) to measure real traffic instead:
+
+    python benchmarks/bench_codec.py [updates.jsonl]
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import TelegramMessage
+from XD.codec import get_codec, msgspec, orjson
+
+BATCH_SIZE = 100
+
+
+def synthetic_corpus(count=5000, seed=7):
+    rng = random.Random(seed)
+    updates = []
+    for update_id in range(1, count + 1):
+        user = {
+            'id': rng.randrange(10 ** 8, 10 ** 9),
+            'is_bot': False,
+            'first_name': rng.choice(['Ada', 'Linus', 'Grace', 'Alan']),
+            'username': f"user{rng.randrange(10 ** 6)}",
+            'language_code': rng.choice(['en', 'de', 'ru', 'fa']),
+        }
+        if rng.random() < 0.6:
+            chat = {'id': user['id'], 'type': 'private', 'first_name': user['first_name'], 'username': user['username']}
+        else:
+            chat = {'id': -100 * 10 ** 10 - rng.randrange(10 ** 6), 'type': 'supergroup', 'title': 'Group chat'}
+        message = {'message_id': rng.randrange(10 ** 6), 'from': user, 'chat': chat, 'date': 1700000000 + update_id}
+        kind = rng.random()
+        if kind < 0.7:
+            text = rng.choice(['/start', '/help', 'hello there', 'how are you doing today?', '/price btc'])
+            message['text'] = text
+            if text.startswith('/'):
+                message['entities'] = [{'offset': 0, 'length': len(text.split()[0]), 'type': 'bot_command'}]
+        elif kind < 0.9:
+            message['photo'] = [
+                {'file_id': f"AgAC{rng.randrange(10 ** 12)}", 'file_unique_id': 'AQAD', 'file_size': size, 'width': w, 'height': w}
+                for size, w in ((1500, 90), (22000, 320), (90000, 800), (210000, 1280))
+            ]
+            message['caption'] = 'look at this'
+        else:
+            message['reply_to_message'] = {'message_id': 1, 'chat': chat, 'date': 1700000000, 'text': 'earlier message ' * 5}
+            message['text'] = 'a reply'
+        updates.append({'update_id': update_id, 'message': message})
+    return updates
+
+
+def load_corpus(path):
+    with open(path, 'rb') as corpus:
+        return [json.loads(line) for line in corpus if line.strip()]
+
+
+def _batches(updates):
+    return [
+        json.dumps({'ok': True, 'result': updates[i:i + BATCH_SIZE]}).encode()
+        for i in range(0, len(updates), BATCH_SIZE)
+    ]
+
+
+def _measure(decode, batches, count, handle=False):
+    best = None
+    for _ in range(5):
+        started = time.perf_counter()
+        for batch in batches:
+            for update in decode(batch)['result']:
+                if handle:
+                    message = TelegramMessage(update['message'], None)
+                    message.text, message.chat.id
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(count / best)
+
+
+def _retained(decode, batches, count):
+    tracemalloc.start()
+    kept = [decode(batch) for batch in batches]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return round(size / count)
+
+
+def run(path=None):
+    updates = load_corpus(path) if path else synthetic_corpus()
+    batches = _batches(updates)
+    codecs = [('json', get_codec('json'))]
+    if orjson is not None:
+        codecs.append(('orjson', get_codec('orjson')))
+    if msgspec is not None:
+        codecs.append(('msgspec', get_codec('msgspec')))
+        codecs.append(('msgspec-typed', get_codec('msgspec', typed_updates=True)))
+    results = {}
+    for name, codec in codecs:
+        results[name] = {
+            'decode_updates_per_second': _measure(codec.decode_updates, batches, len(updates)),
+            'decode_and_read_updates_per_second': _measure(codec.decode_updates, batches, len(updates), handle=True),
+            'retained_bytes_per_update': _retained(codec.decode_updates, batches, len(updates)),
+        }
+    return {
+        'benchmark': 'codec',
+        'corpus': path or 'synthetic',
+        'updates': len(updates),
+        'bytes': sum(map(len, batches)),
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(sys.argv[1] if len(sys.argv) > 1 else None), indent=2))
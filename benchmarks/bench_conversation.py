@@ -0,0 +1,98 @@
+"""
+Open conversations at scale: register many waiters with a timeout, answer half of them through feed()
+and let the rest time out. Compares Conversations, whose timeouts share one TimerWheel, with the
+straightforward alternative of one asyncio.wait_for task per waiter.
+
+Run with: python benchmarks/bench_conversation.py
+"""
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD.conversation import Conversations
+from XD.exceptions import ConversationTimeOut
+
+
+def _update(chat_id):
+    return {'update_id': chat_id, 'message': {'message_id': 1, 'date': 0, 'text': 'answer',
+                                             'chat': {'id': chat_id, 'type': 'private'}, 'from': {'id': chat_id}}}
+
+
+async def _wheel(count, timeout):
+    conversations = Conversations(lambda message: message, tick=0.05)
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    futures = [conversations.register(chat_id, chat_id, None, timeout) for chat_id in range(count)]
+    registered = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    updates = [_update(chat_id) for chat_id in range(0, count, 2)]
+    started = time.perf_counter()
+    for update in updates:
+        conversations.feed(update)
+    fed = time.perf_counter() - started
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    timed_out = sum(isinstance(result, ConversationTimeOut) for result in results)
+    return {
+        'register_us': round(registered / count * 1e6, 3),
+        'feed_us': round(fed / len(updates) * 1e6, 3),
+        'bytes_per_waiter': round(memory / count),
+        'timed_out': timed_out,
+        'left_open': len(conversations),
+    }
+
+
+async def _tasks(count, timeout):
+    loop = asyncio.get_running_loop()
+    waiters = {}
+
+    async def wait(chat_id):
+        future = waiters[chat_id] = loop.create_future()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            del waiters[chat_id]
+
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    tasks = [loop.create_task(wait(chat_id)) for chat_id in range(count)]
+    await asyncio.sleep(0)
+    registered = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    started = time.perf_counter()
+    for chat_id in range(0, count, 2):
+        waiters[chat_id].set_result(chat_id)
+    fed = time.perf_counter() - started
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    timed_out = sum(isinstance(result, asyncio.TimeoutError) for result in results)
+    return {
+        'register_us': round(registered / count * 1e6, 3),
+        'feed_us': round(fed / (count // 2) * 1e6, 3),
+        'bytes_per_waiter': round(memory / count),
+        'timed_out': timed_out,
+        'left_open': len(waiters),
+    }
+
+
+def run(count=100000, timeout=1.0):
+    return {
+        'benchmark': 'conversation',
+        'waiters': count,
+        'results': {
+            'timer_wheel': asyncio.run(_wheel(count, timeout)),
+            'task_per_waiter': asyncio.run(_tasks(count, timeout)),
+        },
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,63 @@
+"""
+Throughput of MTProto encryption across many sessions: inline on the event loop against the
+CryptoExecutor thread pool with a growing number of workers.
+
+    python benchmarks/bench_crypto_executor.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD.crpyto.executor import CryptoExecutor
+from XD.crpyto.mtproto import CryptoContext, tgcrypto
+
+SESSIONS = 64
+SIZES = (1024, 256 * 1024)
+
+
+async def _measure(executor, jobs, size, rounds=3):
+    await executor.map(jobs)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await executor.map(jobs)
+    elapsed = time.perf_counter() - started
+    count = rounds * len(jobs)
+    return {
+        'messages_per_second': round(count / elapsed),
+        'megabytes_per_second': round(count * size / elapsed / 1e6, 2),
+    }
+
+
+async def _run(sessions, sizes):
+    contexts = [CryptoContext(os.urandom(256), os.urandom(8)) for _ in range(sessions)]
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    results = {}
+    for size in sizes:
+        message = os.urandom(size)
+        jobs = [('encrypt', context, message, 1) for context in contexts]
+        inline = CryptoExecutor(workers=1, inline_threshold=float('inf'))
+        results[size] = {'inline': await _measure(inline, jobs, size)}
+        inline.close()
+        for workers in worker_counts:
+            executor = CryptoExecutor(workers=workers, inline_threshold=0)
+            results[size][f"threads_{workers}"] = await _measure(executor, jobs, size)
+            executor.close()
+    return results
+
+
+def run(sessions=SESSIONS, sizes=SIZES):
+    return {
+        'benchmark': 'crypto_executor',
+        'aes_ige': 'tgcrypto' if tgcrypto is not None else 'cryptography-ecb',
+        'cpus': os.cpu_count(),
+        'sessions': sessions,
+        'results': asyncio.run(_run(sessions, sizes)),
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,107 @@
+"""
+Cost of routing one update through Client._handle_update: TelegramMessage construction, the router
+lookup and the handler call, for a mix of commands, prefixes, regex matches and unmatched text.
+Also measures the same updates submitted through the dispatcher's worker pool.
+
+Run with: python benchmarks/bench_dispatch.py
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import Client
+from XD import filters
+from fake_api import TOKEN
+
+TEXTS = ['/start', '/help@bench_bot', '/cmd7 argument', '!ping', 'order 12345', 'just chatting with friends']
+
+
+def _client(commands=20):
+    client = Client(TOKEN, rate_limiter=False)
+    client.logger.setLevel(logging.WARNING)
+    handled = [0]
+
+    async def handler(message):
+        handled[0] += 1
+
+    client.on_message(command=['/start', '/help'])(handler)
+    for i in range(commands):
+        client.on_message(command=f'/cmd{i}')(handler)
+    client.on_message(prefix='!')(handler)
+    client.on_message(regex=r'order (\d+)', filters=filters.group)(handler)
+    client.on_message(filters=filters.text & filters.private)(handler)
+    client.router.compile('bench_bot')
+    return client, handled
+
+
+def _updates(count):
+    updates = []
+    for update_id in range(count):
+        private = update_id % 3 == 0
+        chat = {'id': 1000 + update_id % 50, 'type': 'private'} if private else {'id': -100500, 'type': 'supergroup', 'title': 'g'}
+        updates.append({
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': 1700000000,
+                'chat': chat,
+                'from': {'id': 1000 + update_id % 50, 'is_bot': False, 'first_name': 'U'},
+                'text': TEXTS[update_id % len(TEXTS)],
+            },
+        })
+    return updates
+
+
+async def _direct(client, updates):
+    started = time.perf_counter()
+    for update in updates:
+        await client._handle_update(update)
+    return time.perf_counter() - started
+
+
+async def _dispatcher(client, updates):
+    client.dispatcher.start(client._handle_update)
+    started = time.perf_counter()
+    for update in updates:
+        await client.dispatcher.submit(update)
+    await client.dispatcher.join()
+    elapsed = time.perf_counter() - started
+    await client.dispatcher.stop()
+    return elapsed
+
+
+async def _run(count):
+    client, handled = _client()
+    updates = _updates(count)
+    await _direct(client, updates[:1000])
+    handled[0] = 0
+    direct = await _direct(client, updates)
+    matched = handled[0]
+    pooled = await _dispatcher(client, updates)
+    await client.close()
+    return {
+        'benchmark': 'dispatch',
+        'updates': count,
+        'matched_share': round(matched / count, 3),
+        'handle_update': {
+            'updates_per_second': round(count / direct),
+            'us_per_update': round(direct / count * 1e6, 3),
+        },
+        'dispatcher': {
+            'updates_per_second': round(count / pooled),
+            'us_per_update': round(pooled / count * 1e6, 3),
+        },
+    }
+
+
+def run(count=100000):
+    return asyncio.run(_run(count))
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,93 @@
+"""
+Per-message cost of the chat and sender objects in a busy group workload: a stream of decoded messages
+spread over a working set of chats and users, each wrapped in a TelegramMessage whose .chat and .from_user
+are read, as filters and handlers do. A backlog of messages is kept alive, as queued updates are, to show
+the memory they retain. Compares interning through an EntityStore with building the objects per message.
+
+Run with: python benchmarks/bench_entities.py
+"""
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import TelegramMessage, EntityStore
+
+
+class _Bot:
+    __slots__ = ('entities',)
+
+    def __init__(self, entities):
+        self.entities = entities
+
+
+def _messages(count, chats, users):
+    rng = random.Random(0)
+    messages = []
+    for message_id in range(count):
+        chat_id = -1001000000000 - rng.randrange(chats)
+        user_id = 100000 + rng.randrange(users)
+        messages.append({
+            'message_id': message_id,
+            'date': 1700000000,
+            'chat': {'id': chat_id, 'type': 'supergroup', 'title': f"Group {chat_id}", 'username': f"group{-chat_id}"},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'User', 'last_name': str(user_id),
+                     'username': f"user{user_id}", 'language_code': 'en'},
+            'text': 'hello',
+        })
+    return messages
+
+
+def _measure(bot, messages, backlog):
+    for data in messages[:backlog]:
+        message = TelegramMessage(data, bot)
+        message.chat, message.from_user
+    gc.collect()
+    collections = sum(stats['collections'] for stats in gc.get_stats())
+    started = time.perf_counter()
+    for data in messages:
+        message = TelegramMessage(data, bot)
+        message.chat.id, message.from_user.id
+    elapsed = time.perf_counter() - started
+    collections = sum(stats['collections'] for stats in gc.get_stats()) - collections
+    gc.collect()
+    held_collections = sum(stats['collections'] for stats in gc.get_stats())
+    tracemalloc.start()
+    held = []
+    for data in messages[:backlog]:
+        message = TelegramMessage(data, bot)
+        message.chat, message.from_user
+        held.append(message)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    held_collections = sum(stats['collections'] for stats in gc.get_stats()) - held_collections
+    return {
+        'us_per_message': round(elapsed / len(messages) * 1e6, 3),
+        'gc_collections': collections,
+        'backlog_bytes_per_message': round(memory / backlog),
+        'backlog_gc_collections': held_collections,
+    }
+
+
+def run(count=200000, chats=200, users=5000, backlog=20000):
+    messages = _messages(count, chats, users)
+    store = EntityStore()
+    return {
+        'benchmark': 'entities',
+        'messages': count,
+        'chats': chats,
+        'users': users,
+        'results': {
+            'entity_store': dict(_measure(_Bot(store), messages, backlog), **store.stats()),
+            'per_message': _measure(None, messages, backlog),
+        },
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,102 @@
+"""
+Auth-key handshakes per second against the stand-in data center, which runs in its own process.
+Compares handshakes run one at a time, many at once with the CPU-heavy steps inline on the event loop,
+and many at once with those steps in a process pool, and reports the longest event loop stall of each.
+
+Run with: python benchmarks/bench_handshake.py
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD.crpyto.auth_key import factorize, gmpy2
+from XD.crpyto.connection import MTProtoConnection
+from fake_mtproto import FakeMTProtoServer, _random_prime
+
+
+def _serve(pipe):
+    async def main():
+        server = await FakeMTProtoServer(auth_key=None).start()
+        pipe.send((server.port, server.public_key))
+        await asyncio.get_running_loop().run_in_executor(None, pipe.recv)
+        await server.stop()
+    asyncio.run(main())
+
+
+async def _stall_monitor(stalls, interval=0.001):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - started - interval)
+
+
+async def _handshakes(port, public_key, count, concurrency, executor=None):
+    stalls = []
+    monitor = asyncio.create_task(_stall_monitor(stalls))
+    remaining = iter(range(count))
+
+    async def worker():
+        for _ in remaining:
+            connection = MTProtoConnection('127.0.0.1', port, public_keys=[public_key], handshake_executor=executor)
+            await connection.connect()
+            await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    monitor.cancel()
+    return {
+        'handshakes_per_second': round(count / elapsed, 2),
+        'max_loop_stall_ms': round(max(stalls, default=0) * 1000, 2),
+    }
+
+
+def _factorize_ms(samples=50):
+    numbers = [_random_prime() * _random_prime() for _ in range(samples)]
+    started = time.perf_counter()
+    for pq in numbers:
+        factorize(pq)
+    return round((time.perf_counter() - started) / samples * 1000, 2)
+
+
+async def _run(port, public_key, count, concurrency, workers):
+    await _handshakes(port, public_key, 1, 1)
+    results = {
+        'sequential': await _handshakes(port, public_key, count, 1),
+        'concurrent_inline': await _handshakes(port, public_key, count, concurrency),
+    }
+    with ProcessPoolExecutor(workers) as pool:
+        await _handshakes(port, public_key, workers, workers, pool)
+        results['concurrent_process_pool'] = await _handshakes(port, public_key, count, concurrency, pool)
+    return results
+
+
+def run(count=40, concurrency=16, workers=None):
+    workers = workers or os.cpu_count() or 1
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, args=(child,), daemon=True)
+    server.start()
+    try:
+        port, public_key = parent.recv()
+        results = asyncio.run(_run(port, public_key, count, concurrency, workers))
+    finally:
+        parent.send(None)
+        server.join(10)
+    return {
+        'benchmark': 'handshake',
+        'modular_arithmetic': 'gmpy2' if gmpy2 is not None else 'builtin pow',
+        'cpus': os.cpu_count(),
+        'pool_workers': workers,
+        'factorize_pq_ms': _factorize_ms(),
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
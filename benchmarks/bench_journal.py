@@ -0,0 +1,96 @@
+"""
+UpdateJournal write throughput: batches of updates as getUpdates returns them, with and without fsync,
+and single-update appends from many concurrent webhook requests, which group commit folds into a few
+writes. Also the rate at which a journal is read back and replayed through a client's handlers.
+
+Run with: python benchmarks/bench_journal.py
+"""
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import Client
+from XD.journal import UpdateJournal, replay
+from fake_api import TOKEN
+
+
+def _update(update_id):
+    return {'update_id': update_id, 'message': {
+        'message_id': update_id, 'date': 1700000000, 'text': '/echo hello world',
+        'chat': {'id': update_id % 200, 'type': 'private'}, 'from': {'id': update_id % 200, 'is_bot': False, 'first_name': 'U'},
+    }}
+
+
+async def _batched(path, count, batch, fsync):
+    journal = UpdateJournal(path, fsync=fsync)
+    await journal.open()
+    updates = [_update(update_id) for update_id in range(1, count + 1)]
+    started = time.perf_counter()
+    for start in range(0, count, batch):
+        await journal.append(updates[start:start + batch])
+    elapsed = time.perf_counter() - started
+    await journal.close()
+    size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path) if name.endswith('.log'))
+    return {'updates_per_second': round(count / elapsed, 1), 'bytes_per_update': round(size / count, 1)}
+
+
+async def _concurrent(path, count, concurrency):
+    journal = UpdateJournal(path)
+    await journal.open()
+    writes = [0]
+    write = journal._write
+
+    def counted(data, first_id):
+        writes[0] += 1
+        write(data, first_id)
+
+    journal._write = counted
+    queue = iter(range(1, count + 1))
+
+    async def request():
+        for update_id in queue:
+            await journal.append([_update(update_id)])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await journal.close()
+    return {'updates_per_second': round(count / elapsed, 1), 'updates_per_fsync': round(count / writes[0], 1)}
+
+
+async def _replay(path):
+    client = Client(TOKEN, api_url='http://127.0.0.1:9', rate_limiter=False)
+    client.logger.setLevel(logging.WARNING)
+
+    @client.on_message(command='/echo')
+    async def echo(message):
+        pass
+
+    result = await replay(client, path)
+    await client.close()
+    return {'updates_per_second': result['updates_per_second']}
+
+
+def run(count=20000, batch=100, concurrency=64):
+    root = tempfile.mkdtemp(prefix='xd-journal-')
+    try:
+        results = {
+            'batched_fsync': asyncio.run(_batched(os.path.join(root, 'fsync'), count, batch, True)),
+            'batched_no_fsync': asyncio.run(_batched(os.path.join(root, 'nofsync'), count, batch, False)),
+            'concurrent_single_appends': asyncio.run(_concurrent(os.path.join(root, 'concurrent'), count // 4, concurrency)),
+            'replay': asyncio.run(_replay(os.path.join(root, 'fsync'))),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return {'benchmark': 'journal', 'updates': count, 'batch': batch, 'concurrency': concurrency, 'results': results}
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,136 @@
+"""
+Hosting many bots in one process with BotManager, against the local fake Bot API: the memory each hosted
+bot adds while it long-polls, the sockets they hold, and the reply throughput when updates are spread over
+every bot. Compared with one Client per bot, each with its own transport and polling loop.
+
+Run with: python benchmarks/bench_manager.py
+"""
+import asyncio
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import Client, BotManager
+from fake_api import FakeBotAPI
+
+
+def _token(index):
+    return f"{1000000000 + index}:" + 'A' * 35
+
+
+def _open_sockets():
+    if not os.path.isdir('/proc/self/fd'):
+        return None
+    count = 0
+    for fd in os.listdir('/proc/self/fd'):
+        try:
+            count += os.readlink(f'/proc/self/fd/{fd}').startswith('socket:')
+        except OSError:
+            pass
+    return count
+
+
+def _register(client, replied):
+    @client.on_message(command='/echo')
+    async def echo(message):
+        await message.reply_text(message.text)
+        replied[0] += 1
+
+
+async def _managed(api, bots, updates_per_bot):
+    replied = [0]
+    gc.collect()
+    sockets = _open_sockets()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    manager = BotManager(api_url=api.url)
+    for index in range(bots):
+        _register(manager.add(_token(index), rate_limiter=False), replied)
+    runner = asyncio.create_task(manager.start(timeout=5))
+    while api.calls < 2 * bots:
+        await asyncio.sleep(0.01)
+    gc.collect()
+    per_bot = (tracemalloc.get_traced_memory()[0] - before) / bots
+    tracemalloc.stop()
+    sockets = _open_sockets() - sockets if sockets is not None else None
+    started = time.perf_counter()
+    total = _push(api, bots, updates_per_bot)
+    while replied[0] < total:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    return {'bytes_per_bot': round(per_bot), 'sockets': sockets, 'updates_per_second': round(total / elapsed, 1)}
+
+
+async def _separate(api, bots, updates_per_bot):
+    replied = [0]
+    gc.collect()
+    sockets = _open_sockets()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    clients = []
+    for index in range(bots):
+        client = Client(_token(index), api_url=api.url, rate_limiter=False)
+        _register(client, replied)
+        client.router.compile(f"bench_bot_{1000000000 + index}")
+        client.dispatcher.start(client._handle_update)
+        clients.append(client)
+    pollers = [asyncio.create_task(client._poll_updates(100, 5, None)) for client in clients]
+    while api.calls < bots:
+        await asyncio.sleep(0.01)
+    gc.collect()
+    per_bot = (tracemalloc.get_traced_memory()[0] - before) / bots
+    tracemalloc.stop()
+    sockets = _open_sockets() - sockets if sockets is not None else None
+    started = time.perf_counter()
+    total = _push(api, bots, updates_per_bot)
+    while replied[0] < total:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    for poller in pollers:
+        poller.cancel()
+    await asyncio.gather(*pollers, return_exceptions=True)
+    for client in clients:
+        await client.dispatcher.stop(drain=False)
+        await client.close()
+    return {'bytes_per_bot': round(per_bot), 'sockets': sockets, 'updates_per_second': round(total / elapsed, 1)}
+
+
+def _push(api, bots, updates_per_bot):
+    for index in range(bots):
+        for number in range(updates_per_bot):
+            chat_id = 1 + number % 20
+            api.push_update({'message': {
+                'message_id': number, 'date': int(time.time()), 'text': '/echo hi',
+                'chat': {'id': chat_id, 'type': 'private'}, 'from': {'id': chat_id, 'is_bot': False, 'first_name': 'U'},
+            }}, token=_token(index))
+    return bots * updates_per_bot
+
+
+async def _run(mode, bots, updates_per_bot):
+    api = await FakeBotAPI().start()
+    try:
+        if mode == 'manager':
+            return await _managed(api, bots, updates_per_bot)
+        return await _separate(api, bots, updates_per_bot)
+    finally:
+        await api.stop()
+
+
+def run(bots=200, updates_per_bot=10):
+    logging.getLogger('XD').setLevel(logging.WARNING)
+    results = {}
+    for mode in ('separate_clients', 'manager'):
+        results[mode] = asyncio.run(_run(mode, bots, updates_per_bot))
+    return {'benchmark': 'manager', 'bots': bots, 'updates_per_bot': updates_per_bot, 'results': results}
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,47 @@
+"""
+Cost of building reply markup: parse_buttons on a keyboard, then serializing the markup to JSON with
+every available codec, as done for each send call that carries buttons.
+
+Run with: python benchmarks/bench_markup.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD.codec import get_codec, msgspec, orjson
+from XD.methods.parse import parse_buttons
+
+
+def _keyboard(rows=3, columns=3):
+    return [
+        [{'_': 'inline_keyboard', 'text': f"Option {row}.{column}", 'callback_data': f"pick:{row}:{column}"} for column in range(columns)]
+        for row in range(rows)
+    ]
+
+
+def _measure(func, iterations):
+    func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started
+    return {'ops_per_second': round(iterations / elapsed), 'us_per_op': round(elapsed / iterations * 1e6, 3)}
+
+
+def run(iterations=100000):
+    buttons = _keyboard()
+    markup = parse_buttons(buttons)
+    codecs = ['json'] + (['orjson'] if orjson is not None else []) + (['msgspec'] if msgspec is not None else [])
+    results = {'parse_buttons': _measure(lambda: parse_buttons(buttons), iterations)}
+    for name in codecs:
+        dumps = get_codec(name).dumps
+        results[f"dumps_{name}"] = _measure(lambda: dumps(markup), iterations)
+        results[f"parse_and_dumps_{name}"] = _measure(lambda: dumps(parse_buttons(buttons)), iterations)
+    return {'benchmark': 'markup', 'keyboard': '3x3 inline', 'markup_bytes': len(get_codec('json').dumps(markup)), 'results': results}
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,88 @@
+"""
+Per-message CPU and allocation cost of TelegramMessage.
+
+Measures the common handler access pattern (.text and .chat.id) and a fully materialized
+message (.message), and reports the share of one core each would use at 10k updates/s.
+
+Run with: python benchmarks/bench_message.py
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import TelegramMessage
+
+RATE = 10000
+
+SAMPLE_MESSAGE = {
+    'message_id': 4242,
+    'date': 1700000000,
+    'chat': {
+        'id': -1001234567890,
+        'type': 'supergroup',
+        'title': 'Benchmark group',
+        'username': 'bench_group',
+        'permissions': {'can_send_messages': True, 'can_send_media_messages': True},
+    },
+    'from': {
+        'id': 987654321,
+        'is_bot': False,
+        'first_name': 'Ada',
+        'last_name': 'Lovelace',
+        'username': 'ada',
+        'language_code': 'en',
+        'is_premium': True,
+        'emoji_status': {'custom_emoji_id': '5368324170671202286'},
+        'photo': {'small_file_id': 'AQADAgAT', 'big_file_id': 'AQADAgAD'},
+    },
+    'text': '/start hello world',
+    'entities': [{'offset': 0, 'length': 6, 'type': 'bot_command'}],
+}
+
+
+def _text_and_chat(data):
+    message = TelegramMessage(data, None)
+    message.text, message.chat.id
+    return message
+
+
+def _materialized(data):
+    return TelegramMessage(data, None).message
+
+
+def _measure(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(SAMPLE_MESSAGE)
+    seconds_per_message = (time.perf_counter() - started) / iterations
+
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(1000):
+        kept.append(func(SAMPLE_MESSAGE))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return {
+        'us_per_message': round(seconds_per_message * 1e6, 3),
+        'bytes_retained_per_message': round(allocated / 1000, 1),
+        'core_share_at_10k_per_s': round(seconds_per_message * RATE, 4),
+    }
+
+
+def run(iterations=100000):
+    return {
+        'benchmark': 'message',
+        'updates_per_second': RATE,
+        'text_and_chat_id': _measure(_text_and_chat, iterations),
+        'fully_materialized': _measure(_materialized, iterations),
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
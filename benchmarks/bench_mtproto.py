@@ -0,0 +1,76 @@
+"""
+MTProto encryption throughput: the per-call encrypt_message/decrypt_message functions against a
+session-bound CryptoContext, returning new objects or filling buffers the caller reuses.
+
+    python benchmarks/bench_mtproto.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD.crpyto.mtproto import CryptoContext, decrypt_message, encrypt_message, tgcrypto
+
+SIZES = (128, 1024, 64 * 1024, 1024 * 1024)
+
+
+def _message(size):
+    body = os.urandom(size)
+    return os.urandom(8) + (0).to_bytes(4, 'little') + len(body).to_bytes(4, 'little') + body
+
+
+def _measure(step, size, budget=0.5):
+    step()
+    count = 0
+    started = time.perf_counter()
+    while True:
+        step()
+        count += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= budget:
+            break
+    return {
+        'messages_per_second': round(count / elapsed),
+        'megabytes_per_second': round(count * size / elapsed / 1e6, 2),
+    }
+
+
+def run(sizes=SIZES):
+    auth_key = os.urandom(256)
+    session_id = os.urandom(8)
+    client = CryptoContext(auth_key, session_id)
+    server = CryptoContext(auth_key, session_id, server=True)
+    auth_key_id = client.auth_key_id
+    results = {}
+    for size in sizes:
+        message = _message(size)
+        outgoing = bytes(client.encrypt(message, 1))
+        incoming = bytes(server.encrypt(message, 1))
+        encrypt_buffer = bytearray(client.encrypted_size(len(message)))
+        decrypt_buffer = bytearray(len(incoming) - 24)
+        results[size] = {
+            'functions': {
+                'encrypt': _measure(lambda: encrypt_message(message, 1, session_id, auth_key, auth_key_id), size),
+                'decrypt': _measure(lambda: decrypt_message(incoming, session_id, auth_key, auth_key_id), size),
+            },
+            'context': {
+                'encrypt': _measure(lambda: client.encrypt(message, 1), size),
+                'decrypt': _measure(lambda: client.decrypt(incoming), size),
+            },
+            'context_reused_buffers': {
+                'encrypt': _measure(lambda: client.encrypt(message, 1, encrypt_buffer), size),
+                'decrypt': _measure(lambda: client.decrypt(incoming, decrypt_buffer), size),
+            },
+        }
+        assert bytes(server.decrypt(outgoing)[:len(message)]) == message
+    return {
+        'benchmark': 'mtproto',
+        'aes_ige': 'tgcrypto' if tgcrypto is not None else 'cryptography-ecb',
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,66 @@
+"""
+A chatty MTProto workload, many small concurrent calls, with msg_container packing and delayed acks
+against one packet per call and per msgs_ack.
+Reports calls per second, and per call: client encryptions (packets sent), bytes on the wire,
+and packets the server had to decrypt.
+
+Run with: python benchmarks/bench_mtproto_containers.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD.crpyto.connection import MTProtoConnection
+from fake_mtproto import FakeMTProtoServer, AUTH_KEY
+
+QUERY = b'\x8a\x3e\x8f\x0c' + os.urandom(28)
+
+
+async def _workload(server, total, concurrency, **options):
+    connection = MTProtoConnection('127.0.0.1', server.port, AUTH_KEY, **options)
+    await connection.connect()
+    await connection.invoke(QUERY)
+    await asyncio.sleep(0.01)
+    before = connection.stats()
+    received = server.received
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            await connection.invoke(QUERY)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.01)
+    after = connection.stats()
+    await connection.close()
+    return {
+        'calls_per_second': round(total / elapsed, 1),
+        'client_encryptions_per_call': round((after['packets_sent'] - before['packets_sent']) / total, 3),
+        'wire_bytes_per_call': round((after['bytes_sent'] - before['bytes_sent']) / total, 1),
+        'server_decryptions_per_call': round((server.received - received) / total, 3),
+    }
+
+
+async def run(total=5000, concurrency_levels=(1, 16, 128), latency=0.002):
+    server = await FakeMTProtoServer(latency=latency).start()
+    results = []
+    try:
+        for concurrency in concurrency_levels:
+            results.append({
+                'concurrency': concurrency,
+                'single_messages': await _workload(server, total, concurrency, containers=False, ack_delay=0),
+                'containers': await _workload(server, total, concurrency, containers=True),
+            })
+    finally:
+        await server.stop()
+    return {'benchmark': 'mtproto_containers', 'calls': total, 'server_latency_s': latency, 'results': results}
+
+
+if __name__ == '__main__':
+    print(json.dumps(asyncio.run(run()), indent=2))
@@ -0,0 +1,74 @@
+"""
+End-to-end latency and throughput of RPCs multiplexed over one MTProto connection, against the same
+number of sendMessage calls through the pooled HTTP transport. Both stand-in servers answer after the
+same artificial latency.
+
+Run with: python benchmarks/bench_mtproto_transport.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD.crpyto.connection import MTProtoConnection
+from XD.transport import HTTPTransport
+from fake_api import FakeBotAPI, TOKEN
+from fake_mtproto import FakeMTProtoServer, AUTH_KEY
+
+QUERY = b'\x8a\x3e\x8f\x0c' + os.urandom(96)
+
+
+async def _drive(call, total, concurrency):
+    remaining = iter(range(total))
+    latencies = []
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'calls_per_second': round(total / elapsed, 1),
+        'latency_p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+        'latency_p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+    }
+
+
+async def run(total=2000, concurrency_levels=(1, 16, 64, 256), latency=0.005, framing='abridged'):
+    api = await FakeBotAPI(latency=latency).start()
+    server = await FakeMTProtoServer(latency=latency).start()
+    http = HTTPTransport(limit=max(concurrency_levels))
+    connection = MTProtoConnection('127.0.0.1', server.port, AUTH_KEY, framing=framing)
+    await connection.connect()
+    url = f"{api.url}/bot{TOKEN}/sendMessage"
+    params = {'chat_id': 1, 'text': 'hello'}
+    results = []
+    try:
+        await connection.invoke(QUERY)
+        await http.request(url, params)
+        for concurrency in concurrency_levels:
+            count = min(total, max(concurrency * 20, 200))
+            results.append({
+                'concurrency': concurrency,
+                'calls': count,
+                'mtproto': await _drive(lambda: connection.invoke(QUERY), count, concurrency),
+                'http': await _drive(lambda: http.request(url, params), count, concurrency),
+            })
+    finally:
+        await connection.close()
+        await http.close()
+        await server.stop()
+        await api.stop()
+    return {'benchmark': 'mtproto_transport', 'framing': framing, 'server_latency_s': latency, 'results': results}
+
+
+if __name__ == '__main__':
+    print(json.dumps(asyncio.run(run()), indent=2))
@@ -0,0 +1,66 @@
+"""
+Full poll -> handle -> reply throughput against the local fake Bot API: updates are queued on the
+fake server, long-polled by the client, routed to a handler, and answered with reply_text.
+The run ends when every update has been replied to. With metrics=True the client records
+XD.metrics, to measure what instrumentation costs.
+
+Run with: python benchmarks/bench_pipeline.py
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import Client, Metrics
+from XD.codec import get_codec
+from fake_api import FakeBotAPI, TOKEN
+
+
+async def _run(count, chats, latency, codec, metrics=False):
+    api = await FakeBotAPI(latency=latency).start()
+    client = Client(TOKEN, api_url=api.url, rate_limiter=False, codec=get_codec(codec),
+                    metrics=Metrics() if metrics else None)
+    client.logger.setLevel(logging.WARNING)
+    done = asyncio.Event()
+    replied = [0]
+
+    @client.on_message(command='/echo')
+    async def echo(message):
+        await message.reply_text(message.text)
+        replied[0] += 1
+        if replied[0] == count:
+            done.set()
+
+    for update_id in range(count):
+        chat_id = 1 + update_id % chats
+        api.push_update({'message': {
+            'message_id': update_id, 'date': int(time.time()), 'text': '/echo hi',
+            'chat': {'id': chat_id, 'type': 'private'}, 'from': {'id': chat_id, 'is_bot': False, 'first_name': 'U'},
+        }})
+    client.router.compile('bench_bot')
+    client.dispatcher.start(client._handle_update)
+    started = time.perf_counter()
+    poller = asyncio.create_task(client._poll_updates(100, 1, None))
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    poller.cancel()
+    await client.dispatcher.stop(drain=False)
+    await client.close()
+    await api.stop()
+    return {'updates_per_second': round(count / elapsed, 1), 'seconds': round(elapsed, 3)}
+
+
+def run(count=5000, chats=200, latency=0.0, codecs=('json', 'auto'), metrics=False):
+    results = {}
+    for codec in codecs:
+        name = get_codec(codec).name
+        results[name] = asyncio.run(_run(count, chats, latency, codec, metrics))
+    return {'benchmark': 'pipeline', 'updates': count, 'chats': chats, 'server_latency_s': latency, 'metrics': metrics, 'results': results}
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,70 @@
+"""
+Throughput of CPU-heavy handlers on the in-process Dispatcher versus a ShardedDispatcher with
+1..N worker processes, against the local fake Bot API. Every handler burns cpu_ms of CPU and then
+replies; the run ends when the fake API has received every reply. Scaling needs as many free cores as
+worker processes.
+
+Run with: python benchmarks/bench_sharding.py
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import Client, ShardedDispatcher
+from fake_api import FakeBotAPI, TOKEN
+
+
+def _burn(ms):
+    deadline = time.process_time() + ms / 1000
+    while time.process_time() < deadline:
+        pass
+
+
+async def _run(count, chats, cpu_ms, processes, outbound):
+    api = await FakeBotAPI().start()
+    client = Client(TOKEN, api_url=api.url, rate_limiter=False)
+    client.logger.setLevel(logging.WARNING)
+
+    @client.on_message(command='/work')
+    async def work(message):
+        _burn(cpu_ms)
+        await message.reply_text('done')
+
+    if processes:
+        client.dispatcher = ShardedDispatcher(client, processes, outbound=outbound)
+    for update_id in range(count):
+        chat_id = 1 + update_id % chats
+        api.push_update({'message': {
+            'message_id': update_id, 'date': int(time.time()), 'text': '/work',
+            'chat': {'id': chat_id, 'type': 'private'}, 'from': {'id': chat_id, 'is_bot': False, 'first_name': 'U'},
+        }})
+    client.router.compile('bench_bot')
+    client.dispatcher.start(client._handle_update)
+    started = time.perf_counter()
+    poller = asyncio.create_task(client._poll_updates(100, 1, None))
+    while api.sent < count:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    poller.cancel()
+    await client.dispatcher.stop(drain=False)
+    await client.close()
+    await api.stop()
+    return {'updates_per_second': round(count / elapsed, 1), 'seconds': round(elapsed, 3)}
+
+
+def run(count=400, chats=50, cpu_ms=5, process_counts=None, outbound='direct'):
+    if process_counts is None:
+        process_counts = sorted({1, 2, os.cpu_count() or 1})
+    results = {'in_process': asyncio.run(_run(count, chats, cpu_ms, 0, outbound))}
+    for processes in process_counts:
+        results[f"{processes}_processes"] = asyncio.run(_run(count, chats, cpu_ms, processes, outbound))
+    return {'benchmark': 'sharding', 'updates': count, 'cpu_ms': cpu_ms, 'outbound': outbound, 'cpus': os.cpu_count(), 'results': results}
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
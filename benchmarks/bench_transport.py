@@ -0,0 +1,55 @@
+"""
+Concurrent sendMessage throughput of Client over the pooled aiohttp transport.
+
+Run with: python benchmarks/bench_transport.py
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD import Client
+from XD.transport import HTTPTransport
+from fake_api import FakeBotAPI, TOKEN
+
+
+async def _send_many(client, total, concurrency):
+    remaining = iter(range(total))
+
+    async def worker():
+        for i in remaining:
+            await client.send_message(i, 'hello')
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+async def run(total=2000, concurrency_levels=(1, 10, 50, 100, 200), latency=0.02, pool_limit=200):
+    api = await FakeBotAPI(latency=latency).start()
+    client = Client(TOKEN, api_url=api.url, transport=HTTPTransport(limit=pool_limit), rate_limiter=False)
+    client.logger.setLevel(logging.WARNING)
+    results = []
+    try:
+        await client.send_message(0, 'warmup')
+        for concurrency in concurrency_levels:
+            count = min(total, max(concurrency * 20, 100))
+            elapsed = await _send_many(client, count, concurrency)
+            results.append({
+                'concurrency': concurrency,
+                'sends': count,
+                'seconds': round(elapsed, 4),
+                'sends_per_second': round(count / elapsed, 1),
+            })
+    finally:
+        await client.close()
+        await api.stop()
+    return {'benchmark': 'transport', 'server_latency_s': latency, 'pool_limit': pool_limit, 'results': results}
+
+
+if __name__ == '__main__':
+    print(json.dumps(asyncio.run(run()), indent=2))
@@ -0,0 +1,97 @@
+"""
+A local stand-in for the Telegram Bot API, used by the benchmarks.
+
+It answers every method with a successful response after an optional artificial latency,
+so the client side can be measured without touching the real API.
+"""
+import asyncio
+import itertools
+import json
+from aiohttp import web
+
+TOKEN = '1234567890:' + 'A' * 35
+
+
+class _UpdateQueue:
+    def __init__(self):
+        self.update_ids = itertools.count(1)
+        self.updates = []
+        self.new_updates = asyncio.Event()
+
+
+class FakeBotAPI:
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.calls = 0
+        self.sent = 0
+        self._message_ids = itertools.count(1)
+        self._queues = {}
+        self._runner = None
+
+    def _queue(self, token):
+        queue = self._queues.get(token)
+        if queue is None:
+            queue = self._queues[token] = _UpdateQueue()
+        return queue
+
+    def push_update(self, update, token=TOKEN):
+        """
+        Queue an update to be returned by getUpdates of the bot with the given token, assigning it the next update_id.
+        """
+        queue = self._queue(token)
+        update['update_id'] = next(queue.update_ids)
+        queue.updates.append(update)
+        queue.new_updates.set()
+        return update['update_id']
+
+    async def _get_updates(self, request):
+        params = await request.json() if request.content_type == 'application/json' else await request.post()
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        queue = self._queue(request.match_info['token'])
+        queue.updates = [update for update in queue.updates if update['update_id'] >= offset]
+        if not queue.updates and timeout:
+            queue.new_updates.clear()
+            try:
+                await asyncio.wait_for(queue.new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return queue.updates[:limit]
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, request):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        method = request.match_info['method']
+        if method == 'getUpdates':
+            result = await self._get_updates(request)
+        elif method == 'getMe':
+            bot_id = int(request.match_info['token'].split(':', 1)[0])
+            username = 'bench_bot' if bot_id == 1234567890 else f"bench_bot_{bot_id}"
+            result = {'id': bot_id, 'is_bot': True, 'first_name': 'Bench', 'username': username}
+        else:
+            self.sent += 1
+            result = {'message_id': next(self._message_ids), 'date': 0, 'chat': {'id': 0, 'type': 'private'}}
+        return web.Response(body=json.dumps({'ok': True, 'result': result}), content_type='application/json')
+
+    async def start(self):
+        app = web.Application(client_max_size=1 << 40)
+        app.router.add_route('*', '/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
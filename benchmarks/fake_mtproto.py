@@ -0,0 +1,286 @@
+"""
+A local stand-in for an MTProto data center, used by the benchmarks.
+
+It speaks the abridged and intermediate transports. Clients either share a pre-made auth_key with it
+or create one with the Diffie-Hellman handshake, for which the server holds an RSA key (public_key)
+and uses the 2048-bit MODP group of RFC 3526 as dh_prime. Every RPC is answered with rpc_result after
+an optional artificial latency; by default the result echoes the query. Containers are unpacked, and
+the replies to one packet go back in one container. It enforces the server salt like a real data
+center: a message with a stale salt is rejected with bad_server_salt, and rotate_salt() starts a new one.
+"""
+import asyncio
+import os
+import sys
+import time
+from hashlib import sha1, sha256
+from random import getrandbits
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from XD.crpyto import tl
+from XD.crpyto.auth_key import is_probable_prime, new_nonce_hash, powmod, rsa_fingerprint, tmp_aes_key_iv
+from XD.crpyto.connection import AbridgedFraming, IntermediateFraming, Session
+from XD.crpyto.mtproto import CryptoContext, ige256
+
+AUTH_KEY = bytes(range(256))
+
+DH_PRIME = int(
+    'FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74020BBEA63B139B22514A08798E3404DD'
+    'EF9519B3CD3A431B302B0A6DF25F14374FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED'
+    'EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF0598DA48361C55D39A69163FA8FD24CF5F'
+    '83655D23DCA3AD961C62F356208552BB9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B'
+    'E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF6955817183995497CEA956AE515D2261898FA0510'
+    '15728E5A8AACAA68FFFFFFFFFFFFFFFF',
+    16,
+)
+DH_G = 2
+
+
+def _random_prime(bits=31):
+    while True:
+        candidate = getrandbits(bits) | (1 << (bits - 1)) | 1
+        if is_probable_prime(candidate, rounds=8):
+            return candidate
+
+
+class FakeMTProtoServer:
+    def __init__(self, auth_key=AUTH_KEY, latency=0.0, host='127.0.0.1', port=0, handler=None):
+        self.auth_keys = {}
+        if auth_key is not None:
+            self.add_auth_key(auth_key)
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.handler = handler or bytes
+        self.salt = int.from_bytes(os.urandom(8), 'little', signed=True)
+        self.calls = 0
+        self.received = 0
+        self.acks = 0
+        self.handshakes = 0
+        self._rsa_key = None
+        self._server = None
+        self._connections = {}
+
+    def add_auth_key(self, auth_key):
+        self.auth_keys[sha1(auth_key).digest()[-8:]] = auth_key
+
+    @property
+    def rsa_key(self):
+        if self._rsa_key is None:
+            self._rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return self._rsa_key
+
+    @property
+    def public_key(self):
+        """
+        The PEM of the RSA key clients need for the handshake.
+        """
+        return self.rsa_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+
+    def rotate_salt(self):
+        """
+        Replace the server salt; clients still using the old one get bad_server_salt.
+        """
+        self.salt = int.from_bytes(os.urandom(8), 'little', signed=True)
+        return self.salt
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader, writer):
+        self._connections[asyncio.current_task()] = writer
+        try:
+            tag = await reader.readexactly(1)
+            if tag == AbridgedFraming.tag:
+                framing = AbridgedFraming
+            else:
+                tag += await reader.readexactly(3)
+                if tag != IntermediateFraming.tag:
+                    return
+                framing = IntermediateFraming
+            context = None
+            handshake = {}
+            while True:
+                frame = await framing.read(reader)
+                auth_key_id = bytes(frame[:8])
+                if auth_key_id == b'\x00' * 8:
+                    reply = self._handshake(handshake, memoryview(frame)[20:])
+                    writer.writelines((framing.header(20 + len(reply)), b'\x00' * 8,
+                                       tl.LONG.pack(Session().msg_id(server=True)), tl.INT.pack(len(reply)), reply))
+                    await writer.drain()
+                    continue
+                auth_key = self.auth_keys.get(auth_key_id)
+                if auth_key is None:
+                    writer.write(framing.header(4) + (-404).to_bytes(4, 'little', signed=True))
+                    return
+                plain = bytearray(len(frame) - 24)
+                if context is not None and context[0].auth_key_id == auth_key_id:
+                    try:
+                        message = context[0].decrypt(frame, plain)
+                    except InvalidSignature:
+                        context = None
+                else:
+                    context = None
+                if context is None:
+                    session_id = self._peek_session(frame, auth_key)
+                    context = (CryptoContext(auth_key, session_id, server=True), Session(session_id))
+                    message = context[0].decrypt(frame, plain)
+                    await self._reply(writer, framing, context, [self._new_session_created(message)])
+                self.received += 1
+                replies = []
+                self._handle(int.from_bytes(plain[:8], 'little', signed=True), message, 0, replies)
+                if not replies:
+                    continue
+                if self.latency:
+                    asyncio.create_task(self._reply(writer, framing, context, replies))
+                else:
+                    await self._reply(writer, framing, context, replies)
+        except (asyncio.IncompleteReadError, ConnectionError, InvalidSignature):
+            pass
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+
+    def _peek_session(self, frame, auth_key):
+        """
+        Decrypt a message of an unknown session just far enough to read its session_id.
+        """
+        context = CryptoContext(auth_key, b'\x00' * 8, server=True)
+        plain = bytearray(len(frame) - 24)
+        try:
+            context.decrypt(frame, plain)
+        except InvalidSignature:
+            pass
+        return bytes(plain[8:16])
+
+    def _handshake(self, state, body):
+        """
+        Answer one unencrypted message of the auth_key handshake.
+        """
+        kind = tl.constructor(body)
+        nonce = bytes(body[4:20])
+        if kind == tl.REQ_PQ_MULTI:
+            p, q = sorted((_random_prime(), _random_prime()))
+            state.clear()
+            state.update(nonce=nonce, server_nonce=os.urandom(16), p=p, q=q)
+            numbers = self.rsa_key.public_key().public_numbers()
+            return (tl.INT.pack(tl.RES_PQ) + nonce + state['server_nonce'] + tl.pack_int(p * q)
+                    + tl.pack_longs([rsa_fingerprint(numbers.n, numbers.e)]))
+        if nonce != state.get('nonce') or bytes(body[20:36]) != state['server_nonce']:
+            raise ConnectionError("handshake message out of order")
+        if kind == tl.REQ_DH_PARAMS:
+            p, offset = tl.unpack_int(body, 36)
+            q, offset = tl.unpack_int(body, offset)
+            encrypted, _ = tl.unpack_bytes(body, offset + 8)
+            inner = memoryview(self._rsa_pad_decrypt(bytes(encrypted)))
+            _, offset = tl.unpack_bytes(inner, 4)
+            _, offset = tl.unpack_int(inner, offset)
+            _, offset = tl.unpack_int(inner, offset)
+            if (p, q) != (state['p'], state['q']) or inner[offset:offset + 16] != nonce:
+                raise ConnectionError("p_q_inner_data does not match")
+            state['new_nonce'] = new_nonce = bytes(inner[offset + 32:offset + 64])
+            state['a'] = a = getrandbits(2048)
+            g_a = powmod(DH_G, a, DH_PRIME)
+            data = (tl.INT.pack(tl.SERVER_DH_INNER_DATA) + nonce + state['server_nonce'] + tl.INT.pack(DH_G)
+                    + tl.pack_int(DH_PRIME) + tl.pack_int(g_a) + tl.INT.pack(int(time.time())))
+            answer = sha1(data).digest() + data
+            answer += os.urandom(-len(answer) % 16)
+            key, iv = tmp_aes_key_iv(state['server_nonce'], new_nonce)
+            encrypted = bytes(ige256(answer, key, iv, True))
+            return tl.INT.pack(tl.SERVER_DH_PARAMS_OK) + nonce + state['server_nonce'] + tl.pack_bytes(encrypted)
+        if kind == tl.SET_CLIENT_DH_PARAMS:
+            encrypted, _ = tl.unpack_bytes(body, 36)
+            key, iv = tmp_aes_key_iv(state['server_nonce'], state['new_nonce'])
+            inner = memoryview(ige256(encrypted, key, iv, False))[20:]
+            g_b, _ = tl.unpack_int(inner, 44)
+            auth_key = powmod(g_b, state['a'], DH_PRIME).to_bytes(256, 'big')
+            self.add_auth_key(auth_key)
+            self.handshakes += 1
+            return (tl.INT.pack(tl.DH_GEN_OK) + nonce + state['server_nonce']
+                    + new_nonce_hash(state['new_nonce'], 1, auth_key))
+        raise ConnectionError("unexpected handshake message")
+
+    def _rsa_pad_decrypt(self, encrypted):
+        """
+        Undo RSA_PAD, with the CRT form of the private key.
+        """
+        numbers = self.rsa_key.private_numbers()
+        c = int.from_bytes(encrypted, 'big')
+        m1 = powmod(c, numbers.dmp1, numbers.p)
+        m2 = powmod(c, numbers.dmq1, numbers.q)
+        m = m2 + numbers.q * ((numbers.iqmp * (m1 - m2)) % numbers.p)
+        key_aes_encrypted = m.to_bytes(256, 'big')
+        aes_encrypted = key_aes_encrypted[32:]
+        temp_key = bytes(a ^ b for a, b in zip(key_aes_encrypted[:32], sha256(aes_encrypted).digest()))
+        data_with_hash = bytes(ige256(aes_encrypted, temp_key, b'\x00' * 32, False))
+        data_with_padding = data_with_hash[:192][::-1]
+        if sha256(temp_key + data_with_padding).digest() != data_with_hash[192:]:
+            raise ConnectionError("RSA_PAD hash mismatch")
+        return data_with_padding
+
+    def _new_session_created(self, message):
+        first_msg_id = tl.LONG.unpack_from(message, 0)[0]
+        return tl.INT.pack(tl.NEW_SESSION_CREATED) + tl.NEW_SESSION_CREATED_BODY.pack(first_msg_id, 0, self.salt), False
+
+    def _handle(self, salt, message, offset, replies):
+        """
+        Handle the message at an offset, unpacking containers, and collect the replies it needs.
+        """
+        msg_id, seq_no, length = tl.MESSAGE_HEADER.unpack_from(message, offset)
+        start = offset + 16
+        body = message[start:start + length]
+        if salt != self.salt:
+            replies.append((tl.INT.pack(tl.BAD_SERVER_SALT) + tl.BAD_SERVER_SALT_BODY.pack(msg_id, seq_no, 48, self.salt), False))
+            return start + length
+        kind = tl.constructor(body)
+        if kind == tl.MSG_CONTAINER:
+            inner = 8
+            for _ in range(tl.INT.unpack_from(body, 4)[0]):
+                inner = self._handle(salt, body, inner, replies)
+        elif kind == tl.MSGS_ACK:
+            self.acks += len(tl.unpack_longs(body, 4)[0])
+        elif kind == tl.PING:
+            replies.append((tl.INT.pack(tl.PONG) + tl.PONG_BODY.pack(msg_id, tl.LONG.unpack_from(body, 4)[0]), False))
+        else:
+            self.calls += 1
+            replies.append((tl.RPC_RESULT_HEADER.pack(tl.RPC_RESULT, msg_id) + self.handler(body), True))
+        return start + length
+
+    async def _reply(self, writer, framing, context, replies):
+        """
+        Send the replies to one packet, packed into a container if there are several.
+        """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        crypto, session = context
+        if len(replies) == 1:
+            body, content_related = replies[0]
+        else:
+            parts = [tl.CONTAINER_HEADER.pack(tl.MSG_CONTAINER, len(replies))]
+            for inner, content_related in replies:
+                parts.append(tl.MESSAGE_HEADER.pack(session.msg_id(server=True), session.seq_no(content_related), len(inner)))
+                parts.append(inner)
+            body, content_related = b''.join(parts), False
+        header = tl.MESSAGE_HEADER.pack(session.msg_id(server=True), session.seq_no(content_related), len(body))
+        data = crypto.encrypt(header + body, self.salt)
+        try:
+            writer.writelines((framing.header(len(data)), data))
+            await writer.drain()
+        except ConnectionError:
+            pass
@@ -0,0 +1,168 @@
+"""
+Run the benchmark suite and write the results as one JSON document.
+
+    python benchmarks/run.py [--quick] [--only message,dispatch] [--output results.json]
+                             [--compare baseline.json] [--threshold 0.1]
+
+Every benchmark module exposes run(), which returns a JSON-serializable dict; this runner collects them
+together with the environment they ran in (Python, platform, CPUs, installed optional backends, git
+commit). With --compare, every throughput (*_per_second, higher is better) and cost (us_*, *_ms, bytes,
+lower is better) figure is checked against an earlier result file, and the exit status is 1 if any of
+them regressed by more than the threshold.
+"""
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+SUITE = {
+    'message': ('bench_message', {'iterations': 20000}),
+    'dispatch': ('bench_dispatch', {'count': 20000}),
+    'markup': ('bench_markup', {'iterations': 20000}),
+    'codec': ('bench_codec', {}),
+    'mtproto': ('bench_mtproto', {'sizes': (128, 64 * 1024)}),
+    'pipeline': ('bench_pipeline', {'count': 1000}),
+    'transport': ('bench_transport', {'total': 500, 'concurrency_levels': (1, 50)}),
+    'mtproto_transport': ('bench_mtproto_transport', {'total': 500, 'concurrency_levels': (1, 64)}),
+    'mtproto_containers': ('bench_mtproto_containers', {'total': 1000, 'concurrency_levels': (1, 64)}),
+    'crypto_executor': ('bench_crypto_executor', {'sessions': 16}),
+    'handshake': ('bench_handshake', {'count': 8, 'concurrency': 4}),
+    'sharding': ('bench_sharding', {'count': 100, 'process_counts': (2,)}),
+    'manager': ('bench_manager', {'bots': 50, 'updates_per_bot': 5}),
+    'conversation': ('bench_conversation', {'count': 10000, 'timeout': 0.3}),
+    'journal': ('bench_journal', {'count': 4000}),
+    'cache': ('bench_cache', {'burst': 200, 'lookups': 4000}),
+    'entities': ('bench_entities', {'count': 20000, 'backlog': 2000}),
+}
+
+OPTIONAL_BACKENDS = ('aiohttp', 'cryptography', 'msgspec', 'orjson', 'tgcrypto', 'gmpy2')
+
+
+def environment():
+    backends = {}
+    for name in OPTIONAL_BACKENDS:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            backends[name] = None
+        else:
+            version = getattr(module, '__version__', None)
+            backends[name] = (version() if callable(version) else version) or 'installed'
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+        'backends': backends,
+    }
+
+
+def run_benchmark(name, quick=False):
+    module_name, quick_kwargs = SUITE[name]
+    run = importlib.import_module(module_name).run
+    kwargs = quick_kwargs if quick else {}
+    started = time.perf_counter()
+    if inspect.iscoroutinefunction(run):
+        result = asyncio.run(run(**kwargs))
+    else:
+        result = run(**kwargs)
+    result['wall_seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _flatten(value, prefix=''):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            key = item.get('concurrency', index) if isinstance(item, dict) else index
+            yield from _flatten(item, f"{prefix}[{key}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def _direction(key):
+    leaf = key.rsplit('.', 1)[-1]
+    if 'per_second' in leaf:
+        return 1
+    if leaf.startswith('us_') or leaf.endswith('_ms') or 'bytes' in leaf or 'per_call' in leaf:
+        return -1
+    return 0
+
+
+def compare(current, baseline, threshold):
+    """
+    Return the figures of current that are worse than in baseline by more than threshold.
+    """
+    before = dict(_flatten(baseline.get('results', {})))
+    regressions = []
+    for key, value in _flatten(current.get('results', {})):
+        direction = _direction(key)
+        old = before.get(key)
+        if not direction or not old:
+            continue
+        change = (value - old) / old * direction
+        if change < -threshold:
+            regressions.append({'metric': key, 'baseline': old, 'current': value, 'change': round(change, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the XD benchmark suite.')
+    parser.add_argument('--only', help='Comma-separated benchmarks to run: ' + ', '.join(SUITE))
+    parser.add_argument('--quick', action='store_true', help='Use smaller workloads, for smoke runs.')
+    parser.add_argument('--output', help='Write the results to this file instead of stdout.')
+    parser.add_argument('--compare', help='A previous result file to check for regressions.')
+    parser.add_argument('--threshold', type=float, default=0.1, help='The tolerated relative regression. Default is 0.1.')
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(SUITE)
+    unknown = [name for name in names if name not in SUITE]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    document = {
+        'suite': 'XD',
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'quick': args.quick,
+        'environment': environment(),
+        'results': {},
+    }
+    for name in names:
+        print(f"running {name}...", file=sys.stderr)
+        document['results'][name] = run_benchmark(name, args.quick)
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as baseline:
+            document['regressions'] = compare(document, json.load(baseline), args.threshold)
+        for regression in document['regressions']:
+            print(f"regression: {regression['metric']} {regression['baseline']} -> {regression['current']}", file=sys.stderr)
+        status = 1 if document['regressions'] else 0
+
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,7 +7,13 @@ setup(
     install_requires=[
         'aiohttp',
         'requests',
+        'cryptography',
     ],
+    extras_require={
+        'fast': ['msgspec', 'orjson'],
+        'mtproto': ['tgcrypto', 'gmpy2'],
+        'test': ['pytest'],
+    },
     entry_points={
         'console_scripts': [
             'XD=XD:main',
@@ -0,0 +1,80 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from XD import Client
+from XD.webhook import _ReplySlot, _reply_slot
+
+TOKEN = '1234567890:' + 'A' * 35
+
+
+def _broadcast(chat_ids, failing=(), checkpoint=None, in_webhook=False):
+    """
+    Broadcast to chat_ids through a stand-in Bot API. Chat 2 is deactivated, chat 3 blocked the bot,
+    "@gone" does not exist and the chats in failing get a 500. Returns the result and the chats sent to.
+    """
+    sent = []
+
+    async def main():
+        async def handle(request):
+            chat_id = (await request.json())['chat_id']
+            sent.append(chat_id)
+            if chat_id == 2:
+                return web.json_response({'ok': False, 'description': 'Forbidden: user is deactivated'}, status=403)
+            if chat_id == 3:
+                return web.json_response({'ok': False, 'description': 'Forbidden: bot was blocked by the user'}, status=403)
+            if chat_id == '@gone':
+                return web.json_response({'ok': False, 'description': 'Bad Request: chat not found'}, status=400)
+            if chat_id in failing:
+                return web.json_response({'ok': False, 'description': 'Internal Server Error'}, status=500)
+            return web.json_response({'ok': True, 'result': {'message_id': 1}})
+
+        app = web.Application()
+        app.router.add_post('/bot{token}/sendMessage', handle)
+        api = TestServer(app)
+        await api.start_server()
+        client = Client(TOKEN, api_url=str(api.make_url('')).rstrip('/'), rate_limiter=False)
+        slot = None
+        if in_webhook:
+            slot = _ReplySlot(asyncio.get_running_loop().create_future())
+            _reply_slot.set(slot)
+        try:
+            result = await client.broadcast(chat_ids, text='hi', concurrency=4, checkpoint=checkpoint)
+        finally:
+            await client.transport.close()
+            await api.close()
+        if slot is not None:
+            assert not slot.future.done()
+        return result
+
+    return asyncio.run(main()), sent
+
+
+def test_statuses():
+    result, sent = _broadcast([1, 2, 3, '@gone', 4], failing=(4,))
+    assert result.delivered == [1]
+    assert result.forbidden == [2]
+    assert result.blocked == [3]
+    assert result.not_found == ['@gone']
+    assert result.failed == [4]
+
+
+def test_sends_from_a_webhook_handler_are_not_claimed_by_the_reply():
+    result, sent = _broadcast([1, 5], in_webhook=True)
+    assert sorted(result.delivered) == [1, 5]
+    assert sorted(sent) == [1, 5]
+
+
+def test_resume_skips_final_chats_with_mixed_id_types(tmp_path):
+    checkpoint = str(tmp_path / 'broadcast.log')
+    chat_ids = [1, '12345', '@channel', 2, 7, '@retry']
+    first, sent = _broadcast(chat_ids, failing=(7, '@retry'), checkpoint=checkpoint)
+    assert sorted(first.failed, key=str) == [7, '@retry']
+    second, sent = _broadcast(chat_ids, checkpoint=checkpoint)
+    assert sorted(sent, key=str) == [7, '@retry']
+    assert sorted(second.delivered, key=str) == [1, '12345', 7, '@channel', '@retry']
+    assert second.forbidden == [2]
+    third, sent = _broadcast([1, 12345, '1', '@channel'], checkpoint=checkpoint)
+    assert sent == []
+    assert sorted(third.delivered, key=str) == [1, '1', 12345, '@channel']
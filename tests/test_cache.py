@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from XD.cache import ResponseCache
+
+
+def test_concurrent_identical_calls_send_one_request():
+    async def main():
+        cache = ResponseCache()
+        calls = []
+        release = asyncio.Event()
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return {'id': 1, 'title': 'A'}
+
+        waiting = [asyncio.ensure_future(cache.get('getChat', {'chat_id': 1}, fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert cache.stats()['inflight'] == 1
+        release.set()
+        results = await asyncio.gather(*waiting)
+        assert all(result is results[0] for result in results)
+        assert len(calls) == 1
+        assert await cache.get('getChat', {'chat_id': 1}, fetch) is results[0]
+        assert cache.stats() == {'entries': 1, 'inflight': 0, 'hits': 1, 'misses': 1, 'coalesced': 4}
+
+    asyncio.run(main())
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    async def main():
+        cache = ResponseCache()
+        release = asyncio.Event()
+
+        async def fail():
+            await release.wait()
+            raise ConnectionError('down')
+
+        async def empty():
+            return None
+
+        waiting = [asyncio.ensure_future(cache.get('getChat', {'chat_id': 1}, fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        for result in await asyncio.gather(*waiting, return_exceptions=True):
+            assert isinstance(result, ConnectionError)
+        assert await cache.get('getChat', {'chat_id': 1}, empty) is None
+        assert len(cache) == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_leader_hands_the_call_to_a_waiter():
+    async def main():
+        cache = ResponseCache()
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return {'id': 1}
+
+        leader = asyncio.ensure_future(cache.get('getChat', {'chat_id': 1}, fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.get('getChat', {'chat_id': 1}, fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await follower == {'id': 1}
+        assert len(calls) == 2
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(main())
+
+
+def test_entries_expire_and_uncached_methods_always_fetch():
+    async def main():
+        cache = ResponseCache(ttls={'getChat': 0.01})
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return {'ok': len(calls)}
+
+        await cache.get('getChat', {'chat_id': 1}, fetch)
+        await asyncio.sleep(0.02)
+        assert cache.peek('getChat', {'chat_id': 1}) is None
+        await cache.get('getChatMember', {'chat_id': 1, 'user_id': 2}, fetch)
+        await cache.get('getChatMember', {'chat_id': 1, 'user_id': 2}, fetch)
+        assert len(calls) == 3
+        assert len(cache) == 0
+
+    asyncio.run(main())
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_size=2)
+    cache.put('getChat', {'chat_id': 1}, 'one')
+    cache.put('getChat', {'chat_id': 2}, 'two')
+    assert cache.peek('getChat', {'chat_id': 1}) == 'one'
+    cache.put('getChat', {'chat_id': 3}, 'three')
+    assert cache.peek('getChat', {'chat_id': 2}) is None
+    assert cache.peek('getChat', {'chat_id': 1}) == 'one'
+
+
+def test_invalidate_by_chat_and_method():
+    cache = ResponseCache()
+    cache.put('getChat', {'chat_id': 1}, 'chat one')
+    cache.put('getChatAdministrators', {'chat_id': 1}, 'admins one')
+    cache.put('getChat', {'chat_id': 2}, 'chat two')
+    cache.put('getMe', None, 'me')
+    assert cache.invalidate(chat_id=1, method='getChatAdministrators') == 1
+    assert cache.peek('getChat', {'chat_id': 1}) == 'chat one'
+    assert cache.invalidate(chat_id=1) == 1
+    assert cache.peek('getChat', {'chat_id': 2}) == 'chat two'
+    assert cache.invalidate() == 2
+    assert len(cache) == 0
+
+
+def test_updates_about_a_chat_drop_its_entries():
+    cache = ResponseCache()
+    cache.put('getChat', {'chat_id': 1}, 'chat one')
+    cache.put('getChat', {'chat_id': 2}, 'chat two')
+    cache.put('getMe', None, 'me')
+    cache.observe({'update_id': 1, 'message': {'chat': {'id': 1}, 'text': 'hello'}})
+    assert cache.peek('getChat', {'chat_id': 1}) == 'chat one'
+    cache.observe({'update_id': 2, 'message': {'chat': {'id': 1}, 'new_chat_title': 'B'}})
+    assert cache.peek('getChat', {'chat_id': 1}) is None
+    cache.observe({'update_id': 3, 'chat_member': {'chat': {'id': 2}}})
+    assert cache.peek('getChat', {'chat_id': 2}) is None
+    assert cache.peek('getMe') == 'me'
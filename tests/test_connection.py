@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import zlib
+
+import pytest
+
+from XD.crpyto import tl
+from XD.crpyto.connection import MTProtoConnection
+from XD.crpyto.executor import CryptoExecutor
+from XD.exceptions import RPCError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from fake_mtproto import AUTH_KEY, FakeMTProtoServer
+
+QUERY = b'\x8a\x3e\x8f\x0c'
+
+
+def _run(test, handler=None, **options):
+    async def main():
+        server = await FakeMTProtoServer(handler=handler).start()
+        connection = MTProtoConnection('127.0.0.1', server.port, auth_key=AUTH_KEY, timeout=5, **options)
+        await connection.connect()
+        try:
+            await test(server, connection)
+        finally:
+            await connection.close()
+            await server.stop()
+
+    asyncio.run(main())
+
+
+def _queries(count):
+    return [QUERY + index.to_bytes(4, 'little') for index in range(count)]
+
+
+def test_concurrent_calls_share_containers_and_survive_a_stale_salt():
+    async def test(server, connection):
+        queries = _queries(50)
+        results = await asyncio.gather(*(connection.invoke(query) for query in queries))
+        assert [bytes(result) for result in results] == queries
+        assert connection.session.salt == server.salt
+        assert server.calls == 50
+        stats = connection.stats()
+        assert stats['messages_sent'] >= 100
+        assert stats['packets_sent'] <= 4
+        assert stats['in_flight'] == 0
+
+    _run(test)
+
+
+def test_without_containers_every_message_is_its_own_packet():
+    async def test(server, connection):
+        connection.session.salt = server.salt
+        await asyncio.gather(*(connection.invoke(query) for query in _queries(10)))
+        stats = connection.stats()
+        assert stats['packets_sent'] == stats['messages_sent'] >= 10
+
+    _run(test, containers=False)
+
+
+def test_rotated_salt_resends_the_calls():
+    async def test(server, connection):
+        await connection.invoke(QUERY)
+        server.rotate_salt()
+        results = await asyncio.gather(*(connection.invoke(query) for query in _queries(5)))
+        assert [bytes(result) for result in results] == _queries(5)
+        assert connection.session.salt == server.salt
+
+    _run(test)
+
+
+def test_results_are_acknowledged():
+    async def test(server, connection):
+        connection.session.salt = server.salt
+        await connection.invoke(QUERY)
+        for _ in range(100):
+            if server.acks:
+                break
+            await asyncio.sleep(0.01)
+        assert server.acks >= 1
+
+    _run(test, ack_delay=0.01)
+
+
+def test_rpc_errors_and_gzip_results():
+    def handler(body):
+        if bytes(body) == QUERY + b'err!':
+            return tl.RPC_ERROR_HEADER.pack(tl.RPC_ERROR, 420) + tl.pack_bytes(b'FLOOD_WAIT_3')
+        return tl.INT.pack(tl.GZIP_PACKED) + tl.pack_bytes(zlib.compress(bytes(body) * 10))
+
+    async def test(server, connection):
+        assert bytes(await connection.invoke(QUERY + b'zip!')) == (QUERY + b'zip!') * 10
+        with pytest.raises(RPCError) as error:
+            await connection.invoke(QUERY + b'err!')
+        assert error.value.code == 420 and error.value.message == 'FLOOD_WAIT_3'
+
+    _run(test, handler=handler)
+
+
+def test_malformed_result_fails_calls_with_connection_error():
+    def handler(body):
+        return tl.INT.pack(tl.GZIP_PACKED) + tl.pack_bytes(b'not zlib data')
+
+    async def test(server, connection):
+        with pytest.raises(ConnectionError):
+            await connection.invoke(QUERY)
+        await asyncio.sleep(0)
+        assert not connection.connected
+
+    _run(test, handler=handler)
+
+
+def test_executor_keeps_packets_in_order():
+    executor = CryptoExecutor(workers=2, inline_threshold=0)
+
+    async def test(server, connection):
+        queries = _queries(200)
+        results = await asyncio.gather(*(connection.invoke(query) for query in queries))
+        assert [bytes(result) for result in results] == queries
+
+    try:
+        _run(test, executor=executor, containers=False)
+    finally:
+        executor.close()
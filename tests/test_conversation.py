@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from XD.conversation import Conversations, TimerWheel
+from XD.exceptions import ConversationTimeOut
+
+
+def _update(chat_id, user_id, text):
+    return {'update_id': 1, 'message': {'chat': {'id': chat_id}, 'from': {'id': user_id}, 'text': text}}
+
+
+def test_timers_fire_in_deadline_order_and_the_wheel_stops_when_empty():
+    async def main():
+        wheel = TimerWheel(tick=0.01, slots=4)
+        fired = []
+        wheel.schedule(0.05, lambda: fired.append('far'))
+        wheel.schedule(0.01, lambda: fired.append('near'))
+        cancelled = wheel.schedule(0.02, lambda: fired.append('cancelled'))
+        assert len(wheel) == 3
+        assert wheel.cancel(cancelled)
+        assert not wheel.cancel(cancelled)
+        await asyncio.sleep(0.02)
+        assert fired == ['near']
+        await asyncio.sleep(0.06)
+        assert fired == ['near', 'far']
+        assert len(wheel) == 0 and wheel._handle is None
+
+    asyncio.run(main())
+
+
+def test_wait_times_out_and_is_forgotten():
+    async def main():
+        conversations = Conversations(lambda message: message, tick=0.01)
+        with pytest.raises(ConversationTimeOut):
+            await conversations.wait(1, timeout=0.03)
+        assert len(conversations) == 0
+        assert len(conversations.wheel) == 0
+        assert not conversations.feed(_update(1, 2, 'late'))
+
+    asyncio.run(main())
+
+
+def test_answered_wait_cancels_its_timer():
+    async def main():
+        conversations = Conversations(lambda message: message, tick=0.01)
+        answer = conversations.register(1, 2, filters=lambda message: message['text'] == 'yes', timeout=10)
+        assert not conversations.feed(_update(1, 2, 'no'))
+        assert not conversations.feed(_update(1, 3, 'yes'))
+        assert conversations.feed(_update(1, 2, 'yes'))
+        assert (await answer)['text'] == 'yes'
+        await asyncio.sleep(0)
+        assert len(conversations) == 0
+        assert len(conversations.wheel) == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_wait_cancels_its_timer():
+    async def main():
+        conversations = Conversations(lambda message: message, tick=0.01)
+        answer = conversations.register(1, timeout=10)
+        answer.cancel()
+        await asyncio.sleep(0)
+        assert len(conversations) == 0
+        assert len(conversations.wheel) == 0
+
+    asyncio.run(main())
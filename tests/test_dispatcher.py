@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from XD.dispatcher import Dispatcher, chat_key
+
+
+def _update(update_id, chat_id):
+    return {'update_id': update_id, 'message': {'chat': {'id': chat_id}}}
+
+
+def test_chat_key():
+    assert chat_key(_update(1, 5)) == 5
+    assert chat_key({'update_id': 2, 'callback_query': {'from': {'id': 7}}}) == 7
+    assert chat_key({'update_id': 3, 'chat_member': {'chat': {'id': -9}}}) == -9
+    assert chat_key({'update_id': 4, 'inline_query': {'from': {'id': 8}}}) == 8
+    assert chat_key({'update_id': 5}) == ('update', 5)
+
+
+def test_updates_of_a_chat_run_in_order_and_chats_in_parallel():
+    async def main():
+        dispatcher = Dispatcher(workers=8)
+        handled = []
+        running = {}
+        overlap = []
+
+        async def handler(update):
+            chat_id = update['message']['chat']['id']
+            assert not running.get(chat_id)
+            running[chat_id] = True
+            overlap.append(sum(running.values()))
+            await asyncio.sleep(0.001 * (update['update_id'] % 3))
+            handled.append((chat_id, update['update_id']))
+            running[chat_id] = False
+
+        dispatcher.start(handler)
+        for update_id in range(60):
+            await dispatcher.submit(_update(update_id, update_id % 4))
+        await dispatcher.join()
+        await dispatcher.stop()
+        for chat_id in range(4):
+            ids = [update_id for chat, update_id in handled if chat == chat_id]
+            assert ids == sorted(ids) and len(ids) == 15
+        assert max(overlap) > 1
+
+    asyncio.run(main())
+
+
+def test_submit_blocks_when_the_chat_queue_is_full():
+    async def main():
+        dispatcher = Dispatcher(workers=2, chat_queue_size=2)
+        release = asyncio.Event()
+
+        async def handler(update):
+            await release.wait()
+
+        dispatcher.start(handler)
+        for update_id in range(3):
+            await dispatcher.submit(_update(update_id, 1))
+        await asyncio.sleep(0)
+        blocked = asyncio.ensure_future(dispatcher.submit(_update(3, 1)))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        await asyncio.wait_for(dispatcher.submit(_update(4, 2)), 1)
+        release.set()
+        await asyncio.wait_for(blocked, 1)
+        await dispatcher.join()
+        assert dispatcher.pending == 0
+        await dispatcher.stop()
+
+    asyncio.run(main())
+
+
+def test_join_waits_for_every_update_and_errors_do_not_stop_workers():
+    async def main():
+        dispatcher = Dispatcher(workers=2)
+        handled = []
+
+        async def handler(update):
+            await asyncio.sleep(0.001)
+            if update['update_id'] == 1:
+                raise RuntimeError("handler failed")
+            handled.append(update['update_id'])
+
+        dispatcher.start(handler)
+        for update_id in range(5):
+            await dispatcher.submit(_update(update_id, update_id))
+        await dispatcher.join()
+        assert sorted(handled) == [0, 2, 3, 4]
+        await dispatcher.stop()
+        assert not dispatcher.running
+
+    asyncio.run(main())
+
+
+def test_stop_without_drain_cancels_pending_updates():
+    async def main():
+        dispatcher = Dispatcher(workers=1)
+        started = asyncio.Event()
+        handled = []
+
+        async def handler(update):
+            started.set()
+            await asyncio.sleep(10)
+            handled.append(update['update_id'])
+
+        dispatcher.start(handler)
+        for update_id in range(3):
+            await dispatcher.submit(_update(update_id, 1))
+        await started.wait()
+        await asyncio.wait_for(dispatcher.stop(drain=False), 1)
+        assert handled == []
+        assert dispatcher.pending == 0 and not dispatcher.running
+
+    asyncio.run(main())
+
+
+def test_invalid_sizes_are_rejected():
+    with pytest.raises(ValueError):
+        Dispatcher(workers=0)
+    with pytest.raises(ValueError):
+        Dispatcher(chat_queue_size=0)
@@ -0,0 +1,35 @@
+from XD import EntityStore, TelegramMessage
+
+
+class _Bot:
+    def __init__(self, entities):
+        self.entities = entities
+
+
+def test_messages_share_unchanged_entities():
+    store = EntityStore()
+    bot = _Bot(store)
+    first = TelegramMessage({'chat': {'id': 1, 'type': 'group', 'title': 'A'}, 'from': {'id': 2, 'first_name': 'U'}}, bot)
+    second = TelegramMessage({'chat': {'id': 1, 'type': 'group', 'title': 'A'}, 'from': {'id': 2, 'first_name': 'U'}}, bot)
+    assert first.chat is second.chat
+    assert first.from_user is second.from_user
+    assert store.get_chat(1) is first.chat
+    assert store.stats()['hits'] == 2
+
+
+def test_changed_entity_is_replaced_without_touching_held_ones():
+    store = EntityStore()
+    old = store.chat({'id': 1, 'type': 'group', 'title': 'Old'})
+    new = store.chat({'id': 1, 'type': 'group', 'title': 'New'})
+    assert old is not new
+    assert old.title == 'Old' and new.title == 'New'
+    assert store.get_chat(1) is new
+    assert store.stats()['updates'] == 1
+
+
+def test_least_recently_seen_entities_are_forgotten():
+    store = EntityStore(max_users=2)
+    for user_id in (1, 2, 1, 3):
+        store.user({'id': user_id})
+    assert store.get_user(2) is None
+    assert store.get_user(1) is not None and store.get_user(3) is not None
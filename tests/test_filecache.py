@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from XD import Client
+from XD.filecache import FileIdCache
+
+TOKEN = '1234567890:' + 'A' * 35
+
+
+def test_entries_persist_through_the_sqlite_file(tmp_path):
+    path = str(tmp_path / 'file_ids.sqlite')
+
+    async def main():
+        cache = FileIdCache(path)
+        cache.put('photo:a', 'A')
+        cache.put('photo:b', 'B')
+        cache.discard('photo:b')
+        await cache.flush()
+        cache.close()
+        reopened = FileIdCache(path, max_size=1)
+        try:
+            assert await reopened.get('photo:a') == 'A'
+            assert await reopened.get('photo:b') is None
+            assert reopened.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+        finally:
+            reopened.close()
+
+    asyncio.run(main())
+
+
+def test_keys_of_bytes_are_their_sha256():
+    async def main():
+        cache = FileIdCache()
+        small, large = b'x' * 10, b'y' * (1024 * 1024)
+        assert await cache.key('photo', small) == 'photo:sha256:' + hashlib.sha256(small).hexdigest()
+        assert await cache.key('photo', large) == 'photo:sha256:' + hashlib.sha256(large).hexdigest()
+        assert await cache.key('video', large) != await cache.key('photo', large)
+
+    asyncio.run(main())
+
+
+def _send_photo(answer_file_id):
+    """
+    Send the same bytes twice through a client with a file cache, the second time answering the
+    cached file_id with answer_file_id(status, description). Returns the second response and the calls.
+    """
+    calls = []
+
+    async def main():
+        async def handle(request):
+            if request.content_type.startswith('multipart/'):
+                calls.append('upload')
+                return web.json_response({'ok': True, 'result': {'photo': [{'file_id': 'F1'}]}})
+            calls.append('file_id')
+            status, description = answer_file_id
+            if status == 200:
+                return web.json_response({'ok': True, 'result': {'photo': [{'file_id': 'F1'}]}})
+            return web.json_response({'ok': False, 'error_code': status, 'description': description}, status=status)
+
+        app = web.Application()
+        app.router.add_post('/bot{token}/sendPhoto', handle)
+        api = TestServer(app)
+        await api.start_server()
+        client = Client(TOKEN, api_url=str(api.make_url('')).rstrip('/'), rate_limiter=False, file_cache=FileIdCache())
+        try:
+            await client.send_photo(1, b'\x89PNG' + b'\x00' * 100)
+            response = await client.send_photo(1, b'\x89PNG' + b'\x00' * 100)
+            return response, client.file_cache.stats()
+        finally:
+            await client.transport.close()
+            await api.close()
+
+    response, stats = asyncio.run(main())
+    return response, stats, calls
+
+
+def test_cached_file_id_is_reused():
+    response, stats, calls = _send_photo((200, ''))
+    assert response['ok']
+    assert calls == ['upload', 'file_id']
+
+
+def test_rejected_file_id_is_uploaded_again():
+    response, stats, calls = _send_photo((400, 'Bad Request: wrong file identifier/HTTP URL specified'))
+    assert response['ok']
+    assert calls == ['upload', 'file_id', 'upload']
+    assert stats['size'] == 1
+
+
+def test_other_failures_keep_the_file_id_and_do_not_upload():
+    response, stats, calls = _send_photo((500, 'Internal Server Error'))
+    assert response is None
+    assert calls == ['upload', 'file_id']
+    assert stats['size'] == 1
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import os
+
+from XD.journal import UpdateJournal, read_journal, _segments
+
+
+def _body(update_id, **fields):
+    return json.dumps(dict({'update_id': update_id, 'message': {'message_id': update_id, 'text': 'hi'}}, **fields)).encode()
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def _write(path, update_ids, done=(), **options):
+    """
+    Journal the given updates one batch each, mark some as handled and close the journal cleanly.
+    """
+    journal = UpdateJournal(path, fsync=False, checkpoint_interval=3600, **options)
+    await journal.open()
+    for update_id in update_ids:
+        await journal.append([{'update_id': update_id}], [_body(update_id)])
+    for update_id in done:
+        journal.done(update_id)
+    await journal.close()
+
+
+async def _reopen(path, **options):
+    journal = UpdateJournal(path, fsync=False, checkpoint_interval=3600, **options)
+    pending = await journal.open()
+    await journal.close()
+    return journal, pending
+
+
+def test_unhandled_updates_are_recovered_with_their_raw_bodies(tmp_path):
+    path = str(tmp_path)
+    body = _body(7, business_message={'unknown_field': [1, 2]})
+
+    async def write():
+        journal = UpdateJournal(path, fsync=False, checkpoint_interval=3600)
+        await journal.open()
+        await journal.append([{'update_id': 7}], [body])
+        await journal.append([{'update_id': 8}, {'update_id': 9}], [_body(8), _body(9)])
+        journal.done(8)
+        await journal.close()
+
+    _run(write())
+    journal, pending = _run(_reopen(path))
+    assert pending == [(7, body), (9, _body(9))]
+    assert journal.last_id == 9
+    assert journal.unhandled == 2
+
+
+def test_appends_without_bodies_are_encoded_with_the_codec(tmp_path):
+    path = str(tmp_path)
+
+    async def write():
+        journal = UpdateJournal(path, fsync=False, checkpoint_interval=3600)
+        await journal.open()
+        await journal.append([{'update_id': 1, 'message': {'text': 'hi'}}])
+        await journal.close()
+
+    _run(write())
+    [(update_id, body)] = list(read_journal(path))
+    assert update_id == 1
+    assert json.loads(body) == {'update_id': 1, 'message': {'text': 'hi'}}
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    path = str(tmp_path)
+    _run(_write(path, [1, 2, 3]))
+    [(first_id, segment)] = _segments(path)
+    intact = os.path.getsize(segment)
+    with open(segment, 'ab') as file:
+        file.write(_body(4)[:5])
+    journal, pending = _run(_reopen(path))
+    assert [update_id for update_id, body in pending] == [1, 2, 3]
+    assert os.path.getsize(segment) == intact
+
+
+def test_corrupt_record_ends_the_segment(tmp_path):
+    path = str(tmp_path)
+    _run(_write(path, [1, 2, 3]))
+    [(first_id, segment)] = _segments(path)
+    with open(segment, 'r+b') as file:
+        data = bytearray(file.read())
+        data[-2] ^= 0xFF
+        file.seek(0)
+        file.write(data)
+    journal, pending = _run(_reopen(path))
+    assert [update_id for update_id, body in pending] == [1, 2]
+
+
+def test_damage_in_an_older_segment_is_reported(tmp_path, caplog):
+    path = str(tmp_path)
+    _run(_write(path, [1, 2, 3], segment_size=1))
+    (first, older), second, third = _segments(path)
+    with open(older, 'ab') as file:
+        file.write(b'\x00' * 7)
+    with caplog.at_level(logging.WARNING, logger='XD.journal'):
+        journal, pending = _run(_reopen(path, segment_size=1))
+    assert [update_id for update_id, body in pending] == [1, 2, 3]
+    assert any(os.path.basename(older) in record.getMessage() for record in caplog.records)
+    assert os.path.getsize(older) > 0
+
+
+def test_checkpoint_deletes_handled_segments(tmp_path):
+    path = str(tmp_path)
+    _run(_write(path, [1, 2, 3, 4], done=[1, 2], segment_size=1))
+    assert [first_id for first_id, segment in _segments(path)] == [3, 4]
+    journal, pending = _run(_reopen(path, segment_size=1))
+    assert [update_id for update_id, body in pending] == [3, 4]
+
+
+def test_all_handled_leaves_nothing_pending(tmp_path):
+    path = str(tmp_path)
+    _run(_write(path, [1, 2, 3], done=[1, 2, 3], segment_size=1))
+    assert len(_segments(path)) == 1
+    journal, pending = _run(_reopen(path, segment_size=1))
+    assert pending == []
+    assert journal.last_id == 3
@@ -0,0 +1,125 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from XD import BotManager
+
+FIRST = '1111111111:' + 'A' * 35
+SECOND = '2222222222:' + 'B' * 35
+REJECTED = '3333333333:' + 'C' * 35
+
+
+class _API:
+    """
+    A stand-in Bot API hosting several bots: updates are queued per token, and getUpdates
+    answers with the queued updates at or after the offset, or an empty list after a short poll.
+    """
+
+    def __init__(self):
+        self.updates = {}
+        self.polls = {}
+        self.sent = []
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        self.server = TestServer(app)
+
+    def push(self, token, update_id, chat_id, text):
+        message = {'message_id': update_id, 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}, 'text': text}
+        self.updates.setdefault(token, []).append({'update_id': update_id, 'message': message})
+
+    async def handle(self, request):
+        token, method = request.match_info['token'], request.match_info['method']
+        data = await request.json() if request.can_read_body else {}
+        if token == REJECTED:
+            return web.json_response({'ok': False, 'error_code': 401, 'description': 'Unauthorized'}, status=401)
+        if method == 'getMe':
+            return web.json_response({'ok': True, 'result': {'id': int(token.split(':')[0]), 'username': 'bot' + token[0]}})
+        if method == 'getUpdates':
+            self.polls[token] = self.polls.get(token, 0) + 1
+            offset = data.get('offset') or 0
+            updates = [update for update in self.updates.get(token, []) if update['update_id'] >= offset]
+            if not updates:
+                await asyncio.sleep(0.02)
+            return web.json_response({'ok': True, 'result': updates})
+        self.sent.append((token, data['chat_id'], data['text']))
+        return web.json_response({'ok': True, 'result': {'message_id': 1}})
+
+
+async def _until(condition, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("The condition was not met in time.")
+
+
+def _echo(manager, token):
+    client = manager.add(token, rate_limiter=False)
+
+    @client.on_message()
+    async def echo(message):
+        await client.send_message(message.chat.id, message.text)
+
+    return client
+
+
+def _run(test):
+    async def main():
+        api = _API()
+        await api.server.start_server()
+        manager = BotManager(api_url=str(api.server.make_url('')).rstrip('/'))
+        running = asyncio.get_running_loop().create_task(manager.start(timeout=1))
+        try:
+            await test(api, manager)
+        finally:
+            running.cancel()
+            await asyncio.gather(running, return_exceptions=True)
+            await api.server.close()
+
+    asyncio.run(main())
+
+
+def test_bots_added_while_running_start_polling():
+    async def test(api, manager):
+        first = _echo(manager, FIRST)
+        await _until(lambda: FIRST in api.polls)
+        assert first.username == 'bot1'
+        second = _echo(manager, SECOND)
+        api.push(FIRST, 1, 10, 'one')
+        api.push(SECOND, 1, 20, 'two')
+        await _until(lambda: len(api.sent) == 2)
+        assert sorted(api.sent) == [(FIRST, 10, 'one'), (SECOND, 20, 'two')]
+        assert second.transport is manager.transport
+        assert len(manager) == 2
+
+    _run(test)
+
+
+def test_removed_bot_stops_polling_while_the_others_keep_running():
+    async def test(api, manager):
+        _echo(manager, FIRST)
+        _echo(manager, SECOND)
+        await _until(lambda: FIRST in api.polls and SECOND in api.polls)
+        removed = await manager.remove(FIRST)
+        assert removed.token == FIRST
+        assert FIRST not in manager
+        assert await manager.remove(FIRST) is None
+        polls = api.polls[FIRST]
+        api.push(FIRST, 1, 10, 'ignored')
+        api.push(SECOND, 1, 20, 'handled')
+        await _until(lambda: api.sent)
+        await asyncio.sleep(0.1)
+        assert api.sent == [(SECOND, 20, 'handled')]
+        assert api.polls[FIRST] == polls
+
+    _run(test)
+
+
+def test_rejected_token_is_removed():
+    async def test(api, manager):
+        _echo(manager, REJECTED)
+        await _until(lambda: REJECTED not in manager)
+        assert REJECTED not in api.polls
+
+    _run(test)
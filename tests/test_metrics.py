@@ -0,0 +1,73 @@
+import asyncio
+from time import perf_counter
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from XD.metrics import PROMETHEUS_CONTENT_TYPE, Histogram, Metrics
+
+
+def _recorded():
+    metrics = Metrics(latency_buckets=(0.1, 1.0), handler_buckets=(0.1,), lag_buckets=(1.0,))
+    for _ in range(2):
+        metrics.request_finished('sendMessage', metrics.request_started(), 200)
+    metrics.request_finished('sendMessage', metrics.request_started(), 429)
+    metrics.request_failed('getChat', metrics.request_started(), TimeoutError())
+    metrics.request_started()
+    metrics.handler_finished('/start', perf_counter(), failed=True)
+    metrics.add_gauge('dispatcher_pending_updates', 'Updates not yet handled.', lambda: 7)
+    return metrics
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram((1.0, 2.0))
+    for value in (0.5, 1.5, 1.5, 5.0):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1]
+    assert histogram.quantile(0.5) == 1.5
+    assert histogram.quantile(1.0) == 2.0
+    assert Histogram((1.0,)).quantile(0.5) == 0.0
+
+
+def test_prometheus_exposition_format():
+    text = _recorded().prometheus()
+    assert text.endswith('\n')
+    lines = text.splitlines()
+    assert '# TYPE xd_api_request_duration_seconds histogram' in lines
+    assert 'xd_api_request_duration_seconds_bucket{method="sendMessage",le="0.1"} 3' in lines
+    assert 'xd_api_request_duration_seconds_bucket{method="sendMessage",le="1.0"} 3' in lines
+    assert 'xd_api_request_duration_seconds_bucket{method="sendMessage",le="+Inf"} 3' in lines
+    assert 'xd_api_request_duration_seconds_count{method="sendMessage"} 3' in lines
+    assert 'xd_api_responses_total{method="sendMessage",status="200"} 2' in lines
+    assert 'xd_api_responses_total{method="sendMessage",status="429"} 1' in lines
+    assert 'xd_api_errors_total{method="getChat",error="TimeoutError"} 1' in lines
+    assert 'xd_api_requests_in_flight 1' in lines
+    assert 'xd_handler_errors_total{handler="/start"} 1' in lines
+    assert 'xd_update_lag_seconds_bucket{le="+Inf"} 0' in lines
+    assert 'xd_update_lag_seconds_count 0' in lines
+    assert '# TYPE xd_dispatcher_pending_updates gauge' in lines
+    assert 'xd_dispatcher_pending_updates 7' in lines
+    for line in lines:
+        if not line.startswith('#'):
+            name = line.split('{', 1)[0].split(' ', 1)[0]
+            assert f'# TYPE {name}' in text or f'# TYPE {name.rsplit("_", 1)[0]}' in text
+
+
+def test_label_values_are_escaped():
+    metrics = Metrics(prefix='bot')
+    metrics.handler_finished('say "hi"\\\n', perf_counter())
+    assert 'bot_handler_duration_seconds_count{handler="say \\"hi\\"\\\\\\n"} 1' in metrics.prometheus().splitlines()
+
+
+def test_scrape_endpoint():
+    async def main():
+        metrics = _recorded()
+        app = web.Application()
+        metrics.add_route(app)
+        async with TestClient(TestServer(app)) as http:
+            response = await http.get('/metrics')
+            assert response.status == 200
+            assert response.headers['Content-Type'] == PROMETHEUS_CONTENT_TYPE
+            assert await response.text() == metrics.prometheus()
+
+    asyncio.run(main())
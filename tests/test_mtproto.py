@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+from hashlib import sha1
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+
+from XD.crpyto import mtproto
+from XD.crpyto.auth_key import check_dh_value, factorize
+from XD.crpyto.connection import MTProtoConnection
+from XD.crpyto.mtproto import CryptoContext, decrypt_message, encrypt_message, ige256
+from XD.exceptions import SecurityError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from fake_mtproto import DH_PRIME, FakeMTProtoServer, _random_prime
+
+AUTH_KEY = bytes(range(256))
+SESSION_ID = b'\x01' * 8
+KEY = bytes(range(32))
+IV = bytes(range(32, 64))
+
+
+@pytest.fixture(params=['tgcrypto', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(mtproto, 'tgcrypto', None)
+    elif mtproto.tgcrypto is None:
+        pytest.skip("tgcrypto is not installed")
+    return request.param
+
+
+def test_ige_round_trip(backend):
+    data = os.urandom(16 * 9)
+    encrypted = bytes(ige256(data, KEY, IV, True))
+    assert encrypted != data
+    assert bytes(ige256(encrypted, KEY, IV, False)) == data
+
+
+def test_ige_writes_into_out(backend):
+    data = os.urandom(64)
+    expected = bytes(ige256(data, KEY, IV, True))
+    buffer = bytearray(data)
+    assert bytes(ige256(buffer, KEY, IV, True, buffer)) == expected
+    assert bytes(buffer) == expected
+
+
+def test_ige_backends_agree():
+    if mtproto.tgcrypto is None:
+        pytest.skip("tgcrypto is not installed")
+    data = os.urandom(16 * 33)
+    tgcrypto, mtproto.tgcrypto = mtproto.tgcrypto, None
+    try:
+        python = bytes(ige256(data, KEY, IV, True))
+    finally:
+        mtproto.tgcrypto = tgcrypto
+    assert bytes(ige256(data, KEY, IV, True)) == python
+
+
+def test_ige_rejects_partial_blocks():
+    with pytest.raises(ValueError):
+        ige256(b'\x00' * 15, KEY, IV, True)
+
+
+def test_context_round_trip(backend):
+    client = CryptoContext(AUTH_KEY, SESSION_ID)
+    server = CryptoContext(AUTH_KEY, SESSION_ID, server=True)
+    message = os.urandom(48)
+    encrypted = client.encrypt(message, salt=-5)
+    assert len(encrypted) == CryptoContext.encrypted_size(len(message))
+    assert bytes(server.decrypt(encrypted)[:len(message)]) == message
+    reply = server.encrypt(message, salt=7, out=bytearray(CryptoContext.encrypted_size(len(message))))
+    assert bytes(client.decrypt(reply, out=bytearray(len(reply) - 24))[:len(message)]) == message
+
+
+def test_context_matches_the_message_functions(backend):
+    auth_key_id = sha1(AUTH_KEY).digest()[-8:]
+    server = CryptoContext(AUTH_KEY, SESSION_ID, server=True)
+    message = os.urandom(32)
+    encrypted = encrypt_message(message, 3, SESSION_ID, AUTH_KEY, auth_key_id)
+    assert bytes(server.decrypt(encrypted)[:len(message)]) == message
+    assert decrypt_message(bytes(server.encrypt(message, 3)), SESSION_ID, AUTH_KEY, auth_key_id)[:len(message)] == message
+
+
+def test_context_rejects_tampering():
+    client = CryptoContext(AUTH_KEY, SESSION_ID)
+    server = CryptoContext(AUTH_KEY, SESSION_ID, server=True)
+    encrypted = bytearray(client.encrypt(os.urandom(32), salt=0))
+    encrypted[-1] ^= 1
+    with pytest.raises(InvalidSignature):
+        server.decrypt(encrypted)
+    with pytest.raises(InvalidSignature):
+        CryptoContext(AUTH_KEY, b'\x02' * 8, server=True).decrypt(client.encrypt(b'\x00' * 16, salt=0))
+
+
+def test_factorize():
+    p, q = sorted((_random_prime(), _random_prime()))
+    assert factorize(p * q) == (p, q)
+
+
+def test_dh_value_range():
+    check_dh_value(pow(2, 12345, DH_PRIME), DH_PRIME)
+    for value in (1, 2, DH_PRIME - 1):
+        with pytest.raises(SecurityError):
+            check_dh_value(value, DH_PRIME)
+
+
+def test_handshake_creates_a_shared_auth_key():
+    async def main():
+        server = await FakeMTProtoServer(auth_key=None).start()
+        connection = MTProtoConnection('127.0.0.1', server.port, public_keys=[server.public_key], timeout=10)
+        try:
+            await connection.connect()
+            assert len(connection.auth_key) == 256
+            assert server.auth_keys == {sha1(connection.auth_key).digest()[-8:]: connection.auth_key}
+            query = b'\x8a\x3e\x8f\x0c' + os.urandom(32)
+            assert bytes(await connection.invoke(query)) == query
+        finally:
+            await connection.close()
+            await server.stop()
+
+    asyncio.run(main())
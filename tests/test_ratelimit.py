@@ -0,0 +1,66 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from XD import Client
+from XD.ratelimit import BULK, INTERACTIVE, RateLimiter, TokenBucket
+
+TOKEN = '1234567890:' + 'A' * 35
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    bucket.take(now)
+    bucket.take(now)
+    assert bucket.delay(now) == 0.5
+    assert bucket.delay(now + 0.5) == 0.0
+    bucket.pause(3, now + 0.5)
+    assert bucket.delay(now + 1) == 2.5
+
+
+def test_calls_without_a_chat_take_from_the_global_bucket():
+    calls = []
+
+    async def main():
+        async def handle(request):
+            calls.append(request.match_info['method'])
+            return web.json_response({'ok': True, 'result': True})
+
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', handle)
+        api = TestServer(app)
+        await api.start_server()
+        limiter = RateLimiter(global_rate=1000, global_burst=2)
+        client = Client(TOKEN, api_url=str(api.make_url('')).rstrip('/'), rate_limiter=limiter)
+        try:
+            await client._send_request('answerCallbackQuery', {'callback_query_id': '1'})
+            await client._send_request('setWebhook', {'url': 'https://example.com'})
+            await client._send_request('getMe', {})
+            await client._send_request('sendMessage', {'chat_id': 5, 'text': 'hi'})
+            assert limiter.stats()['acquired'] == 3
+            assert limiter.stats()['busy_chats'] == 0
+            assert list(limiter._chats) == [5]
+        finally:
+            await client.transport.close()
+            await api.close()
+
+    asyncio.run(main())
+    assert calls == ['answerCallbackQuery', 'setWebhook', 'getMe', 'sendMessage']
+
+
+def test_global_bucket_serves_interactive_calls_first():
+    async def main():
+        limiter = RateLimiter(global_rate=50, global_burst=1)
+        await limiter.acquire()
+        order = []
+
+        async def call(name, priority):
+            await limiter.acquire(None, priority)
+            order.append(name)
+
+        await asyncio.gather(call('bulk', BULK), call('interactive', INTERACTIVE))
+        return order
+
+    assert asyncio.run(main()) == ['interactive', 'bulk']
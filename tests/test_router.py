@@ -0,0 +1,88 @@
+import asyncio
+
+from XD import TelegramMessage, filters
+from XD.router import Router
+
+
+def _message(text='', **fields):
+    data = {'message_id': 1, 'date': 0, 'chat': {'id': -100, 'type': 'supergroup'}, 'from': {'id': 42}}
+    if text:
+        data['text'] = text
+    data.update(fields)
+    return TelegramMessage(data, None)
+
+
+async def _noop(message):
+    pass
+
+
+def _router(*specs, username=None):
+    router = Router()
+    handlers = [router.add(_noop, **spec) for spec in specs]
+    router.compile(username)
+    return router, handlers
+
+
+def test_command_and_username_suffix():
+    router, (start,) = _router({'commands': ('/start',)}, username='XDBot')
+    assert router.match(_message('/start')) is start
+    assert router.match(_message('/start payload')) is start
+    assert router.match(_message('/start@xdbot')) is start
+    assert router.match(_message('/start@otherbot')) is None
+    assert router.match(_message('/stop')) is None
+
+
+def test_command_with_leading_whitespace_does_not_match():
+    router, handlers = _router({'commands': ('/start',)})
+    assert router._command(' /start') is None
+    assert router._command('') is None
+    assert router.match(_message(' /start')) is None
+
+
+def test_first_registered_handler_wins():
+    router, (pattern, command, fallback) = _router(
+        {'pattern': r'^/help'}, {'commands': ('/help',)}, {},
+    )
+    assert router.match(_message('/help')) is pattern
+    assert router.match(_message('hello')) is fallback
+    assert router.match(_message()) is fallback
+
+
+def test_prefixes_and_pattern_match():
+    router, (bang, words) = _router({'prefixes': ('!', '!!')}, {'pattern': r'(\w+) world'})
+    assert router.match(_message('!!ban')) is bang
+    message = _message('hello world')
+    assert router.match(message) is words
+    assert message.match.group(1) == 'hello'
+
+
+def test_filters_combine():
+    admin = filters.user(42) & filters.group & ~filters.content('photo')
+    router, (only_admin, other) = _router({'filters': admin}, {'filters': filters.private | filters.text})
+    assert router.match(_message('hi')) is only_admin
+    assert router.match(_message(photo=[{'file_id': 'x'}])) is None
+    assert router.match(_message('hi', **{'from': {'id': 7}})) is other
+    assert router.match(_message(**{'from': {'id': 7}})) is None
+
+
+def test_filter_helpers():
+    message = _message('/ping now', chat={'id': 5, 'type': 'private'})
+    assert filters.private(message) and not filters.group(message) and not filters.channel(message)
+    assert filters.chat(5)(message) and not filters.chat(6)(message)
+    assert filters.prefix('/p')(message) and not filters.prefix('ping')(message)
+    assert filters.regex(r'NOW', flags=2)(message)
+    assert filters.content('text')(message)
+    assert not filters.text(_message())
+
+
+def test_dispatch_runs_the_callback():
+    router = Router()
+    seen = []
+
+    async def callback(message):
+        seen.append(message.text)
+
+    router.add(callback, commands=('/go',))
+    assert asyncio.run(router.dispatch(_message('/go'))) is True
+    assert asyncio.run(router.dispatch(_message('/stay'))) is False
+    assert seen == ['/go']
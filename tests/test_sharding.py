@@ -0,0 +1,104 @@
+import asyncio
+import os
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from XD import Client, ShardedDispatcher
+
+TOKEN = '1234567890:' + 'A' * 35
+
+
+def _update(update_id, chat_id, text):
+    return {'update_id': update_id, 'message': {
+        'message_id': update_id, 'date': 0, 'text': text,
+        'chat': {'id': chat_id, 'type': 'private'}, 'from': {'id': chat_id},
+    }}
+
+
+def _run(updates, on_text, outbound='funnel', processes=2, **options):
+    """
+    Dispatch updates through a ShardedDispatcher whose workers call on_text(message) and then reply
+    with the message text. Returns the (chat_id, text) of every reply the stand-in Bot API received,
+    in arrival order, and the dispatcher's stats.
+    """
+    replies = []
+
+    async def main():
+        async def handle(request):
+            data = await request.json()
+            replies.append((data['chat_id'], data['text']))
+            return web.json_response({'ok': True, 'result': {'message_id': 1}})
+
+        app = web.Application()
+        app.router.add_post('/bot{token}/sendMessage', handle)
+        api = TestServer(app)
+        await api.start_server()
+        client = Client(TOKEN, api_url=str(api.make_url('')).rstrip('/'), rate_limiter=False)
+
+        @client.on_message()
+        async def reply(message):
+            on_text(message)
+            await client.send_message(message.chat.id, message.text)
+
+        client.dispatcher = dispatcher = ShardedDispatcher(
+            client, processes, outbound=outbound, restart_delay=0.05, max_restart_delay=0.2, **options)
+        client.router.compile()
+        dispatcher.start()
+        try:
+            for update in updates:
+                await dispatcher.submit(update)
+            await asyncio.wait_for(dispatcher.join(), 20)
+            return dispatcher.stats()
+        finally:
+            await dispatcher.stop(drain=False)
+            await client.transport.close()
+            await api.close()
+
+    stats = asyncio.run(main())
+    return replies, stats
+
+
+def _nothing(message):
+    pass
+
+
+def test_updates_of_a_chat_keep_their_order_across_processes():
+    updates = [_update(update_id, update_id % 5, f"{update_id % 5}:{update_id}") for update_id in range(100)]
+    replies, stats = _run(updates, _nothing)
+    assert len(replies) == 100
+    for chat_id in range(5):
+        texts = [text for chat, text in replies if chat == chat_id]
+        assert texts == [f"{chat_id}:{update_id}" for update_id in range(chat_id, 100, 5)]
+    assert all(shard['restarts'] == 0 and shard['pending'] == 0 for shard in stats)
+
+
+def test_direct_outbound_sends_from_the_workers():
+    replies, stats = _run([_update(update_id, update_id, 'hi') for update_id in range(10)], _nothing, outbound='direct')
+    assert sorted(replies) == [(update_id, 'hi') for update_id in range(10)]
+
+
+def test_dead_worker_is_restarted_and_its_updates_redelivered(tmp_path):
+    marker = str(tmp_path / 'crashed')
+
+    def crash_once(message):
+        if message.text == 'crash' and not os.path.exists(marker):
+            open(marker, 'w').close()
+            os._exit(1)
+
+    updates = [_update(1, 7, 'crash'), _update(2, 7, 'after')]
+    replies, stats = _run(updates, crash_once, processes=1)
+    assert replies == [(7, 'crash'), (7, 'after')]
+    assert stats[0]['restarts'] == 1
+
+
+def test_update_that_keeps_crashing_its_worker_is_dropped():
+    def crash(message):
+        if message.text == 'poison':
+            os._exit(1)
+
+    updates = [_update(1, 7, 'poison'), _update(2, 8, 'fine')]
+    replies, stats = _run(updates, crash, processes=1, max_redeliveries=1)
+    assert replies == [(8, 'fine')]
+    assert stats[0]['restarts'] == 2
+    assert stats[0]['pending'] == 0
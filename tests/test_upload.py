@@ -0,0 +1,89 @@
+import asyncio
+import io
+import os
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from XD import Client
+from XD.upload import InputFile, is_local_file
+
+TOKEN = '1234567890:' + 'A' * 35
+CHUNK = 64 * 1024
+
+
+def _upload(media, progress):
+    """
+    Send media with send_document to a stand-in Bot API and return the bytes and file name it received.
+    """
+    received = {}
+
+    async def main():
+        async def handle(request):
+            form = await request.post()
+            document = form['document']
+            received['data'] = document.file.read()
+            received['filename'] = document.filename
+            return web.json_response({'ok': True, 'result': {'document': {'file_id': 'F'}}})
+
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/bot{token}/sendDocument', handle)
+        api = TestServer(app)
+        await api.start_server()
+        client = Client(TOKEN, api_url=str(api.make_url('')).rstrip('/'), rate_limiter=False)
+        try:
+            payload = media if isinstance(media, str) else InputFile(media, progress=progress, chunk_size=CHUNK)
+            response = await client.send_document(1, payload, progress=progress)
+            assert response['ok']
+        finally:
+            await client.transport.close()
+            await api.close()
+
+    asyncio.run(main())
+    return received
+
+
+def _expected_progress(size, chunk_size):
+    return [(min(sent, size), size) for sent in range(chunk_size, size + chunk_size, chunk_size)]
+
+
+def test_path_is_streamed_with_progress(tmp_path):
+    source = os.urandom(5 * 256 * 1024 + 123)
+    path = tmp_path / 'clip.bin'
+    path.write_bytes(source)
+    calls = []
+    received = _upload(str(path), lambda sent, total: calls.append((sent, total)))
+    assert received['data'] == source
+    assert received['filename'] == 'clip.bin'
+    assert calls == _expected_progress(len(source), 256 * 1024)
+
+
+def test_file_object_is_streamed_from_its_position(tmp_path):
+    source = os.urandom(3 * CHUNK + 7)
+    file = io.BytesIO(b'header' + source)
+    file.seek(6)
+    calls = []
+
+    async def progress(sent, total):
+        calls.append((sent, total))
+
+    received = _upload(file, progress)
+    assert received['data'] == source
+    assert calls == _expected_progress(len(source), CHUNK)
+
+
+def test_bytes_are_uploaded():
+    source = os.urandom(CHUNK + 1)
+    calls = []
+    received = _upload(source, lambda sent, total: calls.append((sent, total)))
+    assert received['data'] == source
+    assert received['filename'] == 'file'
+    assert calls == [(CHUNK, len(source)), (len(source), len(source))]
+
+
+def test_is_local_file(tmp_path):
+    path = tmp_path / 'a.jpg'
+    path.write_bytes(b'x')
+    assert is_local_file(str(path))
+    assert not is_local_file('https://example.com/a.jpg')
+    assert not is_local_file('AgACAgIAAxkBAAIB')
@@ -0,0 +1,115 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from XD import Client
+from XD.webhook import SECRET_TOKEN_HEADER, WebhookServer
+
+TOKEN = '1234567890:' + 'A' * 35
+SECRET = 'secret'
+
+
+def _update(update_id, text='/start'):
+    return {
+        'update_id': update_id,
+        'message': {'message_id': update_id, 'date': 0, 'chat': {'id': 5, 'type': 'private'}, 'from': {'id': 5}, 'text': text},
+    }
+
+
+async def _api(calls):
+    """
+    Start a stand-in Bot API that records the calls it receives.
+    """
+    async def handle(request):
+        calls.append((request.match_info['method'], await request.json()))
+        return web.json_response({'ok': True, 'result': {'message_id': 100}})
+
+    app = web.Application()
+    app.router.add_post('/bot{token}/{method}', handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def _run(test):
+    async def main():
+        calls = []
+        api = await _api(calls)
+        client = Client(TOKEN, api_url=str(api.make_url('')).rstrip('/'), rate_limiter=False)
+
+        @client.on_message(command='/start')
+        async def start(message):
+            await client.send_message(message.chat.id, 'first')
+            await client.send_message(message.chat.id, 'second')
+
+        webhook = WebhookServer(client, secret_token=SECRET)
+        client.router.compile()
+        client.dispatcher.start(webhook.handle_update)
+        http = TestClient(TestServer(webhook.app))
+        await http.start_server()
+        try:
+            await test(http, calls, client)
+        finally:
+            await http.close()
+            await client.dispatcher.stop(drain=False)
+            await client.transport.close()
+            await api.close()
+
+    asyncio.run(main())
+
+
+def test_wrong_secret_is_rejected():
+    async def test(http, calls, client):
+        response = await http.post('/webhook', json=_update(1), headers={SECRET_TOKEN_HEADER: 'wrong'})
+        assert response.status == 403
+        response = await http.post('/webhook', json=_update(1))
+        assert response.status == 403
+        assert calls == []
+
+    _run(test)
+
+
+def test_malformed_update_is_rejected():
+    async def test(http, calls, client):
+        response = await http.post('/webhook', data=b'{"no": "id"}', headers={SECRET_TOKEN_HEADER: SECRET})
+        assert response.status == 400
+
+    _run(test)
+
+
+def test_first_reply_goes_in_the_response_and_the_second_over_the_transport():
+    async def test(http, calls, client):
+        response = await http.post('/webhook', json=_update(1), headers={SECRET_TOKEN_HEADER: SECRET})
+        assert response.status == 200
+        body = await response.json()
+        assert body['method'] == 'sendMessage'
+        assert body['chat_id'] == 5 and body['text'] == 'first'
+        await client.dispatcher.join()
+        assert [(method, data['text']) for method, data in calls] == [('sendMessage', 'second')]
+
+    _run(test)
+
+
+def test_duplicate_update_is_answered_empty():
+    async def test(http, calls, client):
+        headers = {SECRET_TOKEN_HEADER: SECRET}
+        first = await http.post('/webhook', json=_update(7), headers=headers)
+        assert (await first.json())['text'] == 'first'
+        await client.dispatcher.join()
+        again = await http.post('/webhook', json=_update(7), headers=headers)
+        assert again.status == 200
+        assert await again.read() == b''
+        await client.dispatcher.join()
+        assert len(calls) == 1
+
+    _run(test)
+
+
+def test_update_without_a_handler_call_is_answered_empty():
+    async def test(http, calls, client):
+        response = await http.post('/webhook', json=_update(2, text='hello'), headers={SECRET_TOKEN_HEADER: SECRET})
+        assert response.status == 200
+        assert await response.read() == b''
+
+    _run(test)